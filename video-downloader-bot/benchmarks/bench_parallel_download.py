@@ -0,0 +1,77 @@
+"""
+בנצ'מרק: קצב הורדה בחיבור אחד מול חיבורים מקבילים
+
+מול RangeServer מקומי שמגביל כל חיבור בנפרד:
+- קובץ רציף: HttpFD רגיל מול ParallelRangeFD (range_connections)
+- HLS: מקטע אחרי מקטע מול concurrent_fragment_downloads
+
+הרצה:
+    python benchmarks/bench_parallel_download.py [--size-mb 32] [--rate-mb 4] [--connections 1 4 8]
+"""
+
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+
+from range_server import RangeServer  # noqa: E402
+from services.range_download import DOWNLOADER_NAME  # noqa: E402  (רושם את המוריד ב-yt-dlp)
+
+
+def _download(url: str, connections: int, tmp: str) -> float:
+    """הורדה אחת עם מספר חיבורים נתון - מחזיר משך בשניות"""
+    opts = {
+        'quiet': True,
+        'no_warnings': True,
+        'noprogress': True,
+        'outtmpl': os.path.join(tmp, f'{connections}_%(id)s.%(ext)s'),
+        'concurrent_fragment_downloads': connections,
+        'external_downloader': {'http': DOWNLOADER_NAME},
+        'range_connections': connections,
+    }
+    start = time.perf_counter()
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        ydl.download([url])
+    return time.perf_counter() - start
+
+
+def _check(tmp: str, connections: int, expected: str) -> bool:
+    """בדיקה שהקובץ שהורד זהה למקור"""
+    for name in os.listdir(tmp):
+        if name.startswith(f'{connections}_'):
+            with open(os.path.join(tmp, name), 'rb') as f:
+                return hashlib.sha1(f.read()).hexdigest() == expected
+    return False
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=32)
+    parser.add_argument('--rate-mb', type=float, default=4, help="מגבלת קצב לחיבור (MB/s)")
+    parser.add_argument('--connections', type=int, nargs='+', default=[1, 4, 8])
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    server = RangeServer(size=size, rate=args.rate_mb * 1024 * 1024).start()
+    expected = hashlib.sha1(server.data).hexdigest()
+
+    print(f"{args.size_mb}MB, {args.rate_mb}MB/s לחיבור")
+    for name, path in (('progressive', '/video.mp4'), ('hls', '/hls/index.m3u8')):
+        for connections in args.connections:
+            with tempfile.TemporaryDirectory() as tmp:
+                elapsed = _download(server.url(path), connections, tmp)
+                ok = _check(tmp, connections, expected)
+            print(f"{name:<12} x{connections:<3} {elapsed:7.2f}s  "
+                  f"{args.size_mb / elapsed:7.1f}MB/s  {'ok' if ok else 'MISMATCH'}")
+
+    server.stop()
+
+
+if __name__ == '__main__':
+    main()
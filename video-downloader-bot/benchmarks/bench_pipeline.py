@@ -0,0 +1,312 @@
+"""
+בנצ'מרק מקצה לקצה: קישור → מידע → הורדה → שליחה, בלי רשת
+
+מפעיל RangeServer עם fixtures (קובץ רציף, HLS, DASH ודף HTML ל-generic
+extractor) ו-FakeTelegramServer, ומריץ את ההנדלרים האמיתיים של הבוט:
+handle_url → handle_download_callback → handle_quality_callback (אם יש בחירת
+איכות) → מתזמן ההורדות → שליחה. עבודה מסתיימת כשהשרת המזויף מקבל
+sendVideo/sendDocument/sendAudio או הודעת שגיאה.
+
+לכל תרחיש: תפוקה, אחוזוני זמן (p50/p90/p99), שיא זיכרון (RSS) ושיא דיסק
+בתיקיית ההורדות, וקריאות Bot API לעבודה. התרחיש cached שולח את אותו סרטון
+שוב ושוב (קאש file_id).
+
+הרצה:
+    python benchmarks/bench_pipeline.py [--jobs 20] [--concurrency 4] [--size-mb 8]
+        [--rate-mb 16] [--scenarios progressive hls dash page cached] [--ram-scratch /dev/shm/bench]
+        [--json out.json]
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_telegram import FakeTelegramServer, make_update, make_callback  # noqa: E402
+from range_server import RangeServer  # noqa: E402
+
+SCENARIOS = ('progressive', 'hls', 'dash', 'page', 'cached')
+SEND_METHODS = ('sendVideo', 'sendDocument', 'sendAudio')
+ERROR_PREFIX = '❌'
+
+
+def _configure_env(args: argparse.Namespace, fake: FakeTelegramServer) -> None:
+    """הגדרות סביבה לפני טעינת config - תור גדול מספיק ובלי מגבלות למשתמש"""
+    os.environ.setdefault('BOT_TOKEN', '123456:BENCHMARK_TOKEN')
+    os.environ['DOWNLOAD_WORKERS'] = str(args.workers)
+    os.environ['DOWNLOAD_QUEUE_SIZE'] = str(args.jobs * 2)
+    os.environ['MAX_QUEUED_DOWNLOADS_PER_USER'] = str(args.jobs)
+    if args.ram_scratch:
+        os.environ['RAM_SCRATCH_DIR'] = args.ram_scratch
+
+    from telebot import apihelper
+    apihelper.API_URL = fake.api_url
+
+    from services import install_api_client
+    install_api_client()
+
+
+class ResourceSampler:
+    """דגימת RSS של התהליך ונפח תיקיית ההורדות ב-thread רקע"""
+
+    def __init__(self, directory: Path, interval: float = 0.05):
+        self.directory = directory
+        self.interval = interval
+        self.peak_rss = 0
+        self.peak_disk = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def __enter__(self) -> 'ResourceSampler':
+        self._thread = threading.Thread(target=self._loop, name="sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def _sample(self) -> None:
+        self.peak_rss = max(self.peak_rss, rss_bytes())
+        disk = 0
+        for root, _, files in os.walk(self.directory):  # כולל תיקיות העבודה
+            for name in files:
+                try:
+                    disk += os.stat(os.path.join(root, name)).st_size
+                except FileNotFoundError:
+                    pass  # נמחק בזמן הסריקה
+        self.peak_disk = max(self.peak_disk, disk)
+
+
+def rss_bytes() -> int:
+    """RSS נוכחי (Linux), או שיא ה-RSS של התהליך בשאר המערכות"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """אחוזון בשיטת nearest-rank"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+class PipelineDriver:
+    """מריץ עבודות מקצה לקצה דרך ההנדלרים ומחכה לתוצאה מהשרת המזויף"""
+
+    def __init__(self, bot, fake: FakeTelegramServer, timeout: float):
+        self.bot = bot
+        self.timeout = timeout
+        self._done: Dict[int, threading.Event] = {}
+        self._results: Dict[int, str] = {}
+        self._lock = threading.Lock()
+        fake.on_call = self._on_call
+
+    def _on_call(self, method: str, params: Dict[str, Any]) -> None:
+        """זיהוי סיום עבודה לפי הקריאה ל-API"""
+        if method in SEND_METHODS:
+            self._finish(int(params.get('chat_id') or 0), 'ok')
+        elif method == 'editMessageText' and str(params.get('text', '')).startswith(ERROR_PREFIX):
+            self._finish(int(params.get('chat_id') or 0), 'error')
+        elif method == 'answerCallbackQuery' and str(params.get('text', '')).startswith(ERROR_PREFIX):
+            # מזהה ה-callback מקודד את הצ'אט (ראה run_job)
+            self._finish(int(params.get('callback_query_id') or 0) // 10, 'rejected')
+
+    def _finish(self, chat_id: int, result: str) -> None:
+        with self._lock:
+            event = self._done.get(chat_id)
+            if event is None or event.is_set():
+                return
+            self._results[chat_id] = result
+        event.set()
+
+    def run_job(self, chat_id: int, url: str) -> Dict[str, Any]:
+        """
+        עבודה אחת: שליחת קישור, לחיצה על הורדה ובחירת איכות אם מוצגת
+
+        Args:
+            chat_id: מזהה משתמש/צ'אט ייחודי לעבודה
+            url: הקישור
+
+        Returns:
+            מילון עם תוצאה וזמן
+        """
+        from handlers.common import get_cache
+        from services import get_available_qualities
+
+        event = threading.Event()
+        with self._lock:
+            self._done[chat_id] = event
+
+        start = time.perf_counter()
+        self._process(make_update(chat_id * 10, url, user_id=chat_id))
+
+        found = get_cache().find_by_url(url)
+        if found is None:
+            return {'result': 'no_cache_key', 'latency': time.perf_counter() - start}
+        cache_key = found[0]
+
+        self._process(make_callback(chat_id * 10 + 1, f'download:{cache_key}', user_id=chat_id))
+
+        # אם הוצגו כפתורי איכות - בחירת האיכות הראשונה (כמו משתמש)
+        info = (get_cache().get(cache_key) or {}).get('info')
+        qualities = [q for q in (get_available_qualities(info) if info else []) if not q.get('audio_only')]
+        if qualities and not event.is_set():
+            data = f"quality:{cache_key}:{qualities[0]['height']}"
+            self._process(make_callback(chat_id * 10 + 2, data, user_id=chat_id))
+
+        if not event.wait(self.timeout):
+            result = 'timeout'
+        else:
+            result = self._results.get(chat_id, 'ok')
+        return {'result': result, 'latency': time.perf_counter() - start}
+
+    def _process(self, update: Dict[str, Any]) -> None:
+        from telebot import types
+        self.bot.process_new_updates([types.Update.de_json(update)])
+
+
+def run_scenario(name: str, driver: PipelineDriver, server: RangeServer, args: argparse.Namespace,
+                 first_chat: int, run_id: str) -> Dict[str, Any]:
+    """
+    הרצת תרחיש אחד ומדידת תפוקה, זמנים ומשאבים
+
+    Returns:
+        מילון תוצאות
+    """
+    from config import DOWNLOADS_DIR
+    from services import get_scratch
+
+    kind = 'progressive' if name == 'cached' else name
+    urls = [
+        server.fixture_url(kind, f'{run_id}-cached' if name == 'cached' else f'{run_id}-{name}-{i}')
+        for i in range(args.jobs)
+    ]
+
+    if name == 'cached':
+        # שליחה ראשונה מחוץ למדידה - אחריה כל העבודות הן פגיעות בקאש ה-file_id
+        driver.run_job(first_chat - 1, urls[0])
+
+    ram_before = get_scratch().stats()['tiers']['ram']['jobs']
+    baseline_rss = rss_bytes()
+    start = time.perf_counter()
+    with ResourceSampler(DOWNLOADS_DIR) as sampler:
+        with ThreadPoolExecutor(max_workers=args.concurrency, thread_name_prefix="driver") as pool:
+            results = list(pool.map(
+                lambda pair: driver.run_job(first_chat + pair[0], pair[1]), enumerate(urls)
+            ))
+    wall = time.perf_counter() - start
+
+    ok = [r['latency'] for r in results if r['result'] == 'ok']
+    failures: Dict[str, int] = {}
+    for r in results:
+        if r['result'] != 'ok':
+            failures[r['result']] = failures.get(r['result'], 0) + 1
+
+    return {
+        'scenario': name,
+        'jobs': len(results),
+        'ok': len(ok),
+        'failures': failures,
+        'wall_s': round(wall, 3),
+        'jobs_per_s': round(len(ok) / wall, 2),
+        'mb_per_s': round(len(ok) * args.size_mb / wall, 1),
+        'p50_s': round(percentile(ok, 50), 3),
+        'p90_s': round(percentile(ok, 90), 3),
+        'p99_s': round(percentile(ok, 99), 3),
+        'max_s': round(max(ok, default=0.0), 3),
+        'peak_rss_mb': round(sampler.peak_rss / 2 ** 20, 1),
+        'rss_growth_mb': round((sampler.peak_rss - baseline_rss) / 2 ** 20, 1),
+        'peak_disk_mb': round(sampler.peak_disk / 2 ** 20, 1),
+        'ram_jobs': get_scratch().stats()['tiers']['ram']['jobs'] - ram_before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--jobs', type=int, default=20, help="עבודות לכל תרחיש")
+    parser.add_argument('--concurrency', type=int, default=4, help="עבודות בו-זמנית")
+    parser.add_argument('--workers', type=int, default=3, help="DOWNLOAD_WORKERS")
+    parser.add_argument('--size-mb', type=int, default=8)
+    parser.add_argument('--rate-mb', type=float, default=16, help="מגבלת קצב לחיבור (MB/s)")
+    parser.add_argument('--latency', type=float, default=0.01, help="השהיית API מזויפת (שניות)")
+    parser.add_argument('--timeout', type=float, default=120, help="זמן מקסימלי לעבודה")
+    parser.add_argument('--scenarios', nargs='+', choices=SCENARIOS, default=list(SCENARIOS))
+    parser.add_argument('--ram-scratch', help="RAM_SCRATCH_DIR (לדוגמה /dev/shm/bench) להשוואת שכבות")
+    parser.add_argument('--json', help="כתיבת התוצאות לקובץ JSON")
+    args = parser.parse_args()
+
+    fake = FakeTelegramServer(latency=args.latency).start()
+    server = RangeServer(size=args.size_mb * 2 ** 20, rate=args.rate_mb * 2 ** 20, segments=16).start()
+    _configure_env(args, fake)
+
+    import logging
+    import telebot
+    from handlers import register_all_handlers
+    from services import get_scheduler, get_ydl_pool
+    import services.file_cache as file_cache
+
+    logging.disable(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # קאש file_id נפרד - לא נוגע ב-data/ של הבוט
+        file_cache._file_cache = file_cache.FileIdCache(Path(tmp) / 'file_cache.db')
+
+        bot = telebot.TeleBot(os.environ['BOT_TOKEN'], threaded=False)
+        register_all_handlers(bot)
+        driver = PipelineDriver(bot, fake, args.timeout)
+        run_id = uuid.uuid4().hex[:6]
+
+        print(f"{args.jobs} עבודות לתרחיש, {args.concurrency} במקביל, {args.workers} workers, "
+              f"{args.size_mb}MB, {args.rate_mb}MB/s לחיבור")
+        header = f"{'scenario':<12} {'ok':>7} {'jobs/s':>7} {'MB/s':>7} {'p50':>7} {'p90':>7} " \
+                 f"{'p99':>7} {'max':>7} {'RSS':>8} {'+RSS':>7} {'disk':>7} {'ram':>4} {'api/job':>7}"
+        print(header)
+
+        results = []
+        for index, name in enumerate(args.scenarios):
+            fake.calls.clear()
+            result = run_scenario(name, driver, server, args, (index + 1) * 100000, run_id)
+            result['api_calls'] = dict(fake.calls)
+            result['api_per_job'] = round(sum(fake.calls.values()) / max(1, result['jobs']), 1)
+            results.append(result)
+            print(f"{name:<12} {result['ok']:>3}/{result['jobs']:<3} {result['jobs_per_s']:>7} "
+                  f"{result['mb_per_s']:>7} {result['p50_s']:>6}s {result['p90_s']:>6}s "
+                  f"{result['p99_s']:>6}s {result['max_s']:>6}s {result['peak_rss_mb']:>6}MB "
+                  f"{result['rss_growth_mb']:>5}MB {result['peak_disk_mb']:>5}MB {result['ram_jobs']:>4} {result['api_per_job']:>7}"
+                  + (f"  {result['failures']}" if result['failures'] else ''))
+
+        get_scheduler().shutdown(wait=True)
+        get_ydl_pool().close()
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    server.stop()
+    fake.stop()
+
+
+if __name__ == '__main__':
+    main()
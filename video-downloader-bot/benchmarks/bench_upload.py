@@ -0,0 +1,75 @@
+"""
+בנצ'מרק: שליחת קובץ - העלאת multipart מ-Python מול נתיב מקומי (file://)
+
+מול FakeTelegramServer שמתנהג כמו שרת telegram-bot-api מקומי: במצב multipart
+הבוט קורא את הקובץ ושולח אותו ב-HTTP, ובמצב local השרת קורא אותו ישירות
+מהדיסק ו-Python שולח רק את הנתיב.
+
+הרצה:
+    python benchmarks/bench_upload.py [--size-mb 200] [--repeat 3]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_telegram import FakeTelegramServer  # noqa: E402
+
+
+def _write_file(path: str, size_mb: int) -> None:
+    """יצירת קובץ בגודל נתון"""
+    block = os.urandom(1024 * 1024)
+    with open(path, 'wb') as f:
+        for _ in range(size_mb):
+            f.write(block)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--size-mb', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    fake = FakeTelegramServer().start()
+    os.environ.setdefault('BOT_TOKEN', '123456:BENCHMARK_TOKEN')
+    os.environ['LOCAL_BOT_API_URL'] = fake.base_url
+
+    import telebot
+    from services import configure_bot_api, get_api_limits, local_file_ref, upload_file
+    from utils import format_size
+
+    configure_bot_api()
+    bot = telebot.TeleBot(os.environ['BOT_TOKEN'], threaded=False)
+    print(f"מגבלת העלאה (שרת מקומי): {format_size(get_api_limits().max_upload)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'video.mp4')
+        _write_file(path, args.size_mb)
+
+        results = {'multipart': [], 'local': []}
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            upload_file(bot, 'sendDocument', 1, 'document', path)
+            results['multipart'].append(time.perf_counter() - start)
+
+            start = time.perf_counter()
+            bot.send_document(1, local_file_ref(path))
+            results['local'].append(time.perf_counter() - start)
+
+    fake.stop()
+
+    print(f"{args.size_mb}MB × {args.repeat}")
+    for name, times in results.items():
+        print(f"{name:<10} mean={statistics.mean(times) * 1000:9.1f}ms  "
+              f"min={min(times) * 1000:9.1f}ms")
+    print(f"bytes via HTTP: {format_size(fake.upload_bytes)}, read by server from disk: "
+          f"{format_size(fake.local_bytes)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+"""
+בנצ'מרק: קצב קליטת עדכונים במצב webhook מול שרת טלגרם מזויף
+
+מפעיל את אפליקציית ה-webhook (uvicorn) ואת FakeTelegramServer מקומית,
+שולח N עדכונים במקביל ומודד קצב קבלה, מספר דחיות (503) וזמן עד שכל
+העדכונים טופלו. כל הקריאות של הבוט ל-API הולכות לשרת המזויף.
+
+הרצה:
+    python benchmarks/bench_webhook.py [--updates 2000] [--concurrency 100] [--async-bot]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_telegram import FakeTelegramServer, make_update  # noqa: E402
+
+SECRET = 'bench-secret'
+
+
+def _configure_env(fake: FakeTelegramServer, webhook_port: int) -> None:
+    """הגדרות סביבה לפני טעינת config"""
+    os.environ.setdefault('BOT_TOKEN', '123456:BENCHMARK_TOKEN')
+    os.environ['WEBHOOK_URL'] = f'http://127.0.0.1:{webhook_port}'
+    os.environ['WEBHOOK_SECRET'] = SECRET
+
+    from telebot import apihelper, asyncio_helper
+    apihelper.API_URL = fake.api_url
+    asyncio_helper.API_URL = fake.api_url
+
+
+async def _send_all(url: str, updates: int, concurrency: int, texts: list) -> dict:
+    import aiohttp
+
+    statuses: dict = {}
+    counter = iter(range(updates))
+    headers = {'X-Telegram-Bot-Api-Secret-Token': SECRET}
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as client:
+        async def worker() -> None:
+            for i in counter:
+                update = make_update(i + 1, texts[i % len(texts)], user_id=1000 + i % 500)
+                async with client.post(url, json=update, headers=headers) as resp:
+                    await resp.read()
+                    statuses[resp.status] = statuses.get(resp.status, 0) + 1
+
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return statuses
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--updates', type=int, default=2000)
+    parser.add_argument('--concurrency', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.01, help="השהיית API מזויפת (שניות)")
+    parser.add_argument('--port', type=int, default=18080)
+    parser.add_argument('--async-bot', action='store_true', help="AsyncTeleBot במקום TeleBot")
+    args = parser.parse_args()
+
+    fake = FakeTelegramServer(latency=args.latency).start()
+    _configure_env(fake, args.port)
+
+    import uvicorn
+    import bot as bot_module
+    from config import WEBHOOK_PATH
+    from webhook import create_app
+
+    if args.async_bot:
+        bot, _ = bot_module.create_async_bot()
+    else:
+        bot = bot_module.create_bot()
+
+    app = create_app(bot)
+    server = uvicorn.Server(uvicorn.Config(app, host='127.0.0.1', port=args.port, log_level='error'))
+
+    import threading
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.01)
+
+    texts = ['/start', '/help', 'https://youtu.be/dQw4w9WgXcQ', 'https://example.com/video.mp4']
+    webhook_url = f'http://127.0.0.1:{args.port}{WEBHOOK_PATH}'
+
+    start = time.perf_counter()
+    statuses = asyncio.run(_send_all(webhook_url, args.updates, args.concurrency, texts))
+    accepted_at = time.perf_counter() - start
+
+    dispatcher = app.state.dispatcher
+    while dispatcher.processed < dispatcher.accepted:
+        time.sleep(0.01)
+    if not args.async_bot:
+        # TeleBot סינכרוני מעביר את ההנדלרים ל-thread pool משלו
+        while fake.calls['sendMessage'] < dispatcher.accepted:
+            time.sleep(0.01)
+    processed_at = time.perf_counter() - start
+
+    server.should_exit = True
+    thread.join(10)
+    fake.stop()
+
+    mode = 'async' if args.async_bot else 'sync'
+    print(f"mode={mode} updates={args.updates} concurrency={args.concurrency} api_latency={args.latency}s")
+    print(f"statuses: {statuses}")
+    print(f"accept rate:   {args.updates / accepted_at:8.0f} updates/s ({accepted_at:.2f}s)")
+    print(f"process rate:  {dispatcher.processed / processed_at:8.0f} updates/s ({processed_at:.2f}s)")
+    print(f"api calls:     {dict(fake.calls)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+בנצ'מרק: עלות הכנה לכל קריאה - YoutubeDL חדש מול מופע מהמאגר
+
+מודד את זמן ההכנה בלבד (יצירת מופע, טעינת cookies, הקמת חיבורי HTTP,
+הכנת תבנית קובץ) בלי גישה לרשת.
+
+הרצה:
+    python benchmarks/bench_ydl_pool.py [--iterations 200] [--cookies 500]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import yt_dlp  # noqa: E402
+
+from services.ydl_pool import YDLPool  # noqa: E402
+
+SAMPLE_INFO = {'id': 'abc123', 'title': 'benchmark clip', 'ext': 'mp4'}
+
+
+def _write_cookies(path: str, count: int) -> None:
+    """יצירת קובץ cookies סינתטי בפורמט Netscape"""
+    with open(path, 'w') as f:
+        f.write("# Netscape HTTP Cookie File\n")
+        for i in range(count):
+            f.write(f".example{i % 50}.com\tTRUE\t/\tTRUE\t2147483647\tcookie{i}\t{'v' * 40}\n")
+
+
+def _job(ydl: yt_dlp.YoutubeDL) -> None:
+    """העבודה המינימלית שכל קריאה עושה לפני הגישה לרשת"""
+    ydl.prepare_filename(SAMPLE_INFO)
+    ydl._request_director  # הקמת מנהל החיבורים (HTTP sessions)
+
+
+def bench_fresh(opts: dict, iterations: int) -> list:
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with yt_dlp.YoutubeDL(dict(opts)) as ydl:
+            _job(ydl)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def bench_pool(opts: dict, iterations: int) -> list:
+    pool = YDLPool(max_idle=4, max_uses=10 ** 6)
+    times = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        with pool.acquire('bench', opts, outtmpl='%(title)s.%(ext)s') as ydl:
+            _job(ydl)
+        times.append(time.perf_counter() - start)
+    pool.close()
+    return times
+
+
+def _report(name: str, times: list) -> None:
+    times_ms = sorted(t * 1000 for t in times)
+    p95 = times_ms[int(len(times_ms) * 0.95) - 1]
+    print(f"{name:<8} mean={statistics.mean(times_ms):8.3f}ms  "
+          f"p50={statistics.median(times_ms):8.3f}ms  p95={p95:8.3f}ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--iterations', type=int, default=200)
+    parser.add_argument('--cookies', type=int, default=500, help="מספר cookies בקובץ הסינתטי (0 = בלי)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        opts = {'quiet': True, 'no_warnings': True, 'socket_timeout': 150}
+        if args.cookies:
+            cookie_path = os.path.join(tmp, 'cookies.txt')
+            _write_cookies(cookie_path, args.cookies)
+            opts['cookiefile'] = cookie_path
+
+        fresh = bench_fresh(opts, args.iterations)
+        pooled = bench_pool(opts, args.iterations)
+
+    print(f"yt-dlp {yt_dlp.version.__version__}, {args.iterations} iterations, {args.cookies} cookies")
+    _report('fresh', fresh)
+    _report('pooled', pooled)
+    print(f"speedup  x{statistics.mean(fresh) / statistics.mean(pooled):.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+"""
+שרת Bot API מזויף לבדיקות עומס ללא רשת
+
+מממש את המתודות שהבוט משתמש בהן ומחזיר תשובות בפורמט של טלגרם.
+כל קריאה נספרת לפי מתודה, וניתן להוסיף השהיה מלאכותית לכל קריאה.
+כמו שרת telegram-bot-api מקומי (--local), קבצים נשלחים גם כנתיב file://.
+
+שימוש:
+    server = FakeTelegramServer(latency=0.02)
+    server.start()
+    telebot.apihelper.API_URL = server.api_url
+"""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+from typing import Any, Callable, Dict, Optional
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+BOT_USER = {'id': 123456, 'is_bot': True, 'first_name': 'BenchBot', 'username': 'bench_bot'}
+SEND_MEDIA = {'sendVideo': 'video', 'sendAudio': 'audio', 'sendDocument': 'document'}
+
+
+class FakeTelegramServer:
+    """שרת Bot API מזויף שרץ ב-thread נפרד"""
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.calls: Counter = Counter()
+        self.upload_bytes = 0
+        self.local_bytes = 0
+        self.on_call: Optional[Callable[[str, Dict[str, Any]], None]] = None  # (מתודה, פרמטרים)
+        self.flood: Counter = Counter()  # מתודה -> כמה תשובות 429 להחזיר לפני הצלחה
+        self.flood_retry_after = 1
+        self._message_ids = itertools.count(1000)
+        self._file_ids = itertools.count(1)
+        self._server: Optional[uvicorn.Server] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def api_url(self) -> str:
+        """תבנית כתובת בפורמט של telebot (apihelper.API_URL)"""
+        return self.base_url + "/bot{0}/{1}"
+
+    def start(self) -> 'FakeTelegramServer':
+        """הפעלת השרת והמתנה עד שהוא מקשיב"""
+        config = uvicorn.Config(self._build_app(), host=self.host, port=self.port,
+                                log_level='error', lifespan='off')
+        self._server = uvicorn.Server(config)
+        self._thread = threading.Thread(target=self._server.run, name="fake-telegram", daemon=True)
+        self._thread.start()
+
+        while not self._server.started:
+            time.sleep(0.01)
+        self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        return self
+
+    def stop(self) -> None:
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join(5)
+
+    def _build_app(self) -> Starlette:
+        async def handle(request: Request) -> JSONResponse:
+            method = request.path_params['method']
+            self.calls[method] += 1
+
+            params = await self._read_params(request)
+            if self.latency:
+                await asyncio.sleep(self.latency)
+
+            if self.flood[method] > 0:
+                self.flood[method] -= 1
+                return JSONResponse({
+                    'ok': False, 'error_code': 429,
+                    'description': f'Too Many Requests: retry after {self.flood_retry_after}',
+                    'parameters': {'retry_after': self.flood_retry_after},
+                }, status_code=429)
+
+            error = self._read_local_files(params)
+            if error:
+                return JSONResponse({'ok': False, 'error_code': 400, 'description': error}, status_code=400)
+
+            if self.on_call is not None:
+                self.on_call(method, params)
+
+            return JSONResponse({'ok': True, 'result': self._result(method, params)})
+
+        return Starlette(routes=[
+            Route('/bot{token}/{method}', handle, methods=['GET', 'POST']),
+        ])
+
+    async def _read_params(self, request: Request) -> Dict[str, Any]:
+        """קריאת פרמטרים מ-query, form או multipart (כולל ספירת בייטים של קבצים)"""
+        params: Dict[str, Any] = dict(request.query_params)
+        if request.method != 'POST':
+            return params
+
+        content_type = request.headers.get('content-type', '')
+        if 'json' in content_type:
+            params.update(await request.json())
+            return params
+
+        form = await request.form()
+        for key, value in form.multi_items():
+            if hasattr(value, 'read'):
+                data = await value.read()
+                self.upload_bytes += len(data)
+                params[key] = f'<file:{len(data)}>'
+            else:
+                params[key] = value
+        return params
+
+    def _read_local_files(self, params: Dict[str, Any]) -> Optional[str]:
+        """קריאת קבצים שנשלחו כנתיב file:// (כמו השרת המקומי) - מחזיר שגיאה אם חסר"""
+        values = list(params.values())
+        if isinstance(params.get('media'), str):
+            # sendMediaGroup - הנתיבים נמצאים בתוך ה-JSON של media
+            values += [item.get('media') for item in json.loads(params['media'])]
+
+        for value in values:
+            if not isinstance(value, str) or not value.startswith('file://'):
+                continue
+            path = Path(unquote(urlparse(value).path))
+            if not path.is_file():
+                return f'Bad Request: file not found: {path}'
+            with open(path, 'rb') as f:
+                while chunk := f.read(1024 * 1024):
+                    self.local_bytes += len(chunk)
+        return None
+
+    def _message(self, params: Dict[str, Any], **extra: Any) -> Dict[str, Any]:
+        chat_id = int(params.get('chat_id') or 1)
+        return {
+            'message_id': int(params.get('message_id') or next(self._message_ids)),
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'from': BOT_USER,
+            **extra,
+        }
+
+    def _file(self) -> Dict[str, Any]:
+        n = next(self._file_ids)
+        return {'file_id': f'FAKE_FILE_{n}', 'file_unique_id': f'U{n}', 'file_size': 1}
+
+    def _media(self, media_type: str) -> Dict[str, Any]:
+        """אובייקט מדיה בפורמט של טלגרם לפי הסוג"""
+        extra = {
+            'video': {'width': 1, 'height': 1, 'duration': 1},
+            'audio': {'duration': 1},
+        }.get(media_type, {})
+        return {media_type: {**self._file(), **extra}}
+
+    def _result(self, method: str, params: Dict[str, Any]) -> Any:
+        if method == 'getMe':
+            return BOT_USER
+        if method == 'getUpdates':
+            return []
+        if method in ('sendMessage', 'editMessageText'):
+            return self._message(params, text=params.get('text', ''))
+        if method in SEND_MEDIA:
+            return self._message(params, **self._media(SEND_MEDIA[method]))
+        if method == 'sendMediaGroup':
+            media = json.loads(params.get('media') or '[]')
+            return [
+                self._message({'chat_id': params.get('chat_id')}, **self._media(item.get('type', 'document')))
+                for item in media
+            ]
+        # answerCallbackQuery, deleteMessage, setWebhook, deleteWebhook ...
+        return True
+
+
+def make_update(update_id: int, text: str, user_id: int = 1, chat_id: Optional[int] = None) -> Dict[str, Any]:
+    """
+    בניית עדכון הודעת טקסט בפורמט של טלגרם
+
+    Args:
+        update_id: מזהה העדכון
+        text: תוכן ההודעה
+        user_id: מזהה המשתמש השולח
+        chat_id: מזהה הצ'אט (ברירת מחדל - כמו המשתמש)
+
+    Returns:
+        מילון עדכון
+    """
+    chat_id = chat_id or user_id
+    message = {
+        'message_id': update_id,
+        'date': int(time.time()),
+        'chat': {'id': chat_id, 'type': 'private'},
+        'from': {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'},
+        'text': text,
+    }
+    if text.startswith('/'):
+        message['entities'] = [{'type': 'bot_command', 'offset': 0, 'length': len(text.split()[0])}]
+    return {'update_id': update_id, 'message': message}
+
+
+def make_callback(update_id: int, data: str, user_id: int = 1, message_id: int = 1) -> Dict[str, Any]:
+    """
+    בניית עדכון לחיצה על כפתור (callback_query)
+
+    Args:
+        update_id: מזהה העדכון
+        data: ה-callback_data של הכפתור
+        user_id: מזהה המשתמש
+        message_id: ההודעה שעליה הכפתור
+
+    Returns:
+        מילון עדכון
+    """
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+    return {
+        'update_id': update_id,
+        'callback_query': {
+            'id': str(update_id),
+            'from': user,
+            'chat_instance': str(user_id),
+            'data': data,
+            'message': {
+                'message_id': message_id,
+                'date': int(time.time()),
+                'chat': {'id': user_id, 'type': 'private'},
+                'from': BOT_USER,
+                'text': '',
+            },
+        },
+    }
@@ -0,0 +1,231 @@
+"""
+שרת HTTP מקומי עם תמיכה ב-Range והגבלת קצב לכל חיבור
+
+מדמה CDN שמגביל כל חיבור בנפרד (כמו YouTube): קובץ רציף אחד
+(/video.mp4) ופלייליסט HLS (/hls/index.m3u8) שמחולק למקטעים.
+
+בנוסף fixtures לפי מזהה - כל מזהה הוא "סרטון" נפרד ל-yt-dlp (אותם בייטים):
+    /media/<id>.mp4     קובץ רציף עם Range
+    /hls/<id>.m3u8      פלייליסט HLS
+    /dash/<id>.mpd      מניפסט DASH (ייצוג אחד, וידאו+אודיו)
+    /page/<id>.html     דף HTML עם תגית <video> (generic extractor)
+
+שימוש:
+    server = RangeServer(size=32 * 1024 * 1024, rate=4 * 1024 * 1024).start()
+    server.url('/video.mp4')
+    server.fixture_url('dash', 'abc')
+"""
+
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional, Tuple
+
+_BLOCK = 64 * 1024
+
+# קטע init מינימלי ל-DASH (תיבת ftyp בלבד)
+_DASH_INIT = b'\x00\x00\x00\x18ftypiso5\x00\x00\x00\x01iso5dash'
+
+FIXTURE_KINDS = {
+    'progressive': '/media/{}.mp4',
+    'hls': '/hls/{}.m3u8',
+    'dash': '/dash/{}.mpd',
+    'page': '/page/{}.html',
+}
+
+
+class RangeServer:
+    """שרת קבצים סינתטי שרץ ב-thread נפרד"""
+
+    def __init__(self, size: int = 32 * 1024 * 1024, rate: float = 4 * 1024 * 1024,
+                 segments: int = 32, host: str = '127.0.0.1', port: int = 0):
+        self.size = size
+        self.rate = rate
+        self.segments = segments
+        self.data = os.urandom(size)
+        self.requests = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    def url(self, path: str) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}{path}"
+
+    def fixture_url(self, kind: str, media_id: str) -> str:
+        """
+        כתובת fixture לפי סוג
+
+        Args:
+            kind: progressive / hls / dash / page
+            media_id: מזהה הסרטון (נהיה ה-id ב-yt-dlp)
+
+        Returns:
+            כתובת מלאה
+        """
+        return self.url(FIXTURE_KINDS[kind].format(media_id))
+
+    def start(self) -> 'RangeServer':
+        self._thread = threading.Thread(target=self._server.serve_forever, name="range-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _segment(self, index: int) -> Tuple[int, int]:
+        """טווח הבייטים של מקטע HLS"""
+        seg_size = -(-self.size // self.segments)
+        start = index * seg_size
+        return start, min(start + seg_size, self.size)
+
+    def _playlist(self, prefix: str = '') -> bytes:
+        lines = ['#EXTM3U', '#EXT-X-VERSION:3', '#EXT-X-TARGETDURATION:2', '#EXT-X-MEDIA-SEQUENCE:0']
+        for i in range(self.segments):
+            lines += ['#EXTINF:2.0,', f'{prefix}seg{i}.ts']
+        lines.append('#EXT-X-ENDLIST')
+        return ('\n'.join(lines) + '\n').encode()
+
+    def _mpd(self, media_id: str) -> bytes:
+        """מניפסט DASH סטטי - init מינימלי ומקטעים מהנתונים"""
+        duration = 2 * self.segments
+        bandwidth = self.size * 8 // duration
+        segments = '\n'.join(
+            f'          <SegmentURL media="{media_id}/seg{i}.m4s"/>' for i in range(self.segments)
+        )
+        return f"""<?xml version="1.0" encoding="UTF-8"?>
+<MPD xmlns="urn:mpeg:dash:schema:mpd:2011" type="static" minBufferTime="PT2S"
+     mediaPresentationDuration="PT{duration}S" profiles="urn:mpeg:dash:profile:isoff-main:2011">
+  <Period>
+    <AdaptationSet mimeType="video/mp4" codecs="avc1.64001f,mp4a.40.2">
+      <Representation id="720p" bandwidth="{bandwidth}" width="1280" height="720">
+        <SegmentList timescale="1" duration="2">
+          <Initialization sourceURL="{media_id}/init.mp4"/>
+{segments}
+        </SegmentList>
+      </Representation>
+    </AdaptationSet>
+  </Period>
+</MPD>
+""".encode()
+
+    @staticmethod
+    def _page(media_id: str) -> bytes:
+        return (
+            f'<!DOCTYPE html><html><head><title>Fixture {media_id}</title></head><body>'
+            f'<video controls src="/media/{media_id}.mp4" type="video/mp4"></video>'
+            f'</body></html>'
+        ).encode()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args) -> None:
+                pass
+
+            def handle(self) -> None:
+                try:
+                    super().handle()
+                except ConnectionResetError:
+                    pass  # הלקוח סגר חיבור keep-alive
+
+            def do_HEAD(self) -> None:
+                self.do_GET(head=True)
+
+            def do_GET(self, head: bool = False) -> None:
+                server.requests += 1
+
+                if self.path == '/hls/index.m3u8':
+                    self._send(server._playlist(), 'application/vnd.apple.mpegurl', head=head)
+                    return
+
+                match = re.fullmatch(r'/hls/seg(\d+)\.ts', self.path)
+                if match and int(match.group(1)) < server.segments:
+                    start, end = server._segment(int(match.group(1)))
+                    self._send(server.data[start:end], 'video/mp2t', head=head)
+                    return
+
+                if self.path == '/video.mp4' or re.fullmatch(r'/media/[\w-]+\.mp4', self.path):
+                    self._send_ranged(head)
+                    return
+
+                match = re.fullmatch(r'/hls/([\w-]+)\.m3u8', self.path)
+                if match:
+                    self._send(server._playlist(f'{match.group(1)}/'), 'application/vnd.apple.mpegurl', head=head)
+                    return
+
+                match = re.fullmatch(r'/hls/[\w-]+/seg(\d+)\.ts', self.path)
+                if match and int(match.group(1)) < server.segments:
+                    start, end = server._segment(int(match.group(1)))
+                    self._send(server.data[start:end], 'video/mp2t', head=head)
+                    return
+
+                match = re.fullmatch(r'/dash/([\w-]+)\.mpd', self.path)
+                if match:
+                    self._send(server._mpd(match.group(1)), 'application/dash+xml', head=head)
+                    return
+
+                if re.fullmatch(r'/dash/[\w-]+/init\.mp4', self.path):
+                    self._send(_DASH_INIT, 'video/mp4', head=head)
+                    return
+
+                match = re.fullmatch(r'/dash/[\w-]+/seg(\d+)\.m4s', self.path)
+                if match and int(match.group(1)) < server.segments:
+                    start, end = server._segment(int(match.group(1)))
+                    self._send(server.data[start:end], 'video/iso.segment', head=head)
+                    return
+
+                match = re.fullmatch(r'/page/([\w-]+)\.html', self.path)
+                if match:
+                    self._send(server._page(match.group(1)), 'text/html; charset=utf-8', head=head)
+                    return
+
+                self.send_error(404)
+
+            def _send_ranged(self, head: bool) -> None:
+                match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+                if not match:
+                    self._send(server.data, 'video/mp4', head=head, extra={'Accept-Ranges': 'bytes'})
+                    return
+
+                start = int(match.group(1))
+                end = int(match.group(2)) if match.group(2) else server.size - 1
+                end = min(end, server.size - 1)
+                if start > end:
+                    self.send_error(416)
+                    return
+
+                self._send(server.data[start:end + 1], 'video/mp4', status=206, head=head, extra={
+                    'Accept-Ranges': 'bytes',
+                    'Content-Range': f'bytes {start}-{end}/{server.size}',
+                })
+
+            def _send(self, body: bytes, content_type: str, status: int = 200,
+                      head: bool = False, extra: Optional[dict] = None) -> None:
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (extra or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                if head:
+                    return
+
+                # הגבלת קצב לחיבור הזה בלבד
+                started = time.monotonic()
+                try:
+                    for offset in range(0, len(body), _BLOCK):
+                        self.wfile.write(body[offset:offset + _BLOCK])
+                        ahead = (offset + _BLOCK) / server.rate - (time.monotonic() - started)
+                        if ahead > 0:
+                            time.sleep(ahead)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+
+        return Handler
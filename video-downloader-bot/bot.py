@@ -7,12 +7,24 @@
 
 import os
 import base64
+import asyncio
 
 import telebot
 
-from config import BOT_TOKEN, DOWNLOADS_DIR, COOKIES_FILE
+from config import (
+    BOT_TOKEN, DOWNLOADS_DIR, COOKIES_FILE, ASYNC_MODE, UPDATE_MODE,
+    WEBHOOK_URL, WEBHOOK_HOST, WEBHOOK_PORT, METRICS_HOST, METRICS_PORT,
+    TRACE_FILE, PROFILE_SAMPLE_RATE, PROFILE_SLOW_SECONDS, PROFILE_DIR
+)
 from utils.helpers import setup_logger, check_ffmpeg
-from handlers import register_all_handlers
+from utils.tracing import configure_tracing, configure_profiling
+from handlers import register_all_handlers, register_all_async_handlers
+from services import (
+    get_scheduler, get_ydl_pool, info_options, download_options,
+    configure_bot_api, get_api_limits, is_local_api, start_metrics_server,
+    get_janitor, install_api_client
+)
+from utils import format_size
 
 # הגדרת לוגר
 logger = setup_logger(__name__)
@@ -89,6 +101,97 @@ def create_bot() -> telebot.TeleBot:
     return bot
 
 
+def create_async_bot():
+    """
+    יצירת בוט אסינכרוני (AsyncTeleBot) ובוט סינכרוני ל-workers של ההורדות
+
+    Returns:
+        (בוט אסינכרוני, בוט סינכרוני)
+    """
+    from telebot.async_telebot import AsyncTeleBot
+
+    if not BOT_TOKEN:
+        logger.error("BOT_TOKEN לא הוגדר! צור קובץ .env עם הטוקן")
+        exit(1)
+
+    bot = AsyncTeleBot(BOT_TOKEN)
+    sync_bot = telebot.TeleBot(BOT_TOKEN, threaded=False)
+    register_all_async_handlers(bot, sync_bot)
+
+    return bot, sync_bot
+
+
+def _prewarm_ydl_pool():
+    """חימום מופעי yt-dlp לפרופילים הנפוצים"""
+    ydl_pool = get_ydl_pool()
+    ydl_pool.prewarm({
+        'info': info_options(),
+        **dict([download_options('best'), download_options(audio_only=True)])
+    })
+    return ydl_pool
+
+
+async def main_async():
+    """הפעלת הבוט במצב asyncio"""
+    from handlers.async_handlers import shutdown_executor
+
+    bot, _ = create_async_bot()
+    loop = asyncio.get_running_loop()
+
+    # ניקוי webhook ישן (אם קיים) - מונע שגיאת 409
+    await bot.remove_webhook()
+
+    logger.info("הבוט מופעל (מצב async)...")
+    logger.info(f"תיקיית הורדות: {DOWNLOADS_DIR}")
+
+    scheduler = get_scheduler()
+    ydl_pool = await loop.run_in_executor(None, _prewarm_ydl_pool)
+
+    try:
+        await bot.infinity_polling(timeout=60, allowed_updates=["message", "callback_query"])
+    except Exception as e:
+        logger.error(f"שגיאה בהפעלת הבוט: {e}")
+        raise
+    finally:
+        # סיום מסודר של הורדות שבתור ובביצוע - בלי לחסום את הלולאה
+        await loop.run_in_executor(None, scheduler.shutdown, True)
+        await loop.run_in_executor(None, shutdown_executor)
+        ydl_pool.close()
+        await bot.close_session()
+
+
+def run_webhook():
+    """הפעלת הבוט במצב webhook - שרת ASGI (uvicorn) במקום polling"""
+    import uvicorn
+    from webhook import create_app
+
+    if not WEBHOOK_URL:
+        logger.error("WEBHOOK_URL לא הוגדר! נדרש במצב webhook")
+        exit(1)
+
+    if ASYNC_MODE:
+        from handlers.async_handlers import shutdown_executor
+        bot, _ = create_async_bot()
+    else:
+        shutdown_executor = None
+        bot = create_bot()
+
+    scheduler = get_scheduler()
+    ydl_pool = _prewarm_ydl_pool()
+
+    def on_shutdown():
+        scheduler.shutdown(wait=True)
+        if shutdown_executor:
+            shutdown_executor()
+        ydl_pool.close()
+
+    logger.info(f"הבוט מופעל (webhook על {WEBHOOK_HOST}:{WEBHOOK_PORT})...")
+    logger.info(f"תיקיית הורדות: {DOWNLOADS_DIR}")
+
+    app = create_app(bot, on_shutdown=on_shutdown)
+    uvicorn.run(app, host=WEBHOOK_HOST, port=WEBHOOK_PORT, log_level='warning')
+
+
 def main():
     """פונקציה ראשית להפעלת הבוט"""
 
@@ -97,6 +200,34 @@ def main():
         logger.warning("ffmpeg לא מותקן! חלק מהפורמטים לא יעבדו")
         logger.warning("התקנה: brew install ffmpeg (Mac) / apt install ffmpeg (Linux)")
 
+    # שרת Bot API (ענן / מקומי) - קובע גם את מגבלות ההעלאה
+    configure_bot_api()
+    # session משותף, הגבלת קצב ו-flood wait לכל הבקשות של telebot
+    install_api_client()
+    logger.info(
+        f"Bot API: {'מקומי' if is_local_api() else 'ענן'}, "
+        f"מגבלת העלאה: {format_size(get_api_limits().max_upload)}"
+    )
+
+    # מעקב שלבים ופרופיילינג מדוגם (כבויים כברירת מחדל)
+    configure_tracing(TRACE_FILE)
+    configure_profiling(PROFILE_SAMPLE_RATE, PROFILE_SLOW_SECONDS, PROFILE_DIR)
+
+    # ניקוי קבצים חלקיים ויתומים בתיקיית ההורדות (גם שאריות מהפעלה קודמת)
+    get_janitor().start()
+
+    if UPDATE_MODE == 'webhook':
+        run_webhook()
+        return
+
+    # שרת /metrics נפרד (ב-webhook המדדים זמינים באותו שרת)
+    if METRICS_PORT:
+        start_metrics_server(METRICS_HOST, METRICS_PORT)
+
+    if ASYNC_MODE:
+        asyncio.run(main_async())
+        return
+
     # יצירת הבוט
     bot = create_bot()
 
@@ -106,12 +237,22 @@ def main():
     logger.info("הבוט מופעל...")
     logger.info(f"תיקיית הורדות: {DOWNLOADS_DIR}")
 
+    # הפעלת מתזמן ההורדות
+    scheduler = get_scheduler()
+
+    # חימום מופעי yt-dlp לפרופילים הנפוצים
+    ydl_pool = _prewarm_ydl_pool()
+
     # הפעלת הבוט
     try:
         bot.infinity_polling(timeout=60, long_polling_timeout=60, allowed_updates=["message", "callback_query"])
     except Exception as e:
         logger.error(f"שגיאה בהפעלת הבוט: {e}")
         raise
+    finally:
+        # סיום מסודר של הורדות שבתור ובביצוע
+        scheduler.shutdown(wait=True)
+        ydl_pool.close()
 
 
 if __name__ == '__main__':
@@ -33,7 +33,7 @@ MESSAGES = {
 רשימה מלאה: https://github.com/yt-dlp/yt-dlp/blob/master/supportedsites.md
 
 *מגבלות:*
-• קבצים עד 2GB (מגבלת טלגרם)
+• קבצים עד {max_size} (מגבלת טלגרם)
 • תוכן ציבורי בלבד (ללא התחברות)
 
 ❓ בעיות? נסה שוב או שלח קישור אחר.""",
@@ -41,22 +41,35 @@ MESSAGES = {
     # סטטוסים
     'url_detected': "🔗 זיהיתי קישור! מה תרצה לעשות?",
     'fetching_info': "⏳ מביא פרטים...",
+    'queued': "⏳ בתור להורדה (מיקום {})",
     'downloading': "📥 מוריד...",
+    'waiting_disk': "⏳ ממתין למקום פנוי בשרת...",
+    'compressing': "🗜️ מכווץ את הקובץ כדי שיתאים למגבלת הגודל...",
     'uploading': "📤 מעלה לטלגרם...",
+    'downloading_progress': "📥 מוריד... {percent}\n{bar}\n⚡ {speed} • ⏳ {eta}",
+    'processing': "⚙️ מעבד את הקובץ...",
+    'uploading_progress': "📤 מעלה לטלגרם... {percent}\n{bar}\n⚡ {speed} • ⏳ {eta}",
     'done_video': "🎬 הנה הסרטון!",
     'done_audio': "🎵 הנה האודיו!",
     'select_quality': "🎚️ בחר איכות:",
+    'batch_started': "📦 זיהיתי {} קישורים - מתחיל...",
+    'batch_progress': "📦 נשלחו {done} מתוך {total}\n🔎 {extracting} • 📥 {downloading} • 📤 {uploading}{failed}",
+    'batch_failed_suffix': "\n❌ נכשלו: {}",
+    'batch_done': "✅ האצווה הסתיימה - נשלחו {done} מתוך {total}{failed}",
     'cancelled': "❌ בוטל",
     'link_expired': "❌ הקישור פג תוקף, שלח שוב",
 
     # שגיאות
     'error_not_supported': "❌ הקישור לא נתמך או לא תקין",
-    'error_too_large': "❌ הקובץ גדול מדי לטלגרם (מעל 2GB)",
+    'error_too_large': "❌ הקובץ גדול מדי לשליחה (מעל {})",
     'error_download': "❌ שגיאה בהורדה: {}",
     'error_network': "❌ בעיית רשת, נסה שוב",
     'error_private': "❌ התוכן פרטי ודורש התחברות",
     'error_timeout': "❌ ההורדה לקחה יותר מדי זמן",
     'error_no_video': "❌ לא נמצא סרטון בקישור",
     'error_file_not_found': "❌ הקובץ לא נמצא",
+    'error_disk_full': "❌ אין מספיק מקום בשרת כרגע, נסה שוב מאוחר יותר",
+    'error_queue_full': "❌ השרת עמוס כרגע, נסה שוב בעוד כמה דקות",
+    'error_user_limit': "❌ יש לך יותר מדי הורדות בתור, המתן לסיום",
     'error_general': "❌ שגיאה לא צפויה, נסה שוב",
 }
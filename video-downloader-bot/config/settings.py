@@ -12,15 +12,150 @@ load_dotenv()
 # נתיבים
 BASE_DIR = Path(__file__).parent.parent
 DOWNLOADS_DIR = BASE_DIR / 'downloads'
+DATA_DIR = BASE_DIR / 'data'
 COOKIES_FILE = BASE_DIR / 'cookies.txt'
 
 # טוקן הבוט
 BOT_TOKEN = os.getenv('BOT_TOKEN')
 
+# מצב הרצה
+ASYNC_MODE = os.getenv('ASYNC_MODE', 'false').lower() in ('1', 'true', 'yes')  # AsyncTeleBot
+EXTRACT_WORKERS = int(os.getenv('EXTRACT_WORKERS', '8'))  # threads לחילוץ מידע במצב async
+UPDATE_MODE = os.getenv('UPDATE_MODE', 'polling')  # polling / webhook
+
+# Webhook (UPDATE_MODE=webhook)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL', '')  # כתובת ציבורית, לדוגמה https://bot.example.com
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', '/telegram/webhook')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET', '')  # נבדק מול X-Telegram-Bot-Api-Secret-Token (ריק - נוצר אקראית)
+WEBHOOK_HOST = os.getenv('WEBHOOK_HOST', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('PORT', os.getenv('WEBHOOK_PORT', '8080')))
+WEBHOOK_QUEUE_SIZE = int(os.getenv('WEBHOOK_QUEUE_SIZE', '1000'))  # עדכונים ממתינים מקסימום
+WEBHOOK_CONSUMERS = int(os.getenv('WEBHOOK_CONSUMERS', '4'))
+
+# מדדים (Prometheus) - ב-webhook זמינים ב-/metrics של אותו שרת
+METRICS_HOST = os.getenv('METRICS_HOST', '0.0.0.0')
+METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # polling: פורט לשרת /metrics (0 = כבוי)
+
+# מעקב שלבים (spans) ופרופיילינג לעבודות איטיות
+TRACE_FILE = os.getenv('TRACE_FILE', '')  # קובץ JSONL ל-spans (ריק = כבוי), לדוגמה data/traces.jsonl
+PROFILE_SAMPLE_RATE = float(os.getenv('PROFILE_SAMPLE_RATE', '0'))  # חלק העבודות שרצות תחת cProfile
+PROFILE_SLOW_SECONDS = float(os.getenv('PROFILE_SLOW_SECONDS', '60'))  # שומרים פרופיל רק מעל זמן זה
+PROFILE_DIR = Path(os.getenv('PROFILE_DIR', str(DATA_DIR / 'profiles')))
+
+# שרת Bot API מקומי (telegram-bot-api --local) - העלאות לפי נתיב ועד 2000MB
+LOCAL_BOT_API_URL = os.getenv('LOCAL_BOT_API_URL', '')  # לדוגמה http://localhost:8081
+LOCAL_BOT_API_DOWNLOADS_DIR = os.getenv('LOCAL_BOT_API_DOWNLOADS_DIR', '')  # תיקיית ההורדות כפי שהשרת רואה אותה
+
 # מגבלות
-MAX_FILE_SIZE = 2 * 1024 * 1024 * 1024  # 2GB - מגבלת טלגרם
+MAX_FILE_SIZE = int(os.getenv('MAX_FILE_SIZE', str(2 * 1024 * 1024 * 1024)))  # 2GB - תקרה; בפועל גם לפי שרת ה-API
 DOWNLOAD_TIMEOUT = 600  # 10 דקות
+
+# חיבורים מקבילים להורדה - מקטעים (DASH/HLS) וטווחי בייטים (קבצים רציפים)
+PARALLEL_CONNECTIONS = int(os.getenv('PARALLEL_CONNECTIONS', '4'))
+EXTRACTOR_CONNECTIONS = os.getenv('EXTRACTOR_CONNECTIONS', 'youtube:8,tiktok:2,instagram:2')  # extractor:חיבורים
+RANGE_DOWNLOAD = os.getenv('RANGE_DOWNLOAD', 'false').lower() == 'true'  # הורדה בטווחים מקבילים לקבצים רציפים
+RANGE_MIN_SIZE = int(os.getenv('RANGE_MIN_SIZE', str(8 * 1024 * 1024)))  # מתחת לזה - חיבור אחד
+
+# התאמת גודל - בחירת פורמט שנכנס במגבלה לפני ההורדה, וקידוד מחדש אם אין
+SIZE_FIT_MARGIN = float(os.getenv('SIZE_FIT_MARGIN', '0.95'))  # מרווח ביטחון להערכות גודל
+SIZE_FIT_TRANSCODE = os.getenv('SIZE_FIT_TRANSCODE', 'true').lower() == 'true'
+TRANSCODE_PRESET = os.getenv('TRANSCODE_PRESET', 'veryfast')  # preset של libx264
+TRANSCODE_AUDIO_BITRATE = 128  # kbps
+TRANSCODE_MIN_VIDEO_BITRATE = int(os.getenv('TRANSCODE_MIN_VIDEO_BITRATE', '200'))  # kbps - מתחת לזה לא שווה לקודד
+
+# הכנת הקובץ לפני העלאה - מטא-דאטה (ffprobe), faststart ותמונה ממוזערת
+MEDIA_PREP = os.getenv('MEDIA_PREP', 'true').lower() == 'true'
+MEDIA_PREP_TIMEOUT = int(os.getenv('MEDIA_PREP_TIMEOUT', '120'))  # שניות לכל הרצת ffprobe / ffmpeg
+THUMBNAIL_SIZE = 320  # מקסימום של טלגרם לצלע
+
+# מאגר ffmpeg - כל הרצות ה-ffmpeg (מיזוג, אודיו, קידוד, faststart) חולקות תקציב ליבות
+FFMPEG_CORES = int(os.getenv('FFMPEG_CORES', str(max(1, (os.cpu_count() or 2) - 1))))  # ליבות לכל ה-ffmpeg יחד
+FFMPEG_THREADS = min(int(os.getenv('FFMPEG_THREADS', '2')), FFMPEG_CORES)  # threads לכל הרצה
+FFMPEG_WORKERS = max(1, FFMPEG_CORES // FFMPEG_THREADS)  # הרצות במקביל
+FFMPEG_NICE = int(os.getenv('FFMPEG_NICE', '10'))  # 0 = בלי הורדת עדיפות
+AUDIO_COPY_CODECS = os.getenv('AUDIO_COPY_CODECS', 'aac,mp3')  # קודקים שנשמרים בלי קידוד מחדש (גם opus)
 MAX_QUALITIES = 6  # מספר מקסימלי של אופציות איכות
 
+# תקציב דיסק וניקוי תיקיית ההורדות
+DISK_BUDGET = int(os.getenv('DISK_BUDGET', '0'))  # בייטים לכל ההורדות יחד (0 = המקום הפנוי בהפעלה)
+DISK_MIN_FREE = int(os.getenv('DISK_MIN_FREE', str(512 * 1024 * 1024)))  # 512MB שתמיד נשארים פנויים
+DISK_WAIT_TIMEOUT = int(os.getenv('DISK_WAIT_TIMEOUT', '300'))  # המתנה למקום לפני דחייה
+DISK_DEFAULT_RESERVATION = int(os.getenv('DISK_DEFAULT_RESERVATION', str(256 * 1024 * 1024)))  # כשהגודל לא ידוע
+JANITOR_INTERVAL = int(os.getenv('JANITOR_INTERVAL', '300'))  # שניות בין סריקות
+JANITOR_PARTIAL_AGE = int(os.getenv('JANITOR_PARTIAL_AGE', '900'))  # קבצים חלקיים שלא השתנו 15 דקות
+JANITOR_ORPHAN_AGE = int(os.getenv('JANITOR_ORPHAN_AGE', '3600'))  # כל קובץ אחר אחרי שעה
+
+# תיקיית עבודה בזיכרון (tmpfs) לקבצים קטנים - חוסך כתיבה וקריאה מהדיסק
+RAM_SCRATCH_DIR = os.getenv('RAM_SCRATCH_DIR', '')  # לדוגמה /dev/shm/video-bot (ריק = כבוי)
+RAM_SCRATCH_THRESHOLD = int(os.getenv('RAM_SCRATCH_THRESHOLD', str(64 * 1024 * 1024)))  # עבודות קטנות מזה
+RAM_SCRATCH_CAP = int(os.getenv('RAM_SCRATCH_CAP', str(512 * 1024 * 1024)))  # תקרת זיכרון לכל העבודות יחד
+
+# תור הורדות
+DOWNLOAD_WORKERS = int(os.getenv('DOWNLOAD_WORKERS', '3'))  # הורדות במקביל (גלובלי)
+DOWNLOAD_QUEUE_SIZE = int(os.getenv('DOWNLOAD_QUEUE_SIZE', '50'))  # עבודות ממתינות מקסימום
+MAX_ACTIVE_DOWNLOADS_PER_USER = int(os.getenv('MAX_ACTIVE_DOWNLOADS_PER_USER', '1'))
+MAX_QUEUED_DOWNLOADS_PER_USER = int(os.getenv('MAX_QUEUED_DOWNLOADS_PER_USER', '5'))
+
+# אצוות - כמה קישורים בהודעה ו/או פלייליסט, בצינור חילוץ → הורדה → העלאה
+BATCH_MAX_URLS = int(os.getenv('BATCH_MAX_URLS', '10'))  # קישורים מהודעה אחת
+BATCH_MAX_ENTRIES = int(os.getenv('BATCH_MAX_ENTRIES', '25'))  # פריטים לאצווה (כולל פלייליסטים)
+BATCH_EXTRACT_WORKERS = int(os.getenv('BATCH_EXTRACT_WORKERS', '4'))  # חילוצים במקביל לכל האצוות יחד
+BATCH_DOWNLOAD_WORKERS = int(os.getenv('BATCH_DOWNLOAD_WORKERS', '2'))  # לכל אצווה - בפועל רק כשיש מקום במתזמן
+BATCH_UPLOAD_WORKERS = int(os.getenv('BATCH_UPLOAD_WORKERS', '2'))
+BATCH_QUEUE_SIZE = int(os.getenv('BATCH_QUEUE_SIZE', '2'))  # פריטים שממתינים בין שלבים (מגביל דיסק, בלי האלבום שנאסף)
+# אלבום נשלח כשיש בו 10 קבצים או בסוף האצווה; זו רק תקרת בטיחות (0 - בלי),
+# קצרה מ-DISK_WAIT_TIMEOUT כדי שאלבום שתופס דיסק לא יפיל הורדות שממתינות למקום
+BATCH_GROUP_WAIT = float(os.getenv('BATCH_GROUP_WAIT', '120'))
+
+# עדיפויות בתור - תור הוגן משוקלל לפי משתמש, עבודות קצרות ואודיו מקדימות
+ADMIN_USER_IDS = {int(x) for x in os.getenv('ADMIN_USER_IDS', '').split(',') if x.strip()}
+VIP_USER_IDS = {int(x) for x in os.getenv('VIP_USER_IDS', '').split(',') if x.strip()}
+PRIORITY_WEIGHTS = os.getenv('PRIORITY_WEIGHTS', 'admin:8,vip:4,user:1')  # מחלקה:משקל
+
+# דיווח התקדמות והעלאה
+PROGRESS_EDIT_INTERVAL = float(os.getenv('PROGRESS_EDIT_INTERVAL', '3'))  # שניות בין עריכות לאותה הודעה
+PROGRESS_GLOBAL_EDITS_PER_SECOND = float(os.getenv('PROGRESS_GLOBAL_EDITS_PER_SECOND', '20'))
+UPLOAD_CHUNK_SIZE = 256 * 1024  # 256KB
+UPLOAD_TIMEOUT = 600  # 10 דקות לתשובה אחרי העלאה
+
+# לקוח Bot API - חיבורים קבועים, הגבלת קצב וטיפול ב-429 (flood wait)
+TELEGRAM_POOL_SIZE = int(os.getenv(
+    'TELEGRAM_POOL_SIZE', str(DOWNLOAD_WORKERS * (BATCH_UPLOAD_WORKERS + 1) + 4)
+))  # חיבורים פתוחים לשרת ה-API (העלאות של עד DOWNLOAD_WORKERS עבודות/אצוות + עריכות + הנדלרים)
+TELEGRAM_GLOBAL_RATE = float(os.getenv('TELEGRAM_GLOBAL_RATE', '30'))  # בקשות לשנייה לכל הבוט
+TELEGRAM_CHAT_RATE = float(os.getenv('TELEGRAM_CHAT_RATE', '1'))  # בקשות לשנייה לצ'אט
+TELEGRAM_CHAT_BURST = float(os.getenv('TELEGRAM_CHAT_BURST', '5'))  # פרץ מותר לצ'אט
+TELEGRAM_MAX_RETRIES = int(os.getenv('TELEGRAM_MAX_RETRIES', '3'))
+TELEGRAM_MAX_RETRY_AFTER = float(os.getenv('TELEGRAM_MAX_RETRY_AFTER', '60'))  # מעל זה - לא ממתינים
+
+# העלאה זורמת (הורדה והעלאה במקביל, בלי קובץ זמני) - לפורמטים שלא דורשים מיזוג
+STREAMING_UPLOAD = os.getenv('STREAMING_UPLOAD', 'false').lower() == 'true'
+STREAM_CHUNK_SIZE = 256 * 1024  # 256KB
+STREAM_BUFFER_CHUNKS = int(os.getenv('STREAM_BUFFER_CHUNKS', '32'))  # חלון זיכרון: 32 × 256KB = 8MB
+
+# מאגר מופעי YoutubeDL לשימוש חוזר
+YDL_POOL_SIZE = int(os.getenv(
+    'YDL_POOL_SIZE', str(DOWNLOAD_WORKERS + BATCH_EXTRACT_WORKERS + 2)
+))  # מופעים פנויים לכל פרופיל (הורדות + חילוץ באצוות + הנדלרים)
+YDL_POOL_MAX_USES = int(os.getenv('YDL_POOL_MAX_USES', '200'))  # החלפת מופע אחרי X שימושים
+
+# קאש מידע על סרטונים (כפתורים פתוחים)
+VIDEO_CACHE_MAX_ENTRIES = int(os.getenv('VIDEO_CACHE_MAX_ENTRIES', '5000'))
+VIDEO_CACHE_MAX_BYTES = int(os.getenv('VIDEO_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))  # 64MB
+VIDEO_CACHE_TTL = int(os.getenv('VIDEO_CACHE_TTL', str(12 * 60 * 60)))  # 12 שעות
+CACHE_BACKEND = os.getenv('CACHE_BACKEND', 'memory')  # memory / sqlite
+CACHE_DB_PATH = Path(os.getenv('CACHE_DB_PATH', str(DATA_DIR / 'cache.db')))
+CACHE_EXPIRY_INTERVAL = int(os.getenv('CACHE_EXPIRY_INTERVAL', '60'))  # שניות בין ניקויים
+
+# זיכרון משותף של תוצאות חילוץ מידע (לפי URL קנוני)
+INFO_MEMO_TTL = int(os.getenv('INFO_MEMO_TTL', '300'))  # 5 דקות
+INFO_MEMO_MAX_ENTRIES = int(os.getenv('INFO_MEMO_MAX_ENTRIES', '2000'))
+INFO_MEMO_MAX_BYTES = int(os.getenv('INFO_MEMO_MAX_BYTES', str(32 * 1024 * 1024)))  # 32MB
+
+# קאש file_id של קבצים שכבר נשלחו
+FILE_CACHE_DB = DATA_DIR / 'file_cache.db'
+FILE_CACHE_TTL = int(os.getenv('FILE_CACHE_TTL', str(30 * 24 * 60 * 60)))  # 30 יום
+
 # יצירת תיקיות נדרשות
 DOWNLOADS_DIR.mkdir(exist_ok=True)
+DATA_DIR.mkdir(exist_ok=True)
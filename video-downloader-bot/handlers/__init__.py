@@ -17,3 +17,15 @@ def register_all_handlers(bot):
     register_command_handlers(bot)
     register_url_handlers(bot)
     register_callback_handlers(bot)
+
+
+def register_all_async_handlers(bot, sync_bot):
+    """
+    רישום כל ההנדלרים לבוט האסינכרוני
+
+    Args:
+        bot: אובייקט AsyncTeleBot
+        sync_bot: בוט סינכרוני לשליחת הודעות מתוך workers של הורדות
+    """
+    from .async_handlers import register_async_handlers
+    register_async_handlers(bot, sync_bot)
@@ -0,0 +1,261 @@
+"""
+הנדלרים למצב asyncio (AsyncTeleBot)
+
+קריאות ה-API לטלגרם לא חוסמות את לולאת האירועים, וכל עבודה חוסמת - קאש
+הקישורים (SQLite), חילוץ מידע מ-yt-dlp וההכנסה לתור - רצה ב-executor.
+הלוגיקה עצמה משותפת עם ההנדלרים הסינכרוניים (handlers.common), וההורדות
+עוברות למתזמן ההורדות (threads) עם בוט סינכרוני שמשמש רק לשליחת הודעות
+מתוך ה-workers.
+"""
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List
+
+from telebot import TeleBot, types
+from telebot.async_telebot import AsyncTeleBot
+
+from config import MESSAGES, EXTRACT_WORKERS, BATCH_MAX_URLS
+from services import get_available_qualities, is_playlist
+from services.video_info import format_video_details
+from utils import extract_url, extract_urls
+from utils.helpers import log_action
+from handlers.common import (
+    help_text,
+    register_url,
+    url_for_key,
+    cached_info,
+    fetch_info,
+    parse_quality,
+    url_markup,
+    details_markup,
+    quality_markup,
+)
+from handlers.callbacks import submit_download
+from handlers.batch import submit_batch
+
+logger = logging.getLogger(__name__)
+
+# executor לעבודה חוסמת (yt-dlp, קאש, מתזמן) - לא חוסם את לולאת האירועים
+_extract_executor = ThreadPoolExecutor(max_workers=EXTRACT_WORKERS, thread_name_prefix="extract")
+
+
+async def _run_blocking(func: Callable[..., Any], *args: Any) -> Any:
+    """
+    הרצת פונקציה חוסמת ב-executor
+
+    Args:
+        func: הפונקציה להרצה
+        *args: ארגומנטים
+
+    Returns:
+        ערך ההחזרה של הפונקציה
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_extract_executor, func, *args)
+
+
+def register_async_handlers(bot: AsyncTeleBot, sync_bot: TeleBot) -> None:
+    """
+    רישום כל ההנדלרים לבוט האסינכרוני
+
+    Args:
+        bot: הבוט האסינכרוני (מקבל עדכונים)
+        sync_bot: בוט סינכרוני לשימוש ה-workers של ההורדות
+    """
+
+    @bot.message_handler(commands=['start'])
+    async def handle_start(message: types.Message) -> None:
+        """טיפול בפקודת /start"""
+        log_action(logger, message.from_user.id, "START", "")
+        await bot.send_message(
+            message.chat.id,
+            MESSAGES['welcome'],
+            parse_mode='Markdown'
+        )
+
+    @bot.message_handler(commands=['help'])
+    async def handle_help(message: types.Message) -> None:
+        """טיפול בפקודת /help"""
+        log_action(logger, message.from_user.id, "HELP", "")
+        await bot.send_message(
+            message.chat.id,
+            help_text(),
+            parse_mode='Markdown',
+            disable_web_page_preview=True
+        )
+
+    @bot.message_handler(func=lambda m: m.text and extract_url(m.text) is not None)
+    async def handle_url(message: types.Message) -> None:
+        """טיפול בקישור שנשלח"""
+        urls = extract_urls(message.text)
+        user_id = message.from_user.id
+        if len(urls) > 1:
+            # כמה קישורים בהודעה אחת - מצב אצווה
+            urls = urls[:BATCH_MAX_URLS]
+            log_action(logger, user_id, "BATCH_RECEIVED", f"URLs: {len(urls)}")
+            status = await bot.send_message(
+                message.chat.id,
+                MESSAGES['batch_started'].format(len(urls)),
+                reply_to_message_id=message.message_id
+            )
+            await _enqueue_batch(bot, sync_bot, message.chat.id, status.message_id, user_id, urls)
+            return
+
+        cache_key = await _run_blocking(register_url, urls[0], user_id)
+        await bot.send_message(
+            message.chat.id,
+            MESSAGES['url_detected'],
+            reply_markup=url_markup(cache_key),
+            reply_to_message_id=message.message_id
+        )
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('info:'))
+    async def handle_info_callback(call: types.CallbackQuery) -> None:
+        """טיפול בבקשת פרטים"""
+        cache_key = call.data[5:]
+        chat_id = call.message.chat.id
+        message_id = call.message.message_id
+
+        url = await _run_blocking(url_for_key, cache_key)
+        if not url:
+            await bot.answer_callback_query(call.id, MESSAGES['link_expired'])
+            return
+
+        log_action(logger, call.from_user.id, "INFO_REQUEST", url)
+
+        await bot.answer_callback_query(call.id)
+        await bot.edit_message_text(MESSAGES['fetching_info'], chat_id, message_id)
+
+        info, error = await _run_blocking(fetch_info, cache_key, url)
+        if info:
+            await bot.edit_message_text(
+                format_video_details(info), chat_id, message_id,
+                parse_mode='Markdown', reply_markup=details_markup(cache_key)
+            )
+        else:
+            await bot.edit_message_text(MESSAGES[error or 'error_no_video'], chat_id, message_id)
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('download:'))
+    async def handle_download_callback(call: types.CallbackQuery) -> None:
+        """טיפול בבקשת הורדה - הצגת בחירת איכות"""
+        cache_key = call.data[9:]
+        user_id = call.from_user.id
+        chat_id = call.message.chat.id
+        message_id = call.message.message_id
+
+        url = await _run_blocking(url_for_key, cache_key)
+        if not url:
+            await bot.answer_callback_query(call.id, MESSAGES['link_expired'])
+            return
+
+        log_action(logger, user_id, "DOWNLOAD_REQUEST", url)
+
+        info = await _run_blocking(cached_info, cache_key)
+        if not info:
+            await bot.edit_message_text(MESSAGES['fetching_info'], chat_id, message_id)
+            info, error = await _run_blocking(fetch_info, cache_key, url)
+            if error:
+                await bot.edit_message_text(MESSAGES[error], chat_id, message_id)
+                await bot.answer_callback_query(call.id)
+                return
+
+        if is_playlist(info):
+            await _enqueue_batch(bot, sync_bot, chat_id, message_id, user_id, [url])
+            await bot.answer_callback_query(call.id)
+            return
+
+        qualities = get_available_qualities(info) if info else []
+        if not qualities:
+            if await _enqueue_download(bot, sync_bot, call, cache_key, url, 'best', False):
+                await bot.answer_callback_query(call.id)
+            return
+
+        await bot.edit_message_text(
+            MESSAGES['select_quality'], chat_id, message_id,
+            reply_markup=quality_markup(cache_key, qualities)
+        )
+        await bot.answer_callback_query(call.id)
+
+    @bot.callback_query_handler(func=lambda call: call.data.startswith('quality:'))
+    async def handle_quality_callback(call: types.CallbackQuery) -> None:
+        """טיפול בבחירת איכות"""
+        try:
+            cache_key, quality, audio_only = parse_quality(call.data)
+
+            url = await _run_blocking(url_for_key, cache_key)
+            if not url:
+                await bot.answer_callback_query(call.id, MESSAGES['link_expired'], show_alert=True)
+                return
+
+            if await _enqueue_download(bot, sync_bot, call, cache_key, url, quality, audio_only):
+                await bot.answer_callback_query(call.id, "מתחיל הורדה ⏳")
+
+        except Exception as e:
+            logger.error(f"שגיאה בבחירת איכות: {e}", exc_info=True)
+            await bot.answer_callback_query(call.id, MESSAGES['error_download'], show_alert=True)
+
+
+async def _enqueue_download(bot: AsyncTeleBot, sync_bot: TeleBot, call: types.CallbackQuery,
+                            cache_key: str, url: str, quality: str, audio_only: bool) -> bool:
+    """
+    הכנסת הורדה לתור המתזמן (גרסה אסינכרונית)
+
+    Args:
+        bot: הבוט האסינכרוני
+        sync_bot: בוט סינכרוני שה-worker ישתמש בו
+        call: ה-callback query
+        cache_key: מפתח הקאש
+        url: הקישור להורדה
+        quality: איכות נבחרת
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        True אם ההורדה נכנסה לתור, False אם נדחתה (ה-callback כבר נענה)
+    """
+    position, rejection = await _run_blocking(
+        submit_download, sync_bot, call, cache_key, url, quality, audio_only
+    )
+    if rejection:
+        await bot.answer_callback_query(call.id, MESSAGES[rejection], show_alert=True)
+        return False
+
+    if position:
+        await bot.edit_message_text(
+            MESSAGES['queued'].format(position),
+            call.message.chat.id,
+            call.message.message_id
+        )
+    return True
+
+
+async def _enqueue_batch(bot: AsyncTeleBot, sync_bot: TeleBot, chat_id: int, message_id: int,
+                         user_id: int, urls: List[str]) -> bool:
+    """
+    הכנסת אצווה לתור המתזמן (גרסה אסינכרונית)
+
+    Args:
+        bot: הבוט האסינכרוני
+        sync_bot: בוט סינכרוני שה-worker ישתמש בו
+        chat_id: הצ'אט
+        message_id: הודעת הסטטוס
+        user_id: מזהה המשתמש
+        urls: הקישורים
+
+    Returns:
+        True אם האצווה נכנסה לתור
+    """
+    position, rejection = await _run_blocking(submit_batch, sync_bot, chat_id, message_id, user_id, urls)
+    if rejection:
+        await bot.edit_message_text(MESSAGES[rejection], chat_id, message_id)
+        return False
+
+    if position:
+        await bot.edit_message_text(MESSAGES['queued'].format(position), chat_id, message_id)
+    return True
+
+
+def shutdown_executor() -> None:
+    """סגירת ה-executor של חילוץ המידע"""
+    _extract_executor.shutdown(wait=True)
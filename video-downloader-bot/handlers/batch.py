@@ -0,0 +1,434 @@
+"""
+אצוות - כמה קישורים בהודעה אחת, או פלייליסט
+
+האצווה נכנסת למתזמן כעבודה אחת (עם עלות לפי מספר הקישורים), ובתוכה
+הפריטים עוברים בצינור זורם: הרחבת פלייליסטים → חילוץ מידע → הורדה → העלאה,
+עם כמה workers בכל שלב. כל הורדה תופסת מקום במתזמן - המקום של האצווה
+עצמה, או מקום פנוי נוסף - כך ש-DOWNLOAD_WORKERS והמגבלה למשתמש חלים
+גם על פריטי אצווה. החילוץ מוגבל ב-BATCH_EXTRACT_WORKERS לכל האצוות יחד. שלב ההעלאה אוסף עד 10 קבצים ושולח אותם כאלבום
+(sendMediaGroup) - בקשה אחת במקום בקשה לכל קובץ. ההתקדמות מוצגת בהודעת
+סטטוס אחת.
+"""
+
+import os
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from telebot import TeleBot, types
+
+from config import (
+    MESSAGES,
+    BATCH_MAX_URLS,
+    BATCH_MAX_ENTRIES,
+    BATCH_EXTRACT_WORKERS,
+    BATCH_DOWNLOAD_WORKERS,
+    BATCH_UPLOAD_WORKERS,
+    BATCH_GROUP_WAIT,
+)
+from services import (
+    get_scheduler,
+    DownloadScheduler,
+    get_video_info,
+    is_playlist,
+    playlist_urls,
+    download_video,
+    job_cost,
+    get_file_cache,
+    build_media_keys,
+    get_api_limits,
+    plan_download,
+    fit_file,
+    get_scratch,
+    disk_estimate,
+    prepare_media,
+    MediaMeta,
+    MEDIA_GROUP_MAX,
+    ProgressReporter,
+    PrivateContentError,
+)
+from services.batch import Stage, StreamingPipeline
+from services.metrics import job_labels, track_stage, record_job, record_bytes, UNKNOWN
+from services.scratch import Scratch
+from utils.tracing import traced
+from utils.helpers import log_action
+from handlers.sending import send_media_group, send_cached_file, get_sent_file
+from handlers.common import submit_job
+
+logger = logging.getLogger(__name__)
+
+
+# חילוץ מידע בכל האצוות יחד - לא BATCH_EXTRACT_WORKERS לכל אצווה
+_extract_slots = threading.BoundedSemaphore(max(1, BATCH_EXTRACT_WORKERS))
+
+_SLOT_POLL = 1.0  # שניות בין בדיקות למקום פנוי במתזמן
+
+
+class _TooLargeError(Exception):
+    """הפריט גדול ממגבלת ההעלאה גם אחרי תכנון / קידוד"""
+    pass
+
+
+@dataclass
+class BatchItem:
+    """פריט אחד באצווה"""
+    url: str
+    info: Optional[Dict[str, Any]] = None
+    filepath: Optional[str] = None
+    file_size: int = 0
+    scratch: Optional[Scratch] = None
+    media_keys: List[str] = field(default_factory=list)
+    meta: Optional[MediaMeta] = None
+    labels: Dict[str, str] = field(default_factory=lambda: job_labels(None, 'best'))
+    started: float = field(default_factory=time.time)
+
+
+class BatchStatus:
+    """מוני האצווה והודעת הסטטוס המשותפת"""
+
+    def __init__(self, progress: ProgressReporter, limit: int = BATCH_MAX_ENTRIES):
+        self.progress = progress
+        self.limit = limit
+        self.total = 0
+        self.done = 0
+        self.failed = 0
+        self.active = {'extract': 0, 'download': 0, 'upload': 0}
+        self._lock = threading.Lock()
+
+    def admit(self, count: int) -> int:
+        """
+        קבלת פריטים לאצווה בתוך המגבלה
+
+        Args:
+            count: מספר הפריטים המבוקש
+
+        Returns:
+            כמה פריטים התקבלו
+        """
+        with self._lock:
+            admitted = max(0, min(count, self.limit - self.total))
+            self.total += admitted
+        return admitted
+
+    @contextmanager
+    def stage(self, name: str, count: int = 1) -> Iterator[None]:
+        """ספירת פריטים כפעילים בשלב בזמן הבלוק"""
+        with self._lock:
+            self.active[name] += count
+        self.refresh()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.active[name] -= count
+
+    def item_done(self, ok: bool) -> None:
+        """סיום פריט (נשלח / נכשל)"""
+        with self._lock:
+            if ok:
+                self.done += 1
+            else:
+                self.failed += 1
+        self.refresh()
+
+    def render(self, final: bool = False) -> str:
+        """טקסט הודעת הסטטוס"""
+        with self._lock:
+            failed = MESSAGES['batch_failed_suffix'].format(self.failed) if self.failed else ''
+            if final:
+                return MESSAGES['batch_done'].format(done=self.done, total=self.total, failed=failed)
+            return MESSAGES['batch_progress'].format(
+                done=self.done, total=self.total, failed=failed,
+                extracting=self.active['extract'],
+                downloading=self.active['download'],
+                uploading=self.active['upload'],
+            )
+
+    def refresh(self) -> None:
+        """עדכון הודעת הסטטוס (בקצב מוגבל)"""
+        self.progress.update(self.render())
+
+
+class DownloadSlots:
+    """
+    מקומות ההורדה של אצווה אחת
+
+    האצווה רצה כעבודה במתזמן ולכן כבר מחזיקה מקום אחד - פריט אחד מוריד
+    בו. פריטים נוספים מורידים במקביל רק אם המתזמן נותן מקום פנוי (במסגרת
+    המגבלה הגלובלית והמגבלה למשתמש), אחרת ממתינים.
+    """
+
+    def __init__(self, user_id: int, scheduler: Optional[DownloadScheduler] = None,
+                 poll: float = _SLOT_POLL):
+        self.user_id = user_id
+        self.scheduler = scheduler or get_scheduler()
+        self.poll = poll
+        self._own_busy = False
+        self._cond = threading.Condition()
+
+    @contextmanager
+    def hold(self) -> Iterator[None]:
+        """החזקת מקום הורדה לזמן הבלוק (ממתין עד שמתפנה)"""
+        extra = self._acquire()
+        try:
+            yield
+        finally:
+            self._release(extra)
+
+    def _acquire(self) -> bool:
+        """
+        Returns:
+            True אם התקבל מקום נוסף מהמתזמן, False אם המקום של האצווה
+        """
+        with self._cond:
+            while True:
+                if not self._own_busy:
+                    self._own_busy = True
+                    return False
+                if self.scheduler.try_acquire_slot(self.user_id):
+                    return True
+                # מקומות במתזמן מתפנים בלי הודעה אלינו - בודקים שוב מדי פעם
+                self._cond.wait(self.poll)
+
+    def _release(self, extra: bool) -> None:
+        if extra:
+            self.scheduler.release_slot(self.user_id)
+            return
+        with self._cond:
+            self._own_busy = False
+            self._cond.notify()
+
+
+class BatchRunner:
+    """פונקציות השלבים של אצווה אחת"""
+
+    def __init__(self, bot: TeleBot, chat_id: int, status: BatchStatus, slots: DownloadSlots):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.status = status
+        self.slots = slots
+        self.max_upload = get_api_limits().max_upload
+
+    def expand(self, url: str) -> List[BatchItem]:
+        """קישור מההודעה → פריט אחד, או כל הפריטים של פלייליסט (חילוץ שטוח)"""
+        with _extract_slots, self.status.stage('extract'):
+            info = get_video_info(url)
+        if not info:
+            raise ValueError(MESSAGES['error_no_video'])
+
+        if is_playlist(info):
+            urls = playlist_urls(info)
+            return [BatchItem(entry_url) for entry_url in urls[:self.status.admit(len(urls))]]
+
+        return [BatchItem(url, info)] if self.status.admit(1) else []
+
+    def extract(self, item: BatchItem) -> List[BatchItem]:
+        """חילוץ מידע מלא לפריטי פלייליסט"""
+        if item.info is None:
+            with _extract_slots, self.status.stage('extract'):
+                item.info = get_video_info(item.url)
+        if not item.info or is_playlist(item.info):
+            raise ValueError(f"לא סרטון בודד: {item.url}")
+
+        item.labels = job_labels(item.info.get('extractor_key'), 'best')
+        return [item]
+
+    def download(self, item: BatchItem) -> List[BatchItem]:
+        """שליחה מקאש ה-file_id אם אפשר, אחרת הורדה לתיקיית עבודה"""
+        info = item.info
+        item.media_keys = build_media_keys(item.url, info, 'best', False)
+        cached = get_file_cache().get(item.media_keys)
+        if cached and send_cached_file(self.bot, self.chat_id, cached, False):
+            self._finish(item, 'cached')
+            return []
+
+        plan = plan_download(info, 'best', False, self.max_upload)
+        if not plan.fits:
+            raise _TooLargeError(item.url)
+
+        # מקום במתזמן לכל ההורדה והעיבוד (yt-dlp, ffmpeg, דיסק) - לא להעלאה
+        with self.slots.hold():
+            item.scratch = get_scratch().acquire(disk_estimate(plan, self.max_upload))
+            try:
+                with self.status.stage('download'):
+                    filepath = download_video(
+                        item.url, 'best', False,
+                        format_selector=plan.format_selector,
+                        extractor_key=info.get('extractor_key'),
+                        workdir=item.scratch.workdir
+                    )
+                    if not filepath:
+                        raise FileNotFoundError(MESSAGES['error_file_not_found'])
+
+                    file_size = os.path.getsize(filepath)
+                    if file_size > self.max_upload:
+                        filepath = fit_file(filepath, info.get('duration'), self.max_upload)
+                        if not filepath:
+                            raise _TooLargeError(item.url)
+                        file_size = os.path.getsize(filepath)
+
+                with track_stage('prepare', **item.labels) as stage:
+                    item.meta = prepare_media(filepath)
+                    stage['outcome'] = item.meta.outcome
+                file_size = os.path.getsize(filepath)
+            except BaseException:
+                item.scratch.release()
+                raise
+
+        item.filepath, item.file_size = filepath, file_size
+        return [item]
+
+    def upload(self, items: List[BatchItem]) -> None:
+        """שליחת קבוצת קבצים כאלבומים ושמירת ה-file_id של כל אחד"""
+        try:
+            with self.status.stage('upload', len(items)):
+                sent = send_media_group(
+                    self.bot, self.chat_id, [item.filepath for item in items], False,
+                    metas=[item.meta for item in items]
+                )
+        finally:
+            for item in items:
+                item.scratch.release()
+
+        for item, message in zip(items, sent):
+            file_ref = get_sent_file(message)
+            if message is None:
+                self._finish(item, 'error')
+                continue
+            record_bytes('upload', item.file_size, item.labels['extractor'])
+            if file_ref:
+                get_file_cache().put(item.media_keys, file_ref[0], file_ref[1], item.file_size)
+            self._finish(item, 'success')
+
+    def on_error(self, stage: str, item: Any, error: Exception) -> None:
+        """פריט שנכשל - נספר ומדווח, והאצווה ממשיכה"""
+        if isinstance(item, list):
+            # קבוצה שנכשלה בשלב ההעלאה
+            for member in item:
+                self.on_error(stage, member, error)
+            return
+
+        if isinstance(item, BatchItem):
+            if isinstance(error, _TooLargeError):
+                outcome = 'too_large'
+            elif isinstance(error, PrivateContentError):
+                outcome = 'private'
+            else:
+                outcome = 'error'
+            self._finish(item, outcome)
+            return
+
+        # קישור מההודעה שלא הצליח להתרחב - נספר כפריט אחד שנכשל
+        self.status.admit(1)
+        self.status.item_done(ok=False)
+        record_job('error', 0.0, UNKNOWN, 'best')
+
+    def _finish(self, item: BatchItem, outcome: str) -> None:
+        self.status.item_done(ok=outcome in ('success', 'cached'))
+        record_job(outcome, time.time() - item.started, **item.labels)
+
+
+@traced('batch_job')
+def _run_batch(bot: TeleBot, chat_id: int, message_id: int, user_id: int, urls: List[str]) -> None:
+    """
+    הרצת אצווה בצינור הזורם ועדכון הודעת הסטטוס
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט
+        message_id: הודעת הסטטוס
+        user_id: מזהה המשתמש
+        urls: הקישורים מההודעה
+    """
+    start_time = time.time()
+    progress = ProgressReporter(bot, chat_id, message_id)
+    status = BatchStatus(progress)
+    runner = BatchRunner(bot, chat_id, status, DownloadSlots(user_id))
+
+    log_action(logger, user_id, "BATCH_START", f"URLs: {len(urls)}")
+
+    pipeline = StreamingPipeline([
+        Stage('expand', runner.expand, BATCH_EXTRACT_WORKERS),
+        Stage('extract', runner.extract, BATCH_EXTRACT_WORKERS),
+        Stage('download', runner.download, BATCH_DOWNLOAD_WORKERS),
+        Stage('upload', runner.upload, BATCH_UPLOAD_WORKERS,
+              group=MEDIA_GROUP_MAX, group_wait=BATCH_GROUP_WAIT),
+    ], on_error=runner.on_error)
+    pipeline.run(urls)
+
+    progress.finish(status.render(final=True))
+    log_action(
+        logger, user_id, "BATCH_COMPLETE",
+        f"Sent: {status.done}/{status.total}, Failed: {status.failed}, "
+        f"Duration: {time.time() - start_time:.1f}s"
+    )
+
+
+def submit_batch(bot: TeleBot, chat_id: int, message_id: int, user_id: int,
+                 urls: List[str]) -> Tuple[int, Optional[str]]:
+    """
+    הכנסת אצווה לתור המתזמן (בלי הודעות - משותף לשני המצבים)
+
+    Args:
+        bot: בוט סינכרוני (לשימוש ה-worker)
+        chat_id: הצ'אט
+        message_id: הודעת הסטטוס שתתעדכן
+        user_id: מזהה המשתמש
+        urls: הקישורים (נחתך ל-BATCH_MAX_URLS)
+
+    Returns:
+        (מיקום בתור, מפתח הודעת דחייה או None) - ראה submit_job
+    """
+    urls = urls[:BATCH_MAX_URLS]
+    return submit_job(
+        user_id, 'BATCH', _run_batch,
+        bot, chat_id, message_id, user_id, urls,
+        cost=job_cost(None) * len(urls)
+    )
+
+
+def start_batch(bot: TeleBot, chat_id: int, message_id: int, user_id: int, urls: List[str]) -> bool:
+    """
+    הכנסת אצווה לתור ועדכון הודעת הסטטוס (מיקום בתור / דחייה)
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט
+        message_id: הודעת הסטטוס
+        user_id: מזהה המשתמש
+        urls: הקישורים
+
+    Returns:
+        True אם האצווה נכנסה לתור
+    """
+    position, rejection = submit_batch(bot, chat_id, message_id, user_id, urls)
+    if rejection:
+        bot.edit_message_text(MESSAGES[rejection], chat_id, message_id)
+        return False
+
+    if position:
+        bot.edit_message_text(MESSAGES['queued'].format(position), chat_id, message_id)
+    return True
+
+
+def handle_batch_message(bot: TeleBot, message: types.Message, urls: List[str]) -> None:
+    """
+    הודעה עם כמה קישורים - הודעת סטטוס אחת והכנסה לתור
+
+    Args:
+        bot: אובייקט הבוט
+        message: ההודעה שנשלחה
+        urls: כל הקישורים שנמצאו בה
+    """
+    urls = urls[:BATCH_MAX_URLS]
+    log_action(logger, message.from_user.id, "BATCH_RECEIVED", f"URLs: {len(urls)}")
+
+    status = bot.send_message(
+        message.chat.id,
+        MESSAGES['batch_started'].format(len(urls)),
+        reply_to_message_id=message.message_id
+    )
+    start_batch(bot, message.chat.id, status.message_id, message.from_user.id, urls)
@@ -1,46 +1,53 @@
 """
 הנדלרים ל-callback queries (לחיצות על כפתורים)
 """
-import threading
 import os
 import time
 import logging
+from typing import Any, Dict, List, Optional, Tuple
 
 from telebot import TeleBot, types
 
-from config import MESSAGES, MAX_FILE_SIZE
+from config import MESSAGES, STREAMING_UPLOAD
 from services import (
-    get_video_info,
     get_available_qualities,
+    is_playlist,
     download_video,
-    PrivateContentError
+    job_cost,
+    get_file_cache,
+    build_media_keys,
+    get_api_limits,
+    plan_download,
+    fit_file,
+    pick_stream_format,
+    stream_to_telegram,
+    get_scratch,
+    disk_estimate,
+    DiskBudgetError,
+    prepare_media,
+    ProgressReporter,
+    PrivateContentError,
 )
 from services.video_info import format_video_details
+from services.metrics import job_labels, track_stage, observe_stage, record_job, record_bytes
+from utils.tracing import traced, current_span
 from utils import cleanup_file, format_size
 from utils.helpers import log_action
-from handlers.url import get_cache
+from handlers.sending import send_file, send_cached_file, get_sent_file
+from handlers.common import (
+    get_cache,
+    url_for_key,
+    cached_info,
+    fetch_info,
+    parse_quality,
+    submit_job,
+    details_markup,
+    quality_markup,
+)
 
 logger = logging.getLogger(__name__)
 
 
-def _get_url_from_cache_key(cache_key: str) -> str:
-    """
-    קבלת URL מהקאש לפי מפתח
-
-    Args:
-        cache_key: מפתח הקאש (UUID קצר)
-
-    Returns:
-        URL מלא או None אם לא נמצא
-    """
-    video_cache = get_cache()
-
-    if cache_key in video_cache:
-        return video_cache[cache_key].get('url')
-
-    return None
-
-
 def register_callback_handlers(bot: TeleBot) -> None:
     """
     רישום הנדלרים ל-callbacks
@@ -53,70 +60,25 @@ def register_callback_handlers(bot: TeleBot) -> None:
     def handle_info_callback(call: types.CallbackQuery) -> None:
         """טיפול בבקשת פרטים"""
         cache_key = call.data[5:]
-        user_id = call.from_user.id
-        video_cache = get_cache()
+        chat_id = call.message.chat.id
+        message_id = call.message.message_id
 
-        # ניסיון לקבל URL מהקאש או מהמפתח
-        url = _get_url_from_cache_key(cache_key)
+        url = url_for_key(cache_key)
         if not url:
             bot.answer_callback_query(call.id, MESSAGES['link_expired'])
             return
 
-        log_action(logger, user_id, "INFO_REQUEST", url)
-
-        # עדכון הודעה
-        bot.edit_message_text(
-            MESSAGES['fetching_info'],
-            call.message.chat.id,
-            call.message.message_id
-        )
-
-        try:
-            info = get_video_info(url)
-
-            if not info:
-                bot.edit_message_text(
-                    MESSAGES['error_no_video'],
-                    call.message.chat.id,
-                    call.message.message_id
-                )
-                return
-
-            # שמירת מידע בקאש
-            if cache_key in video_cache:
-                video_cache[cache_key]['info'] = info
-
-            # בניית הודעת פרטים
-            details_text = format_video_details(info)
-
-            # כפתורי פעולה
-            markup = types.InlineKeyboardMarkup(row_width=2)
-            markup.add(
-                types.InlineKeyboardButton("📥 הורדה", callback_data=f"download:{cache_key}"),
-                types.InlineKeyboardButton("❌ סגור", callback_data="close")
-            )
+        log_action(logger, call.from_user.id, "INFO_REQUEST", url)
+        bot.edit_message_text(MESSAGES['fetching_info'], chat_id, message_id)
 
+        info, error = fetch_info(cache_key, url)
+        if info:
             bot.edit_message_text(
-                details_text,
-                call.message.chat.id,
-                call.message.message_id,
-                parse_mode='Markdown',
-                reply_markup=markup
-            )
-
-        except PrivateContentError:
-            bot.edit_message_text(
-                MESSAGES['error_private'],
-                call.message.chat.id,
-                call.message.message_id
-            )
-        except Exception as e:
-            logger.error(f"שגיאה בקבלת פרטים: {e}")
-            bot.edit_message_text(
-                MESSAGES['error_not_supported'],
-                call.message.chat.id,
-                call.message.message_id
+                format_video_details(info), chat_id, message_id,
+                parse_mode='Markdown', reply_markup=details_markup(cache_key)
             )
+        else:
+            bot.edit_message_text(MESSAGES[error or 'error_no_video'], chat_id, message_id)
 
         bot.answer_callback_query(call.id)
 
@@ -125,10 +87,10 @@ def register_callback_handlers(bot: TeleBot) -> None:
         """טיפול בבקשת הורדה - הצגת בחירת איכות"""
         cache_key = call.data[9:]
         user_id = call.from_user.id
-        video_cache = get_cache()
+        chat_id = call.message.chat.id
+        message_id = call.message.message_id
 
-        # ניסיון לקבל URL מהקאש או מהמפתח
-        url = _get_url_from_cache_key(cache_key)
+        url = url_for_key(cache_key)
         if not url:
             bot.answer_callback_query(call.id, MESSAGES['link_expired'])
             return
@@ -136,128 +98,108 @@ def register_callback_handlers(bot: TeleBot) -> None:
         log_action(logger, user_id, "DOWNLOAD_REQUEST", url)
 
         # בדיקה אם יש כבר מידע בקאש
-        info = video_cache.get(cache_key, {}).get('info')
-
+        info = cached_info(cache_key)
         if not info:
-            bot.edit_message_text(
-                MESSAGES['fetching_info'],
-                call.message.chat.id,
-                call.message.message_id
-            )
-
-            try:
-                info = get_video_info(url)
-                if cache_key in video_cache:
-                    video_cache[cache_key]['info'] = info
-            except PrivateContentError:
-                bot.edit_message_text(
-                    MESSAGES['error_private'],
-                    call.message.chat.id,
-                    call.message.message_id
-                )
+            bot.edit_message_text(MESSAGES['fetching_info'], chat_id, message_id)
+            info, error = fetch_info(cache_key, url)
+            if error:
+                bot.edit_message_text(MESSAGES[error], chat_id, message_id)
                 bot.answer_callback_query(call.id)
                 return
-            except Exception as e:
-                logger.error(f"שגיאה: {e}")
-                bot.edit_message_text(
-                    MESSAGES['error_not_supported'],
-                    call.message.chat.id,
-                    call.message.message_id
-                )
-                bot.answer_callback_query(call.id)
-                return
-
-        # קבלת איכויות זמינות
-        qualities = get_available_qualities(info)
 
-        if not qualities:
-            _start_download(bot, call, cache_key, url, 'best', False)
+        # פלייליסט - כל הפריטים באצווה אחת (בלי בחירת איכות)
+        if is_playlist(info):
+            from handlers.batch import start_batch
+            start_batch(bot, chat_id, message_id, user_id, [url])
             bot.answer_callback_query(call.id)
             return
 
-        # יצירת כפתורי איכות
-        markup = _create_quality_buttons(cache_key, qualities)
+        qualities = get_available_qualities(info) if info else []
+        if not qualities:
+            if _enqueue_download(bot, call, cache_key, url, 'best', False):
+                bot.answer_callback_query(call.id)
+            return
 
         bot.edit_message_text(
-            MESSAGES['select_quality'],
-            call.message.chat.id,
-            call.message.message_id,
-            reply_markup=markup
+            MESSAGES['select_quality'], chat_id, message_id,
+            reply_markup=quality_markup(cache_key, qualities)
         )
-
         bot.answer_callback_query(call.id)
 
-
-
     @bot.callback_query_handler(func=lambda call: call.data.startswith('quality:'))
     def handle_quality_callback(call: types.CallbackQuery) -> None:
         """טיפול בבחירת איכות"""
-
         try:
-            # פירוס בטוח – ה-URL עלול להכיל נקודותיים
-            _, rest = call.data.split(':', 1)
-            cache_key, quality = rest.rsplit(':', 1)
+            cache_key, quality, audio_only = parse_quality(call.data)
 
-            # ניסיון לקבל URL
-            url = _get_url_from_cache_key(cache_key)
+            url = url_for_key(cache_key)
             if not url:
                 bot.answer_callback_query(call.id, MESSAGES['link_expired'], show_alert=True)
                 return
 
-            audio_only = (quality == 'audio')
-
-            # ✨ הכי חשוב – עונים ל-callback מיד
-            bot.answer_callback_query(call.id, "מתחיל הורדה ⏳")
-
-            # מריצים הורדה ב-thread נפרד (לא חוסם את הבוט)
-            threading.Thread(
-                target=_start_download,
-                args=(bot, call, cache_key, url, quality, audio_only),
-                daemon=True
-            ).start()
+            # הכנסה לתור ההורדות (לא חוסם את הבוט)
+            if _enqueue_download(bot, call, cache_key, url, quality, audio_only):
+                bot.answer_callback_query(call.id, "מתחיל הורדה ⏳")
 
         except Exception as e:
             logger.error(f"שגיאה בבחירת איכות: {e}", exc_info=True)
             bot.answer_callback_query(call.id, MESSAGES['error_download'], show_alert=True)
 
 
-
-def _create_quality_buttons(cache_key: str, qualities: list) -> types.InlineKeyboardMarkup:
+def _enqueue_download(bot: TeleBot, call: types.CallbackQuery,
+                      cache_key: str, url: str, quality: str, audio_only: bool) -> bool:
     """
-    יצירת כפתורי בחירת איכות
+    הכנסת הורדה לתור המתזמן ועדכון הודעת הסטטוס
 
     Args:
+        bot: אובייקט הבוט
+        call: ה-callback query
         cache_key: מפתח הקאש
-        qualities: רשימת איכויות
+        url: הקישור להורדה
+        quality: איכות נבחרת
+        audio_only: האם אודיו בלבד
 
     Returns:
-        Markup עם הכפתורים
+        True אם ההורדה נכנסה לתור, False אם נדחתה (ה-callback כבר נענה)
     """
-    markup = types.InlineKeyboardMarkup(row_width=2)
-    quality_emojis = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣']
-    buttons = []
-
-    for i, q in enumerate(qualities):
-        if q.get('audio_only'):
-            label = "🎵 אודיו בלבד"
-            callback = f"quality:{cache_key}:audio"
-        else:
-            label = f"{quality_emojis[i]} {q['label']}"
-            callback = f"quality:{cache_key}:{q['height']}"
+    position, rejection = submit_download(bot, call, cache_key, url, quality, audio_only)
+    if rejection:
+        bot.answer_callback_query(call.id, MESSAGES[rejection], show_alert=True)
+        return False
 
-        buttons.append(types.InlineKeyboardButton(label, callback_data=callback))
+    if position:
+        bot.edit_message_text(
+            MESSAGES['queued'].format(position),
+            call.message.chat.id,
+            call.message.message_id
+        )
+    return True
 
-    # הוספת כפתורים בשורות של 2
-    for i in range(0, len(buttons), 2):
-        row = buttons[i:i + 2]
-        markup.add(*row)
 
-    # כפתור ביטול
-    markup.add(types.InlineKeyboardButton("❌ ביטול", callback_data="close"))
+def submit_download(bot: TeleBot, call: types.CallbackQuery, cache_key: str, url: str,
+                    quality: str, audio_only: bool) -> Tuple[int, Optional[str]]:
+    """
+    הכנסת הורדה לתור המתזמן (בלי הודעות - משותף לשני המצבים)
 
-    return markup
+    Args:
+        bot: בוט סינכרוני שה-worker ישתמש בו
+        call: ה-callback query
+        cache_key: מפתח הקאש
+        url: הקישור להורדה
+        quality: איכות נבחרת
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        (מיקום בתור, מפתח הודעת דחייה או None) - ראה submit_job
+    """
+    return submit_job(
+        call.from_user.id, 'DOWNLOAD', _start_download,
+        bot, call, cache_key, url, quality, audio_only,
+        cost=job_cost(cached_info(cache_key), audio_only)
+    )
 
 
+@traced('download_job', profile=True)
 def _start_download(bot: TeleBot, call: types.CallbackQuery,
                     cache_key: str, url: str, quality: str, audio_only: bool) -> None:
     """
@@ -272,109 +214,220 @@ def _start_download(bot: TeleBot, call: types.CallbackQuery,
         audio_only: האם אודיו בלבד
     """
     user_id = call.from_user.id
-    filepath = None
 
     log_action(logger, user_id, "DOWNLOAD_START", f"URL: {url}, Quality: {quality}")
 
     start_time = time.time()
 
-    # עדכון סטטוס
-    bot.edit_message_text(
-        MESSAGES['downloading'],
-        call.message.chat.id,
-        call.message.message_id
-    )
+    file_cache = get_file_cache()
+    entry = get_cache().get(cache_key) or {}
+    info = entry.get('info')
+    labels = job_labels((info or {}).get('extractor_key'), quality, audio_only)
+    current_span().set(user_id=user_id, url=url, **labels)
+
+    # עדכון סטטוס (עם התקדמות חיה) - שגיאות עריכה לא מפילות את העבודה
+    progress = ProgressReporter(bot, call.message.chat.id, call.message.message_id)
 
+    # כל שלבי העבודה בתוך try אחד - כל שגיאה מגיעה למשתמש ולמדדים
+    scratch = None
+    outcome = 'error'
     try:
+        # בדיקה אם הקובץ כבר נשלח בעבר - שליחה חוזרת לפי file_id
+        media_keys = build_media_keys(url, info, quality, audio_only)
+        cached = file_cache.get(media_keys)
+        if cached and send_cached_file(bot, call.message.chat.id, cached, audio_only):
+            progress.close()
+            outcome = 'cached'
+            log_action(
+                logger, user_id, "DOWNLOAD_CACHED",
+                f"Duration: {time.time() - start_time:.1f}s, Hit rate: {file_cache.hit_rate():.1f}%"
+            )
+            return
+
+        # תכנון לפי מגבלת הגודל - לפני שמורידים משהו
+        max_upload = get_api_limits().max_upload
+        plan = plan_download(info, quality, audio_only, max_upload)
+
+        if not plan.fits:
+            progress.finish(MESSAGES['error_too_large'].format(format_size(max_upload)))
+            log_action(
+                logger, user_id, "DOWNLOAD_ERROR",
+                f"Too large (pre-flight): ~{format_size(plan.estimated_size)}"
+            )
+            outcome = 'too_large'
+            return
+
+        progress.stage(MESSAGES['downloading'])
+
+        # ניסיון להזרים ישירות (בלי קובץ זמני) - רק וידאו בפורמט שלא דורש מיזוג
+        if STREAMING_UPLOAD and not audio_only:
+            fmt = pick_stream_format(info, quality)
+            if fmt and _try_stream(bot, call, url, fmt, media_keys, progress, labels):
+                log_action(
+                    logger, user_id, "DOWNLOAD_COMPLETE",
+                    f"Duration: {time.time() - start_time:.1f}s, Streamed: {fmt['format_id']}"
+                )
+                outcome = 'streamed'
+                return
+
+        # שמירת מקום בדיסק - אם התקציב מלא העבודה ממתינה לתורה
+        waited = False
+
+        def on_disk_wait() -> None:
+            nonlocal waited
+            waited = True
+            progress.stage(MESSAGES['waiting_disk'])
+
+        try:
+            # תיקיית עבודה נפרדת - בזיכרון לעבודות קטנות, אחרת בדיסק (נמחקת כולה בסיום)
+            scratch = get_scratch().acquire(disk_estimate(plan, max_upload, audio_only), on_wait=on_disk_wait)
+            current_span().set(tier=scratch.tier)
+        except DiskBudgetError as e:
+            progress.finish(MESSAGES['error_disk_full'])
+            log_action(logger, user_id, "DOWNLOAD_ERROR", f"Disk budget: {e}")
+            outcome = 'no_disk'
+            return
+
+        if waited:
+            progress.stage(MESSAGES['downloading'])
+
         # הורדה
-        filepath = download_video(url, quality, audio_only)
+        io_start = time.perf_counter()
+        filepath = download_video(
+            url, quality, audio_only,
+            progress_hook=progress.download_hook,
+            format_selector=plan.format_selector,
+            audio_bitrate=plan.audio_bitrate,
+            extractor_key=(info or {}).get('extractor_key'),
+            workdir=scratch.workdir
+        )
+        io_seconds = time.perf_counter() - io_start
 
         if not filepath or not os.path.exists(filepath):
-            bot.edit_message_text(
-                MESSAGES['error_file_not_found'],
-                call.message.chat.id,
-                call.message.message_id
-            )
+            progress.finish(MESSAGES['error_file_not_found'])
+            outcome = 'not_found'
             return
 
-        # בדיקת גודל
+        # בדיקת גודל - לפי המגבלה של שרת ה-API, עם קידוד מחדש אם אפשר
         file_size = os.path.getsize(filepath)
-        if file_size > MAX_FILE_SIZE:
+        if file_size > max_upload and not audio_only:
+            progress.stage(MESSAGES['compressing'])
+            with track_stage('transcode', **labels) as stage:
+                fitted = fit_file(filepath, (info or {}).get('duration'), max_upload)
+                stage['outcome'] = 'ok' if fitted else 'failed'
+            if fitted:
+                cleanup_file(filepath)
+                filepath = fitted
+                file_size = os.path.getsize(filepath)
+
+        if file_size > max_upload:
             cleanup_file(filepath)
-            bot.edit_message_text(
-                MESSAGES['error_too_large'],
-                call.message.chat.id,
-                call.message.message_id
-            )
+            progress.finish(MESSAGES['error_too_large'].format(format_size(max_upload)))
+            outcome = 'too_large'
             return
 
+        # מטא-דאטה, faststart ותמונה ממוזערת - טלגרם מציג ומזרים בלי לעבד בעצמו
+        with track_stage('prepare', **labels) as stage:
+            meta = prepare_media(filepath, audio_only)
+            stage['outcome'] = meta.outcome
+        file_size = os.path.getsize(filepath)
+
         # עדכון סטטוס - מעלה
-        bot.edit_message_text(
-            MESSAGES['uploading'],
-            call.message.chat.id,
-            call.message.message_id
-        )
+        progress.stage(MESSAGES['uploading'])
 
-        # שליחת הקובץ
-        _send_file(bot, call, filepath, audio_only)
+        # שליחת הקובץ ושמירת ה-file_id לשליחות הבאות
+        io_start = time.perf_counter()
+        with track_stage('upload', **labels):
+            sent = send_file(
+                bot, call.message.chat.id, filepath, audio_only, progress.upload_callback, meta
+            )
+        record_bytes('upload', file_size, labels['extractor'])
+        scratch.record(io_seconds + time.perf_counter() - io_start, file_size)
+        file_ref = get_sent_file(sent)
+        if file_ref:
+            file_cache.put(media_keys, file_ref[0], file_ref[1], file_size)
 
-        # מחיקת הודעת סטטוס
-        bot.delete_message(call.message.chat.id, call.message.message_id)
+        # סוף חיי הודעת הסטטוס - נמחקת (בלי עריכה ממתינה)
+        progress.close()
 
         # לוג סיום
+        outcome = 'success'
         duration = time.time() - start_time
         log_action(
             logger, user_id, "DOWNLOAD_COMPLETE",
-            f"Duration: {duration:.1f}s, Size: {format_size(file_size)}"
+            f"Duration: {duration:.1f}s, Size: {format_size(file_size)}, Tier: {scratch.tier}"
         )
 
     except PrivateContentError:
-        bot.edit_message_text(
-            MESSAGES['error_private'],
-            call.message.chat.id,
-            call.message.message_id
-        )
+        progress.finish(MESSAGES['error_private'])
+        outcome = 'private'
         log_action(logger, user_id, "DOWNLOAD_ERROR", "Private content")
 
     except Exception as e:
         logger.error(f"שגיאה בהורדה: {e}", exc_info=True)
         error_msg = str(e)[:100] if str(e) else "Unknown error"
-        bot.edit_message_text(
-            MESSAGES['error_download'].format(error_msg),
-            call.message.chat.id,
-            call.message.message_id
-        )
+        progress.finish(MESSAGES['error_download'].format(error_msg))
         log_action(logger, user_id, "DOWNLOAD_ERROR", str(e))
 
     finally:
-        if filepath:
-            cleanup_file(filepath)
+        if scratch is not None:
+            with track_stage('cleanup', **labels):
+                scratch.release()
+        _finish_job(outcome, start_time, labels)
 
 
-def _send_file(bot: TeleBot, call: types.CallbackQuery,
-               filepath: str, audio_only: bool) -> None:
-    file_size = os.path.getsize(filepath)
-    chat_id = call.message.chat.id
+def _finish_job(outcome: str, start_time: float, labels: Dict[str, str]) -> None:
+    """
+    רישום התוצאה הסופית של עבודה - במדדים וב-span של העבודה
 
-    with open(filepath, 'rb') as f:
-        if audio_only:
-            bot.send_audio(
-                chat_id,
-                f,
-                caption=MESSAGES['done_audio']
-            )
-        else:
-            # מעל ~50MB – שולחים כקובץ רגיל
-            if file_size > 50 * 1024 * 1024:
-                bot.send_document(
-                    chat_id,
-                    f,
-                    caption=MESSAGES['done_video']
-                )
-            else:
-                bot.send_video(
-                    chat_id,
-                    f,
-                    caption=MESSAGES['done_video'],
-                    supports_streaming=True
-                )
+    Args:
+        outcome: התוצאה (success / cached / streamed / too_large / ...)
+        start_time: זמן תחילת העבודה (time.time)
+        labels: תוויות extractor / quality
+    """
+    record_job(outcome, time.time() - start_time, **labels)
+    span = current_span()
+    if span is not None:
+        span.set(outcome=outcome)
+
+
+def _try_stream(bot: TeleBot, call: types.CallbackQuery, url: str, fmt: Dict[str, Any],
+                media_keys: List[str], progress: ProgressReporter,
+                labels: Dict[str, str]) -> bool:
+    """
+    הורדה והעלאה זורמת של פורמט בודד
+
+    Args:
+        bot: אובייקט הבוט
+        call: ה-callback query
+        url: הקישור להורדה
+        fmt: הפורמט שנבחר להזרמה
+        media_keys: מפתחות לקאש ה-file_id
+        progress: מדווח ההתקדמות
+        labels: תוויות המדדים (extractor / quality)
+
+    Returns:
+        True אם נשלח, False אם צריך לחזור להורדה רגילה
+    """
+    started = time.perf_counter()
+    try:
+        sent = stream_to_telegram(
+            bot, call.message.chat.id, url, fmt,
+            MESSAGES['done_video'], progress.upload_callback
+        )
+    except Exception as e:
+        # כולל שגיאות רשת (requests) ו-yt-dlp - ההורדה הרגילה היא תמיד גיבוי בטוח
+        logger.warning(f"[streaming] הזרמה נכשלה, עובר להורדה רגילה: {e}")
+        observe_stage('stream', time.perf_counter() - started, 'fallback', **labels)
+        progress.stage(MESSAGES['downloading'])
+        return False
+
+    observe_stage('stream', time.perf_counter() - started, 'ok', **labels)
+    record_bytes('upload', fmt.get('filesize') or 0, labels['extractor'])
+
+    file_ref = get_sent_file(sent)
+    if file_ref:
+        get_file_cache().put(media_keys, file_ref[0], file_ref[1], fmt.get('filesize'))
+
+    progress.close()
+    return True
@@ -7,6 +7,7 @@ from telebot import TeleBot, types
 
 from config import MESSAGES
 from utils.helpers import log_action
+from handlers.common import help_text
 
 logger = logging.getLogger(__name__)
 
@@ -35,7 +36,7 @@ def register_command_handlers(bot: TeleBot) -> None:
         log_action(logger, message.from_user.id, "HELP", "")
         bot.send_message(
             message.chat.id,
-            MESSAGES['help'],
+            help_text(),
             parse_mode='Markdown',
             disable_web_page_preview=True
         )
@@ -0,0 +1,219 @@
+"""
+לוגיקה משותפת להנדלרים הסינכרוניים ולמצב asyncio
+
+כל מה שלא שולח הודעות נמצא כאן: קאש הקישורים, בניית הכפתורים, חילוץ
+מידע, פירוק callbacks והכנסה לתור. הפונקציות חוסמות (SQLite, yt-dlp,
+המתזמן) - ההנדלרים האסינכרוניים מריצים אותן ב-executor.
+"""
+
+import uuid
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from telebot import types
+
+from config import MESSAGES
+from services import (
+    CacheBackend,
+    create_cache_backend,
+    get_video_info,
+    get_scheduler,
+    get_api_limits,
+    PrivateContentError,
+    QueueFullError,
+    UserLimitError,
+    SchedulerClosedError,
+)
+from services.metrics import track_stage, register_cache
+from utils import format_size
+from utils.helpers import log_action
+
+logger = logging.getLogger(__name__)
+
+# מאגר לשמירת מידע על סרטונים (בזיכרון או SQLite - לפי CACHE_BACKEND)
+video_cache = create_cache_backend()
+register_cache('video', video_cache.stats)
+
+_QUALITY_EMOJIS = ['1️⃣', '2️⃣', '3️⃣', '4️⃣', '5️⃣', '6️⃣']
+
+
+def get_cache() -> CacheBackend:
+    """קבלת הקאש"""
+    return video_cache
+
+
+def help_text() -> str:
+    """טקסט /help עם מגבלת ההעלאה של השרת הנוכחי"""
+    return MESSAGES['help'].format(max_size=format_size(get_api_limits().max_upload))
+
+
+def register_url(url: str, user_id: int) -> str:
+    """
+    שמירת קישור שהתקבל בקאש (שלב url_received)
+
+    Args:
+        url: הקישור
+        user_id: מזהה המשתמש
+
+    Returns:
+        מפתח קאש מקוצר ל-callbacks
+    """
+    log_action(logger, user_id, "URL_RECEIVED", url)
+
+    with track_stage('url_received') as labels:
+        cache_key = uuid.uuid4().hex[:8]
+
+        # כולל מידע קיים אם הסרטון כבר נשלח לאחרונה
+        entry = {
+            'url': url,
+            'user_id': user_id
+        }
+        existing = video_cache.find_by_url(url)
+        if existing and existing[1].get('info'):
+            entry['info'] = existing[1]['info']
+            labels['extractor'] = entry['info'].get('extractor_key') or labels['extractor']
+
+        video_cache.set(cache_key, entry)
+
+    return cache_key
+
+
+def url_for_key(cache_key: str) -> Optional[str]:
+    """
+    קבלת URL מהקאש לפי מפתח
+
+    Args:
+        cache_key: מפתח הקאש (UUID קצר)
+
+    Returns:
+        URL מלא או None אם לא נמצא
+    """
+    entry = video_cache.get(cache_key)
+    return entry.get('url') if entry else None
+
+
+def cached_info(cache_key: str) -> Optional[Dict[str, Any]]:
+    """המידע שכבר חולץ לקישור (או None)"""
+    return (video_cache.get(cache_key) or {}).get('info')
+
+
+def fetch_info(cache_key: str, url: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    """
+    חילוץ מידע על הסרטון ושמירתו בקאש
+
+    Args:
+        cache_key: מפתח הקאש
+        url: הקישור
+
+    Returns:
+        (מידע או None, מפתח הודעת שגיאה ב-MESSAGES או None)
+    """
+    try:
+        info = get_video_info(url)
+    except PrivateContentError:
+        return None, 'error_private'
+    except Exception as e:
+        logger.error(f"שגיאה בקבלת פרטים: {e}")
+        return None, 'error_not_supported'
+
+    if info:
+        video_cache.update(cache_key, info=info)
+    return info, None
+
+
+def parse_quality(data: str) -> Tuple[str, str, bool]:
+    """
+    פירוק callback של בחירת איכות (quality:<key>:<quality>)
+
+    Args:
+        data: ה-callback data
+
+    Returns:
+        (מפתח קאש, איכות, האם אודיו בלבד)
+    """
+    # פירוס בטוח - המפתח והאיכות מופרדים בנקודתיים האחרונות
+    _, rest = data.split(':', 1)
+    cache_key, quality = rest.rsplit(':', 1)
+    return cache_key, quality, quality == 'audio'
+
+
+def submit_job(user_id: int, action: str, func: Callable[..., Any], *args: Any,
+               cost: float = 1.0) -> Tuple[int, Optional[str]]:
+    """
+    הכנסת עבודה לתור המתזמן
+
+    Args:
+        user_id: מזהה המשתמש
+        action: קידומת ללוג (DOWNLOAD / BATCH)
+        func: העבודה
+        *args: ארגומנטים לעבודה
+        cost: עלות העבודה (job_cost)
+
+    Returns:
+        (מיקום בתור - 0 = מתחילה מיד, מפתח הודעת דחייה ב-MESSAGES או None)
+    """
+    try:
+        position = get_scheduler().submit(user_id, func, *args, cost=cost)
+    except UserLimitError:
+        log_action(logger, user_id, f"{action}_REJECTED", "User limit")
+        return 0, 'error_user_limit'
+    except (QueueFullError, SchedulerClosedError):
+        log_action(logger, user_id, f"{action}_REJECTED", "Queue full")
+        return 0, 'error_queue_full'
+
+    if position:
+        log_action(logger, user_id, f"{action}_QUEUED", f"Position: {position}")
+    return position, None
+
+
+def url_markup(cache_key: str) -> types.InlineKeyboardMarkup:
+    """כפתורי פרטים / הורדה לקישור חדש"""
+    markup = types.InlineKeyboardMarkup(row_width=2)
+    markup.add(
+        types.InlineKeyboardButton("📊 פרטים", callback_data=f"info:{cache_key}"),
+        types.InlineKeyboardButton("📥 הורדה", callback_data=f"download:{cache_key}")
+    )
+    return markup
+
+
+def details_markup(cache_key: str) -> types.InlineKeyboardMarkup:
+    """כפתורי הורדה / סגירה מתחת לפרטי הסרטון"""
+    markup = types.InlineKeyboardMarkup(row_width=2)
+    markup.add(
+        types.InlineKeyboardButton("📥 הורדה", callback_data=f"download:{cache_key}"),
+        types.InlineKeyboardButton("❌ סגור", callback_data="close")
+    )
+    return markup
+
+
+def quality_markup(cache_key: str, qualities: List[Dict[str, Any]]) -> types.InlineKeyboardMarkup:
+    """
+    יצירת כפתורי בחירת איכות
+
+    Args:
+        cache_key: מפתח הקאש
+        qualities: רשימת איכויות
+
+    Returns:
+        Markup עם הכפתורים
+    """
+    markup = types.InlineKeyboardMarkup(row_width=2)
+    buttons = []
+
+    for i, q in enumerate(qualities):
+        if q.get('audio_only'):
+            label = "🎵 אודיו בלבד"
+            callback = f"quality:{cache_key}:audio"
+        else:
+            label = f"{_QUALITY_EMOJIS[i]} {q['label']}"
+            callback = f"quality:{cache_key}:{q['height']}"
+
+        buttons.append(types.InlineKeyboardButton(label, callback_data=callback))
+
+    # הוספת כפתורים בשורות של 2
+    for i in range(0, len(buttons), 2):
+        markup.add(*buttons[i:i + 2])
+
+    # כפתור ביטול
+    markup.add(types.InlineKeyboardButton("❌ ביטול", callback_data="close"))
+    return markup
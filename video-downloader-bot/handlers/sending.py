@@ -0,0 +1,287 @@
+"""
+שליחת קבצים לטלגרם - משותף להורדה בודדת ולאצוות
+
+סוג השליחה (וידאו / אודיו / קובץ) נקבע לפי הגודל ומגבלות שרת ה-API. בשרת
+מקומי נשלח נתיב (file://), בענן הבייטים מועלים. שליחה חוזרת לפי file_id
+שמור, וחילוץ ה-file_id מההודעה שנשלחה.
+"""
+
+import os
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import requests
+from telebot import TeleBot, types
+from telebot.apihelper import ApiTelegramException
+
+from config import MESSAGES, UPLOAD_TIMEOUT
+from services import (
+    get_file_cache,
+    upload_file,
+    upload_media_group,
+    MEDIA_GROUP_MAX,
+    get_api_limits,
+    local_file_ref,
+    MediaMeta,
+)
+from utils.tracing import traced, current_span
+
+logger = logging.getLogger(__name__)
+
+_SEND_METHODS = {'video': 'sendVideo', 'audio': 'sendAudio', 'document': 'sendDocument'}
+
+
+@traced('send_file')
+def send_file(bot: TeleBot, chat_id: int,
+               filepath: str, audio_only: bool,
+               on_progress: Optional[Callable[[int, int], None]] = None,
+               meta: Optional[MediaMeta] = None) -> types.Message:
+    """
+    שליחת קובץ שהורד - וידאו, אודיו או קובץ רגיל לפי הגודל והשרת
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט היעד
+        filepath: נתיב הקובץ
+        audio_only: האם אודיו בלבד
+        on_progress: callback להתקדמות ההעלאה
+        meta: משך / רזולוציה / תמונה ממוזערת (prepare_media)
+
+    Returns:
+        ההודעה שנשלחה
+    """
+    file_size = os.path.getsize(filepath)
+    limits = get_api_limits()
+    media_type = _media_type(file_size, audio_only, limits.max_video)
+    meta = meta or MediaMeta()
+    current_span().set(bytes=file_size, local=limits.local_paths, type=media_type)
+
+    # שרת מקומי - שולחים נתיב והשרת קורא את הקובץ בעצמו
+    if limits.local_paths:
+        return _send_local_file(bot, chat_id, filepath, media_type, meta)
+
+    params: Dict[str, Any] = {
+        'caption': MESSAGES['done_audio'] if audio_only else MESSAGES['done_video'],
+        **meta.upload_params(media_type),
+    }
+    if media_type == 'video':
+        params['supports_streaming'] = True
+
+    attachments = None
+    if meta.thumbnail:
+        params['thumbnail'] = 'attach://thumb'
+        attachments = {'thumb': meta.thumbnail}
+
+    return upload_file(
+        bot, _SEND_METHODS[media_type], chat_id, media_type, filepath,
+        params, on_progress, attachments
+    )
+
+
+def _media_type(file_size: int, audio_only: bool, max_video: int) -> str:
+    """
+    סוג השליחה - אודיו, וידאו, או קובץ רגיל מעל מגבלת הווידאו של השרת
+
+    Args:
+        file_size: גודל הקובץ
+        audio_only: האם אודיו בלבד
+        max_video: מגבלת הווידאו של השרת
+
+    Returns:
+        audio / video / document
+    """
+    if audio_only:
+        return 'audio'
+    return 'document' if file_size > max_video else 'video'
+
+
+@traced('send_media_group')
+def send_media_group(bot: TeleBot, chat_id: int, filepaths: List[str], audio_only: bool,
+                      on_progress: Optional[Callable[[int, int], None]] = None,
+                      metas: Optional[List[Optional[MediaMeta]]] = None) -> List[Optional[types.Message]]:
+    """
+    שליחת כמה קבצים כאלבומים (sendMediaGroup) - בקשה אחת לכל עד 10 קבצים
+
+    טלגרם לא מערבב באלבום אחד קבצים רגילים / אודיו עם וידאו, אז הקבצים
+    מחולקים לפי סוג; קבוצה של קובץ בודד נשלחת כרגיל. אם אלבום נדחה,
+    הקבצים שלו נשלחים אחד אחד.
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט היעד
+        filepaths: נתיבי הקבצים
+        audio_only: האם אודיו בלבד
+        on_progress: callback להתקדמות ההעלאה (לכל אלבום)
+        metas: MediaMeta לכל קובץ (או None)
+
+    Returns:
+        ההודעות שנשלחו, בסדר הקבצים (None לקובץ שנכשל)
+    """
+    limits = get_api_limits()
+    metas = [meta or MediaMeta() for meta in (metas or [None] * len(filepaths))]
+    current_span().set(files=len(filepaths), local=limits.local_paths)
+
+    groups: Dict[str, List[int]] = {}
+    for index, filepath in enumerate(filepaths):
+        media_type = _media_type(os.path.getsize(filepath), audio_only, limits.max_video)
+        groups.setdefault(media_type, []).append(index)
+
+    caption = MESSAGES['done_audio'] if audio_only else MESSAGES['done_video']
+    sent: List[Optional[types.Message]] = [None] * len(filepaths)
+
+    for media_type, indexes in groups.items():
+        for start in range(0, len(indexes), MEDIA_GROUP_MAX):
+            chunk = indexes[start:start + MEDIA_GROUP_MAX]
+            if len(chunk) > 1:
+                media = [(media_type, filepaths[i]) for i in chunk]
+                chunk_metas = [metas[i] for i in chunk]
+                try:
+                    if limits.local_paths:
+                        messages = _send_local_media_group(bot, chat_id, media, caption, chunk_metas)
+                    else:
+                        extras = [
+                            {**meta.upload_params(media_type), 'thumbnail': meta.thumbnail}
+                            for meta in chunk_metas
+                        ]
+                        messages = upload_media_group(bot, chat_id, media, caption, on_progress, extras)
+                    for i, message in zip(chunk, messages):
+                        sent[i] = message
+                    continue
+                except ApiTelegramException as e:
+                    logger.warning(f"[media_group] אלבום נדחה, שולח קבצים בודדים: {e}")
+
+            for i in chunk:
+                try:
+                    sent[i] = send_file(bot, chat_id, filepaths[i], audio_only, on_progress, metas[i])
+                except ApiTelegramException as e:
+                    logger.warning(f"[media_group] שליחת {os.path.basename(filepaths[i])} נכשלה: {e}")
+
+    return sent
+
+
+def _send_local_media_group(bot: TeleBot, chat_id: int, media: List[Tuple[str, str]],
+                            caption: str, metas: List[MediaMeta]) -> List[types.Message]:
+    """
+    אלבום לשרת Bot API מקומי - כל פריט נשלח כנתיב (file://)
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט היעד
+        media: רשימת (סוג, נתיב)
+        caption: כיתוב לפריט הראשון
+        metas: MediaMeta לכל פריט
+
+    Returns:
+        ההודעות שנשלחו
+    """
+    input_types = {
+        'video': types.InputMediaVideo,
+        'audio': types.InputMediaAudio,
+        'document': types.InputMediaDocument,
+    }
+    items = []
+    for index, ((media_type, filepath), meta) in enumerate(zip(media, metas)):
+        extra = _local_media_params(media_type, meta)
+        if media_type == 'video':
+            extra['supports_streaming'] = True
+        items.append(input_types[media_type](
+            local_file_ref(filepath), caption=caption if index == 0 else None, **extra
+        ))
+    return bot.send_media_group(chat_id, items, timeout=UPLOAD_TIMEOUT)
+
+
+def _send_local_file(bot: TeleBot, chat_id: int, filepath: str, media_type: str,
+                     meta: MediaMeta) -> types.Message:
+    """
+    שליחה לשרת Bot API מקומי לפי נתיב (file://) - בלי להעלות את הבייטים מ-Python
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט היעד
+        filepath: נתיב הקובץ
+        media_type: audio / video / document
+        meta: משך / רזולוציה / תמונה ממוזערת
+
+    Returns:
+        ההודעה שנשלחה
+    """
+    ref = local_file_ref(filepath)
+    extra = _local_media_params(media_type, meta)
+
+    if media_type == 'audio':
+        return bot.send_audio(chat_id, ref, caption=MESSAGES['done_audio'], timeout=UPLOAD_TIMEOUT, **extra)
+
+    if media_type == 'document':
+        return bot.send_document(chat_id, ref, caption=MESSAGES['done_video'], timeout=UPLOAD_TIMEOUT, **extra)
+
+    return bot.send_video(
+        chat_id, ref, caption=MESSAGES['done_video'],
+        supports_streaming=True, timeout=UPLOAD_TIMEOUT, **extra
+    )
+
+
+def _local_media_params(media_type: str, meta: MediaMeta) -> Dict[str, Any]:
+    """פרמטרי המטא-דאטה ל-telebot - התמונה הממוזערת עולה כקובץ (לא נתיב)"""
+    params = meta.upload_params(media_type)
+    if meta.thumbnail:
+        params['thumbnail'] = types.InputFile(meta.thumbnail)
+    return params
+
+
+def send_cached_file(bot: TeleBot, chat_id: int,
+                      cached: Dict[str, Any], audio_only: bool) -> bool:
+    """
+    שליחה חוזרת של קובץ לפי file_id שמור
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט היעד
+        cached: רשומה מקאש ה-file_id
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        True אם נשלח; False אם ה-file_id לא תקף (ונמחק מהקאש) או שהשליחה
+        נכשלה ברשת - בשני המקרים ממשיכים להורדה רגילה
+    """
+    file_id = cached['file_id']
+    caption = MESSAGES['done_audio'] if audio_only else MESSAGES['done_video']
+
+    try:
+        if cached['media_type'] == 'audio':
+            bot.send_audio(chat_id, file_id, caption=caption)
+        elif cached['media_type'] == 'document':
+            bot.send_document(chat_id, file_id, caption=caption)
+        else:
+            bot.send_video(chat_id, file_id, caption=caption, supports_streaming=True)
+        return True
+
+    except ApiTelegramException as e:
+        logger.warning(f"file_id לא תקף, מוריד מחדש: {e}")
+        get_file_cache().invalidate(file_id)
+        return False
+
+    except requests.RequestException as e:
+        # ה-file_id כנראה תקין - רק השליחה נכשלה; מטפלים כמו החטאה בקאש
+        logger.warning(f"שליחה מהקאש נכשלה ברשת, מוריד מחדש: {e}")
+        return False
+
+
+def get_sent_file(message: Optional[types.Message]) -> Optional[Tuple[str, str]]:
+    """
+    חילוץ file_id וסוג המדיה מהודעה שנשלחה
+
+    Args:
+        message: ההודעה שטלגרם החזיר
+
+    Returns:
+        (file_id, media_type) או None
+    """
+    if message is None:
+        return None
+
+    for media_type in ('video', 'audio', 'document'):
+        media = getattr(message, media_type, None)
+        if media is not None:
+            return media.file_id, media_type
+
+    return None
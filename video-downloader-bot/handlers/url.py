@@ -1,26 +1,16 @@
 """
 הנדלר לזיהוי וטיפול בקישורים
 """
-import uuid
 import logging
-from typing import Dict, Any
 
 from telebot import TeleBot, types
 
 from config import MESSAGES
-from utils import extract_url
-from utils.helpers import log_action
+from utils import extract_url, extract_urls
+from handlers.common import register_url, url_markup
 
 logger = logging.getLogger(__name__)
 
-# מאגר זמני לשמירת מידע על סרטונים
-video_cache: Dict[str, Dict[str, Any]] = {}
-
-
-def get_cache() -> Dict[str, Dict[str, Any]]:
-    """קבלת הקאש"""
-    return video_cache
-
 
 def register_url_handlers(bot: TeleBot) -> None:
     """
@@ -33,30 +23,17 @@ def register_url_handlers(bot: TeleBot) -> None:
     @bot.message_handler(func=lambda m: m.text and extract_url(m.text) is not None)
     def handle_url(message: types.Message) -> None:
         """טיפול בקישור שנשלח"""
-        url = extract_url(message.text)
-        user_id = message.from_user.id
-
-        log_action(logger, user_id, "URL_RECEIVED", url)
-
-        # יצירת מפתח קאש מקוצר
-        cache_key = uuid.uuid4().hex[:8]
-
-        # שמירת URL מלא בקאש
-        video_cache[cache_key] = {
-            'url': url,
-            'user_id': user_id
-        }
-
-        # יצירת כפתורים
-        markup = types.InlineKeyboardMarkup(row_width=2)
-        markup.add(
-            types.InlineKeyboardButton("📊 פרטים", callback_data=f"info:{cache_key}"),
-            types.InlineKeyboardButton("📥 הורדה", callback_data=f"download:{cache_key}")
-        )
-
+        urls = extract_urls(message.text)
+        if len(urls) > 1:
+            # כמה קישורים בהודעה אחת - מצב אצווה
+            from handlers.batch import handle_batch_message
+            handle_batch_message(bot, message, urls)
+            return
+
+        cache_key = register_url(urls[0], message.from_user.id)
         bot.send_message(
             message.chat.id,
             MESSAGES['url_detected'],
-            reply_markup=markup,
+            reply_markup=url_markup(cache_key),
             reply_to_message_id=message.message_id
         )
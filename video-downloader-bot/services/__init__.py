@@ -2,5 +2,23 @@
 שירותי הורדה וקבלת מידע
 """
 
-from .video_info import get_video_info, get_available_qualities, PrivateContentError
-from .downloader import download_video
+from .video_info import (
+    get_video_info, get_available_qualities, slim_info, info_options, is_playlist, playlist_urls,
+    PrivateContentError
+)
+from .downloader import download_video, download_options, create_job_dir
+from .scheduler import get_scheduler, DownloadScheduler, job_cost, QueueFullError, UserLimitError, SchedulerClosedError
+from .file_cache import get_file_cache, build_media_keys
+from .cache_backend import CacheBackend, create_cache_backend
+from .ydl_pool import get_ydl_pool
+from .ffmpeg_pool import get_ffmpeg_pool
+from .progress import ProgressReporter
+from .bot_api import configure_bot_api, get_api_limits, local_file_ref, is_local_api
+from .telegram_api import get_api_client, install_api_client
+from .uploader import upload_file, upload_media_group, MEDIA_GROUP_MAX
+from .media_prep import prepare_media, MediaMeta
+from .size_fit import plan_download, fit_file, DownloadPlan
+from .streaming import pick_stream_format, stream_to_telegram, StreamError
+from .metrics import render_metrics, start_metrics_server
+from .disk_budget import get_disk_budget, get_janitor, disk_estimate, DiskBudgetError
+from .scratch import get_scratch
@@ -0,0 +1,160 @@
+"""
+צינור זורם לאצוות - חילוץ → הורדה → העלאה, עם מקביליות בכל שלב
+
+כל שלב הוא מאגר threads קטן, והשלבים מחוברים בתורים חסומים: פריט עובר
+לשלב הבא ברגע שהוא מוכן (בלי לחכות לכל האצווה), והתורים החסומים מגבילים
+כמה קבצים שהורדו ממתינים בדיסק להעלאה.
+"""
+
+import contextvars
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
+
+from config import BATCH_QUEUE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# סימן סוף לתור של שלב - worker שמקבל אותו יוצא
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    שלב בצינור - func מקבל פריט ומחזיר 0..n פריטים לשלב הבא
+
+    עם group > 1 הפונקציה מקבלת רשימה של עד group פריטים: ה-worker מוציא
+    פריטים מהתור לחוצץ משלו (כך שהתור החסום ממשיך להתפנות והשלב הקודם
+    לא נעצר), ושולח את הקבוצה כשהיא מלאה או כשהזרם נגמר. group_wait הוא
+    רק תקרת בטיחות - כמה שניות הפריט הראשון ממתין לכל היותר (0 - בלי תקרה).
+    """
+    name: str
+    func: Callable[[Any], Optional[Iterable[Any]]]
+    workers: int = 1
+    group: int = 1
+    group_wait: float = 0.0
+
+
+class StreamingPipeline:
+    """
+    הרצת פריטים דרך שלבים עם תורים חסומים ביניהם
+
+    שגיאה בפריט לא עוצרת את הצינור - היא מועברת ל-on_error והפריט נזרק.
+    """
+
+    def __init__(self, stages: Sequence[Stage], queue_size: int = BATCH_QUEUE_SIZE,
+                 on_error: Optional[Callable[[str, Any, Exception], None]] = None):
+        self.stages = list(stages)
+        self.on_error = on_error
+        self._queues: List[queue.Queue] = [queue.Queue(maxsize=max(1, queue_size)) for _ in self.stages]
+        self._alive = [max(1, stage.workers) for stage in self.stages]
+        self._lock = threading.Lock()
+        # רק worker אחד בכל שלב אוסף קבוצה בכל רגע - כדי שהקבוצות יתמלאו
+        self._collect_locks = [threading.Lock() for _ in self.stages]
+
+    def run(self, items: Iterable[Any]) -> None:
+        """
+        הרצת הפריטים עד סוף כל השלבים (חוסם)
+
+        Args:
+            items: הפריטים לשלב הראשון
+        """
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for i in range(self._alive[index]):
+                # כל worker רץ בעותק של ההקשר - spans שלו מקוננים תחת ה-span של האצווה
+                context = contextvars.copy_context()
+                thread = threading.Thread(
+                    target=context.run, args=(self._worker, index),
+                    name=f"batch-{stage.name}-{i}", daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        for item in items:
+            self._queues[0].put(item)
+        for _ in range(self._alive[0]):
+            self._queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+
+    def _worker(self, index: int) -> None:
+        stage = self.stages[index]
+        inbox = self._queues[index]
+        outbox = self._queues[index + 1] if index + 1 < len(self.stages) else None
+
+        try:
+            while True:
+                if stage.group > 1:
+                    item, done = self._collect(index)
+                    if not item:
+                        break
+                else:
+                    item = inbox.get()
+                    done = item is _DONE
+                    if done:
+                        break
+                try:
+                    outputs = stage.func(item) or ()
+                    for output in outputs:
+                        if outbox is not None:
+                            outbox.put(output)
+                except Exception as e:
+                    logger.warning(f"[batch] שגיאה בשלב {stage.name}: {e}")
+                    self._report_error(stage.name, item, e)
+                if done:
+                    break
+        finally:
+            # ה-worker האחרון של השלב סוגר את השלב הבא - גם אם ה-worker נפל,
+            # אחרת run() ממתין לנצח ותופס מקום במתזמן
+            with self._lock:
+                self._alive[index] -= 1
+                last = self._alive[index] == 0
+            if last and outbox is not None:
+                for _ in range(self._alive[index + 1]):
+                    outbox.put(_DONE)
+
+    def _report_error(self, stage: str, item: Any, error: Exception) -> None:
+        """העברת שגיאה ל-on_error - שגיאה בתוך ה-callback רק נרשמת בלוג"""
+        if not self.on_error:
+            return
+        try:
+            self.on_error(stage, item, error)
+        except Exception as e:
+            logger.error(f"[batch] on_error נכשל בשלב {stage}: {e}", exc_info=True)
+
+    def _collect(self, index: int) -> Tuple[List[Any], bool]:
+        """
+        איסוף קבוצה לשלב עם group > 1 - עד שהיא מלאה, עד סוף הזרם, או עד
+        תקרת group_wait
+
+        Returns:
+            (הפריטים, האם הגיע סימן הסוף)
+        """
+        stage = self.stages[index]
+        inbox = self._queues[index]
+
+        with self._collect_locks[index]:
+            item = inbox.get()
+            if item is _DONE:
+                return [], True
+
+            items = [item]
+            deadline = time.monotonic() + stage.group_wait if stage.group_wait > 0 else None
+            while len(items) < stage.group:
+                try:
+                    if deadline is None:
+                        item = inbox.get()
+                    else:
+                        item = inbox.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is _DONE:
+                    return items, True
+                items.append(item)
+            return items, False
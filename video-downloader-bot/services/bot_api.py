@@ -0,0 +1,116 @@
+"""
+הגדרת שרת ה-Bot API - ענן טלגרם או שרת telegram-bot-api מקומי
+
+בשרת מקומי (במצב --local) מגבלת ההעלאה היא 2000MB במקום 50MB, ואפשר לשלוח
+קובץ לפי נתיב (file://...) - השרת קורא אותו ישירות מהדיסק, בלי להעביר את
+הבייטים דרך Python ב-HTTP.
+"""
+
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+
+from telebot import apihelper, asyncio_helper
+
+from config import (
+    MAX_FILE_SIZE,
+    DOWNLOADS_DIR,
+    LOCAL_BOT_API_URL,
+    LOCAL_BOT_API_DOWNLOADS_DIR,
+)
+
+logger = logging.getLogger(__name__)
+
+CLOUD_API_URL = "https://api.telegram.org/bot{0}/{1}"
+
+MB = 1024 * 1024
+
+
+@dataclass(frozen=True)
+class ApiLimits:
+    """יכולות ומגבלות של שרת ה-Bot API"""
+    max_upload: int     # גודל קובץ מקסימלי להעלאה
+    max_video: int      # מעל זה - sendDocument במקום sendVideo
+    local_paths: bool   # האם השרת מקבל נתיב מקומי (file://) במקום העלאה
+
+
+# https://core.telegram.org/bots/api#using-a-local-bot-api-server
+CLOUD_LIMITS = ApiLimits(max_upload=50 * MB, max_video=50 * MB, local_paths=False)
+LOCAL_LIMITS = ApiLimits(max_upload=2000 * MB, max_video=2000 * MB, local_paths=True)
+
+
+def is_local_api() -> bool:
+    """האם מוגדר שרת Bot API מקומי"""
+    return bool(LOCAL_BOT_API_URL)
+
+
+def configure_bot_api() -> None:
+    """
+    הפניית telebot (סינכרוני ואסינכרוני) לשרת המקומי, אם הוגדר
+
+    יש לקרוא לפני יצירת הבוט. הבוט צריך לבצע logOut מהענן פעם אחת לפני
+    המעבר לשרת מקומי (ראו README).
+    """
+    if not is_local_api():
+        return
+
+    base = LOCAL_BOT_API_URL.rstrip('/')
+    apihelper.API_URL = base + "/bot{0}/{1}"
+    apihelper.FILE_URL = base + "/file/bot{0}/{1}"
+    asyncio_helper.API_URL = base + "/bot{0}/{1}"
+    asyncio_helper.FILE_URL = base + "/file/bot{0}/{1}"
+
+    logger.info(f"[bot_api] שרת Bot API מקומי: {base}")
+
+
+def api_url(token: str, method: str) -> str:
+    """
+    כתובת מתודה בשרת ה-Bot API הפעיל
+
+    Args:
+        token: טוקן הבוט
+        method: שם המתודה
+
+    Returns:
+        הכתובת המלאה
+    """
+    return (apihelper.API_URL or CLOUD_API_URL).format(token, method)
+
+
+def get_api_limits() -> ApiLimits:
+    """
+    המגבלות בפועל - של השרת, ולא יותר מ-MAX_FILE_SIZE שהוגדר
+
+    Returns:
+        ApiLimits
+    """
+    server = LOCAL_LIMITS if is_local_api() else CLOUD_LIMITS
+    return ApiLimits(
+        max_upload=min(server.max_upload, MAX_FILE_SIZE),
+        max_video=min(server.max_video, MAX_FILE_SIZE),
+        local_paths=server.local_paths,
+    )
+
+
+def local_file_ref(filepath: str) -> str:
+    """
+    הפניה לקובץ מקומי בפורמט שהשרת המקומי מקבל (file:///...)
+
+    כשהשרת רץ בקונטיינר אחר, LOCAL_BOT_API_DOWNLOADS_DIR הוא הנתיב של
+    תיקיית ההורדות כפי שהשרת רואה אותה.
+
+    Args:
+        filepath: נתיב הקובץ אצל הבוט
+
+    Returns:
+        URI של הקובץ מנקודת המבט של השרת
+    """
+    path = Path(filepath).resolve()
+
+    if LOCAL_BOT_API_DOWNLOADS_DIR:
+        try:
+            path = Path(LOCAL_BOT_API_DOWNLOADS_DIR) / path.relative_to(DOWNLOADS_DIR.resolve())
+        except ValueError:
+            logger.warning(f"[bot_api] הקובץ מחוץ לתיקיית ההורדות: {path}")
+
+    return path.as_uri()
@@ -0,0 +1,340 @@
+"""
+מימושי אחסון לקאש הכפתורים - בזיכרון או SQLite משותף בין תהליכים
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Optional, Set, Tuple
+
+from config import (
+    CACHE_BACKEND,
+    CACHE_DB_PATH,
+    CACHE_EXPIRY_INTERVAL,
+    VIDEO_CACHE_MAX_ENTRIES,
+    VIDEO_CACHE_MAX_BYTES,
+    VIDEO_CACHE_TTL,
+)
+from utils import canonicalize_url, TTLCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(ABC):
+    """
+    ממשק אחסון לרשומות קאש (מילון עם 'url' ושדות נוספים)
+
+    כל מימוש תומך בחיפוש לפי מפתח ולפי URL קנוני, ובמחיקת רשומות
+    שפג תוקפן ברקע.
+    """
+
+    def __init__(self):
+        self._expiry_thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """קבלת רשומה לפי מפתח, או None אם לא קיימת / פג תוקף"""
+
+    @abstractmethod
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        """שמירת רשומה (מחליף רשומה קיימת)"""
+
+    @abstractmethod
+    def update(self, key: str, **fields: Any) -> bool:
+        """עדכון שדות ברשומה קיימת. מחזיר True אם הרשומה קיימת"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """מחיקת רשומה"""
+
+    @abstractmethod
+    def find_by_url(self, url: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """חיפוש הרשומה העדכנית ביותר לאותו URL קנוני - (מפתח, רשומה) או None"""
+
+    @abstractmethod
+    def purge_expired(self) -> int:
+        """מחיקת רשומות שפג תוקפן. מחזיר את מספר הרשומות שנמחקו"""
+
+    @abstractmethod
+    def stats(self) -> Dict[str, Any]:
+        """סטטיסטיקות שימוש"""
+
+    def start_expiry(self, interval: float = CACHE_EXPIRY_INTERVAL) -> None:
+        """
+        הפעלת thread רקע שמוחק רשומות שפג תוקפן
+
+        Args:
+            interval: זמן בין סריקות בשניות
+        """
+        if self._expiry_thread is not None:
+            return
+
+        def _loop() -> None:
+            while not self._stop.wait(interval):
+                try:
+                    removed = self.purge_expired()
+                    if removed:
+                        logger.info(f"[cache] נמחקו {removed} רשומות שפג תוקפן")
+                except Exception as e:
+                    logger.error(f"[cache] שגיאה בניקוי קאש: {e}")
+
+        self._expiry_thread = threading.Thread(target=_loop, name="cache-expiry", daemon=True)
+        self._expiry_thread.start()
+
+    def close(self) -> None:
+        """עצירת thread הרקע"""
+        self._stop.set()
+
+
+class MemoryCacheBackend(CacheBackend):
+    """קאש בזיכרון התהליך (TTL + LRU) עם אינדקס לפי URL קנוני"""
+
+    def __init__(self, max_entries: int = VIDEO_CACHE_MAX_ENTRIES,
+                 max_bytes: int = VIDEO_CACHE_MAX_BYTES,
+                 ttl: float = VIDEO_CACHE_TTL):
+        super().__init__()
+        self._cache = TTLCache(max_entries=max_entries, max_bytes=max_bytes, ttl=ttl)
+        self._by_url: Dict[str, Set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        return self._cache.get(key)
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        canonical = canonicalize_url(value.get('url', ''))
+        with self._lock:
+            self._cache.set(key, value)
+            self._by_url.setdefault(canonical, set()).add(key)
+
+    def update(self, key: str, **fields: Any) -> bool:
+        return self._cache.update(key, **fields)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def find_by_url(self, url: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        canonical = canonicalize_url(url)
+        with self._lock:
+            keys = self._by_url.get(canonical, set())
+
+            # ניקוי מפתחות שכבר פונו מהקאש
+            alive = {k for k in keys if k in self._cache}
+            if alive:
+                self._by_url[canonical] = alive
+            else:
+                self._by_url.pop(canonical, None)
+
+        for key in alive:
+            value = self._cache.get(key)
+            if value is not None:
+                return key, value
+        return None
+
+    def purge_expired(self) -> int:
+        removed = self._cache.purge_expired()
+        with self._lock:
+            for canonical in list(self._by_url):
+                alive = {k for k in self._by_url[canonical] if k in self._cache}
+                if alive:
+                    self._by_url[canonical] = alive
+                else:
+                    del self._by_url[canonical]
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {'backend': 'memory', **self._cache.stats()}
+
+
+class SQLiteCacheBackend(CacheBackend):
+    """
+    קאש בקובץ SQLite (מצב WAL) - שורד הפעלה מחדש ומשותף לכמה תהליכים
+
+    כל thread מקבל חיבור משלו; WAL מאפשר קריאות במקביל לכתיבה.
+    """
+
+    def __init__(self, db_path: str = str(CACHE_DB_PATH),
+                 max_entries: int = VIDEO_CACHE_MAX_ENTRIES,
+                 max_bytes: int = VIDEO_CACHE_MAX_BYTES,
+                 ttl: float = VIDEO_CACHE_TTL):
+        super().__init__()
+        self.db_path = str(db_path)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS video_cache (
+                key TEXT PRIMARY KEY,
+                canonical_url TEXT NOT NULL,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_video_cache_url ON video_cache (canonical_url, accessed_at);
+            CREATE INDEX IF NOT EXISTS idx_video_cache_expires ON video_cache (expires_at);
+            CREATE INDEX IF NOT EXISTS idx_video_cache_accessed ON video_cache (accessed_at);
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        """חיבור SQLite של ה-thread הנוכחי"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        now = time.time()
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT data FROM video_cache WHERE key = ? AND expires_at > ?",
+            (key, now)
+        ).fetchone()
+
+        if row is None:
+            self.misses += 1
+            return None
+
+        conn.execute("UPDATE video_cache SET accessed_at = ? WHERE key = ?", (now, key))
+        self.hits += 1
+        return json.loads(row[0])
+
+    def set(self, key: str, value: Dict[str, Any]) -> None:
+        self._write(key, value, time.time() + self.ttl)
+
+    def update(self, key: str, **fields: Any) -> bool:
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT data, expires_at FROM video_cache WHERE key = ? AND expires_at > ?",
+                (key, time.time())
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return False
+
+            value = json.loads(row[0])
+            value.update(fields)
+            written = self._write(key, value, row[1], in_transaction=True)
+            conn.execute("COMMIT")
+            return written
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, key: str) -> None:
+        self._conn().execute("DELETE FROM video_cache WHERE key = ?", (key,))
+
+    def find_by_url(self, url: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        row = self._conn().execute(
+            "SELECT key, data FROM video_cache WHERE canonical_url = ? AND expires_at > ? "
+            "ORDER BY accessed_at DESC LIMIT 1",
+            (canonicalize_url(url), time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1])
+
+    def purge_expired(self) -> int:
+        conn = self._conn()
+        removed = conn.execute(
+            "DELETE FROM video_cache WHERE expires_at <= ?", (time.time(),)
+        ).rowcount
+        self._evict(conn)
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        entries, total = self._conn().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM video_cache"
+        ).fetchone()
+        return {
+            'backend': 'sqlite',
+            'entries': entries,
+            'bytes': total,
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+    def _write(self, key: str, value: Dict[str, Any], expires_at: float,
+               in_transaction: bool = False) -> bool:
+        """
+        כתיבת רשומה ופינוי LRU אם עברנו את המגבלות
+
+        Returns:
+            True אם נכתבה; False אם גדולה מכל התקציב (והרשומה הקודמת נמחקה,
+            כמו בקאש בזיכרון - לא נשאר ערך ישן)
+        """
+        data = json.dumps(value, ensure_ascii=False, default=str)
+        size = len(data.encode('utf-8'))
+        conn = self._conn()
+        if size > self.max_bytes:
+            self.evictions += 1
+            conn.execute("DELETE FROM video_cache WHERE key = ?", (key,))
+            return False
+
+        conn.execute(
+            "INSERT OR REPLACE INTO video_cache "
+            "(key, canonical_url, data, size, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?)",
+            (key, canonicalize_url(value.get('url', '')), data, size, expires_at, time.time())
+        )
+        if not in_transaction:
+            self._evict(conn)
+        return True
+
+    def _evict(self, conn: sqlite3.Connection) -> None:
+        """פינוי הרשומות הכי פחות בשימוש עד שחוזרים למגבלות"""
+        entries, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM video_cache"
+        ).fetchone()
+
+        while entries > self.max_entries or total > self.max_bytes:
+            # מפנים בקבוצות כדי לא לסרוק את הטבלה על כל רשומה
+            batch = max(entries - self.max_entries, 1, entries // 20)
+            removed = conn.execute(
+                "DELETE FROM video_cache WHERE key IN "
+                "(SELECT key FROM video_cache ORDER BY accessed_at LIMIT ?)",
+                (batch,)
+            ).rowcount
+            if not removed:
+                break
+            self.evictions += removed
+            entries, total = conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM video_cache"
+            ).fetchone()
+
+
+def create_cache_backend(backend: str = CACHE_BACKEND) -> CacheBackend:
+    """
+    יצירת מימוש הקאש לפי ההגדרות
+
+    Args:
+        backend: 'memory' או 'sqlite'
+
+    Returns:
+        מימוש קאש עם ניקוי רקע פעיל
+    """
+    if backend == 'sqlite':
+        cache = SQLiteCacheBackend()
+        logger.info(f"[cache] משתמש בקאש SQLite: {CACHE_DB_PATH}")
+    else:
+        if backend != 'memory':
+            logger.warning(f"[cache] סוג קאש לא מוכר '{backend}', משתמש בזיכרון")
+        cache = MemoryCacheBackend()
+
+    cache.start_expiry()
+    return cache
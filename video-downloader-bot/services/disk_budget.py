@@ -0,0 +1,342 @@
+"""
+תקציב דיסק להורדות וניקוי קבצים יתומים
+
+כל עבודה שומרת מראש את הנפח שהיא צפויה לתפוס (כולל קבצי ביניים של מיזוג
+וקידוד). כשהתקציב מלא העבודה ממתינה בתור FIFO, ואם אין מקום גם אחרי
+DISK_WAIT_TIMEOUT - נדחית. כך כמה הורדות גדולות במקביל לא ממלאות את הדיסק.
+
+ה-janitor סורק את DOWNLOADS_DIR ברקע ומוחק קבצים חלקיים של yt-dlp
+(.part / .ytdl / מקטעים / פורמטים שלא מוזגו) וקבצים יתומים שנשארו אחרי
+קריסה - לפי גיל בלבד, כך שקבצים של עבודות פעילות לא נמחקים.
+"""
+
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Deque, Dict, Iterable, Optional
+
+from config import (
+    DOWNLOADS_DIR,
+    DISK_BUDGET,
+    DISK_MIN_FREE,
+    DISK_WAIT_TIMEOUT,
+    DISK_DEFAULT_RESERVATION,
+    JANITOR_INTERVAL,
+    JANITOR_PARTIAL_AGE,
+    JANITOR_ORPHAN_AGE,
+    RAM_SCRATCH_DIR,
+)
+from utils.metrics import get_registry
+from .size_fit import DownloadPlan
+
+logger = logging.getLogger(__name__)
+
+# קבצי ביניים של yt-dlp / ffmpeg: name.mp4.part, name.mp4.part-Frag3, name.mp4.ytdl,
+# name.f137.mp4 (פורמט לפני מיזוג), name.temp.mp4, לוגים של קידוד בשני מעברים
+_PARTIAL_FILE = re.compile(
+    r'(\.part(-Frag\d+(\.part)?)?|\.ytdl|\.f(\d+|(hls|dash|http)-[\w.=-]+)\.\w+|\.temp\.\w+'
+    r'|_2pass.*\.log(\.mbtree)?)$'
+)
+
+_registry = get_registry()
+_RESERVED = _registry.gauge('bot_disk_reserved_bytes', "נפח שמור לעבודות פעילות", ('tier',))
+_CAPACITY = _registry.gauge('bot_disk_budget_bytes', "תקציב הנפח להורדות", ('tier',))
+_WAITING = _registry.gauge('bot_disk_waiting_jobs', "עבודות שממתינות למקום", ('tier',))
+_REJECTED = _registry.counter('bot_disk_rejections_total', "עבודות שנדחו בגלל מקום", ('tier',))
+_RECLAIMED = _registry.counter(
+    'bot_janitor_reclaimed_bytes_total', "בייטים שה-janitor פינה", ('kind',)
+)
+
+
+class DiskBudgetError(Exception):
+    """אין מספיק מקום בדיסק לעבודה"""
+    pass
+
+
+class Reservation:
+    """נפח שמור לעבודה אחת - משוחרר ב-release() או ביציאה מ-with"""
+
+    def __init__(self, budget: 'DiskBudget', nbytes: int):
+        self.budget = budget
+        self.nbytes = nbytes
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released:
+            self._released = True
+            self.budget._release(self.nbytes)
+
+    def __enter__(self) -> 'Reservation':
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+class DiskBudget:
+    """
+    הקצאת נפח דיסק לעבודות הורדה
+
+    capacity הוא DISK_BUDGET, או (אם 0) המקום הפנוי בהפעלה פחות DISK_MIN_FREE.
+    בנוסף נבדק המקום הפנוי בפועל, כדי לא להקצות כשמשהו אחר מילא את הדיסק.
+    אותה מחלקה משמשת גם לתקרת הזיכרון של תיקיית ה-RAM (tier='ram').
+    """
+
+    def __init__(self, directory: Path = DOWNLOADS_DIR, capacity: int = DISK_BUDGET,
+                 min_free: int = DISK_MIN_FREE, tier: str = 'disk'):
+        self.directory = Path(directory)
+        self.tier = tier
+        self.min_free = min_free
+        self.capacity = capacity or max(0, shutil.disk_usage(self.directory).free - min_free)
+        self._reserved = 0
+        self._waiters: Deque[object] = deque()
+        self._cond = threading.Condition()
+        _CAPACITY.set(self.capacity, tier=tier)
+
+    def reserve(self, nbytes: int, timeout: float = DISK_WAIT_TIMEOUT,
+                on_wait: Optional[Callable[[], None]] = None) -> Reservation:
+        """
+        שמירת נפח לעבודה, עם המתנה בתור אם התקציב מלא
+
+        Args:
+            nbytes: הנפח הנדרש
+            timeout: זמן המתנה מקסימלי בשניות
+            on_wait: נקרא פעם אחת אם העבודה צריכה להמתין (לעדכון הודעת סטטוס)
+
+        Returns:
+            Reservation שיש לשחרר בסיום
+
+        Raises:
+            DiskBudgetError: אם העבודה גדולה מכל התקציב או שעבר זמן ההמתנה
+        """
+        if nbytes > self.capacity:
+            _REJECTED.inc(tier=self.tier)
+            raise DiskBudgetError(f"נדרשים {nbytes} בייטים, התקציב {self.capacity}")
+
+        deadline = time.monotonic() + timeout
+        ticket = object()
+        notified = False
+
+        with self._cond:
+            self._waiters.append(ticket)
+            try:
+                while not (self._waiters[0] is ticket and self._fits(nbytes)):
+                    if on_wait is not None and not notified:
+                        notified = True
+                        _WAITING.set(len(self._waiters), tier=self.tier)
+                        self._cond.release()
+                        try:
+                            on_wait()
+                        finally:
+                            self._cond.acquire()
+                        continue
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        _REJECTED.inc(tier=self.tier)
+                        raise DiskBudgetError(f"אין מקום ל-{nbytes} בייטים אחרי {timeout:.0f} שניות")
+                    # בדיקה חוזרת מדי פעם - מקום יכול להתפנות גם מחוץ לתקציב (janitor)
+                    self._cond.wait(min(remaining, 5))
+
+                self._reserved += nbytes
+                _RESERVED.set(self._reserved, tier=self.tier)
+            finally:
+                self._waiters.remove(ticket)
+                _WAITING.set(len(self._waiters), tier=self.tier)
+                self._cond.notify_all()
+
+        return Reservation(self, nbytes)
+
+    def try_reserve(self, nbytes: int) -> Optional[Reservation]:
+        """
+        שמירת נפח רק אם יש מקום מיד (בלי המתנה ובלי לעקוף ממתינים)
+
+        Args:
+            nbytes: הנפח הנדרש
+
+        Returns:
+            Reservation, או None אם אין מקום כרגע
+        """
+        with self._cond:
+            if self._waiters or not self._fits(nbytes):
+                return None
+            self._reserved += nbytes
+            _RESERVED.set(self._reserved, tier=self.tier)
+        return Reservation(self, nbytes)
+
+    def notify(self) -> None:
+        """העירת ממתינים לבדיקה חוזרת (לדוגמה אחרי ניקוי)"""
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, int]:
+        """
+        מצב התקציב
+
+        Returns:
+            מילון עם תקציב, נפח שמור, מקום פנוי ומספר ממתינים
+        """
+        with self._cond:
+            return {
+                'capacity': self.capacity,
+                'reserved': self._reserved,
+                'free': self._free(),
+                'waiting': len(self._waiters),
+            }
+
+    def _fits(self, nbytes: int) -> bool:
+        return self._reserved + nbytes <= self.capacity and self._free() >= self.min_free
+
+    def _free(self) -> int:
+        try:
+            return shutil.disk_usage(self.directory).free
+        except OSError:
+            return 0
+
+    def _release(self, nbytes: int) -> None:
+        with self._cond:
+            self._reserved = max(0, self._reserved - nbytes)
+            _RESERVED.set(self._reserved, tier=self.tier)
+            self._cond.notify_all()
+
+
+def disk_estimate(plan: DownloadPlan, limit: int, audio_only: bool = False) -> int:
+    """
+    הערכת שיא הנפח בדיסק של עבודה
+
+    מיזוג וידאו+אודיו והמרה ל-mp3 מחזיקים את המקור ואת התוצאה בו-זמנית
+    (פי 2), וקידוד מחדש מוסיף קובץ בגודל המגבלה.
+
+    Args:
+        plan: תוכנית ההורדה
+        limit: מגבלת ההעלאה
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        נפח בבייטים
+    """
+    if not plan.estimated_size:
+        return DISK_DEFAULT_RESERVATION
+
+    merges = audio_only or plan.format_selector is None or '+' in plan.format_selector
+    peak = plan.estimated_size * (2 if merges else 1)
+    if plan.transcode:
+        peak += limit
+    return int(peak)
+
+
+class DiskJanitor:
+    """ניקוי תקופתי של קבצים חלקיים ויתומים בתיקיות ההורדות (דיסק ו-RAM)"""
+
+    def __init__(self, directories: Iterable[Path] = (DOWNLOADS_DIR,),
+                 partial_age: float = JANITOR_PARTIAL_AGE, orphan_age: float = JANITOR_ORPHAN_AGE):
+        self.directories = [Path(d) for d in directories]
+        self.partial_age = partial_age
+        self.orphan_age = orphan_age
+        self.reclaimed = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sweep(self) -> Dict[str, int]:
+        """
+        סריקה אחת - מחיקת קבצים חלקיים ישנים מ-partial_age ושאר הקבצים ישנים מ-orphan_age
+
+        הגיל נמדד לפי זמן השינוי האחרון, כך שקובץ שעדיין נכתב לא נמחק.
+
+        Returns:
+            מילון עם מספר קבצים ובייטים שנמחקו
+        """
+        result = {'files': 0, 'bytes': 0}
+        for directory in self.directories:
+            self._sweep_dir(directory, result)
+
+        if result['files']:
+            self.reclaimed += result['bytes']
+            logger.info(f"[janitor] נמחקו {result['files']} קבצים, פונו {result['bytes']} בייטים")
+            get_disk_budget().notify()
+        return result
+
+    def _sweep_dir(self, directory: Path, result: Dict[str, int]) -> None:
+        now = time.time()
+        for root, dirs, files in os.walk(directory, topdown=False):
+            for name in files:
+                path = os.path.join(root, name)
+                kind = 'partial' if _PARTIAL_FILE.search(name) else 'orphan'
+                max_age = self.partial_age if kind == 'partial' else self.orphan_age
+                try:
+                    stat = os.stat(path)
+                    if now - stat.st_mtime < max_age:
+                        continue
+                    os.remove(path)
+                except FileNotFoundError:
+                    continue  # נמחק בינתיים ע"י העבודה עצמה
+                except OSError as e:
+                    logger.warning(f"[janitor] לא ניתן למחוק {path}: {e}")
+                    continue
+
+                result['files'] += 1
+                result['bytes'] += stat.st_size
+                _RECLAIMED.inc(stat.st_size, kind=kind)
+
+            # תיקיות ריקות וישנות (לא את התיקייה הראשית עצמה)
+            if Path(root) != directory:
+                try:
+                    if not os.listdir(root) and now - os.stat(root).st_mtime >= self.partial_age:
+                        os.rmdir(root)
+                except OSError:
+                    pass
+
+    def start(self, interval: float = JANITOR_INTERVAL) -> None:
+        """
+        הפעלת thread רקע - סריקה מיידית (שאריות מהפעלה קודמת) ואז כל interval שניות
+
+        Args:
+            interval: זמן בין סריקות בשניות
+        """
+        if self._thread is not None:
+            return
+
+        def _loop() -> None:
+            while True:
+                try:
+                    self.sweep()
+                except Exception as e:
+                    logger.error(f"[janitor] שגיאה בניקוי: {e}")
+                if self._stop.wait(interval):
+                    return
+
+        self._thread = threading.Thread(target=_loop, name="disk-janitor", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """עצירת thread הרקע"""
+        self._stop.set()
+
+
+_budget: Optional[DiskBudget] = None
+_janitor: Optional[DiskJanitor] = None
+_lock = threading.Lock()
+
+
+def get_disk_budget() -> DiskBudget:
+    """קבלת תקציב הדיסק המשותף (נוצר בקריאה הראשונה)"""
+    global _budget
+    with _lock:
+        if _budget is None:
+            _budget = DiskBudget()
+        return _budget
+
+
+def get_janitor() -> DiskJanitor:
+    """קבלת ה-janitor המשותף (נוצר בקריאה הראשונה)"""
+    global _janitor
+    with _lock:
+        if _janitor is None:
+            directories = [DOWNLOADS_DIR] + ([Path(RAM_SCRATCH_DIR)] if RAM_SCRATCH_DIR else [])
+            _janitor = DiskJanitor(directories)
+        return _janitor
@@ -0,0 +1,189 @@
+"""
+מאגר workers להרצות ffmpeg - תקציב ליבות, עדיפות נמוכה ו-threads מוגבלים
+
+בלי המאגר כל הורדה הפעילה ffmpeg (מיזוג, המרת אודיו, קידוד) בתוך
+ה-thread שלה, בלי הגבלה - כמה המרות במקביל תפסו את כל הליבות ולולאת
+ה-polling נתקעה. עכשיו כל הרצה של ffmpeg עוברת כאן:
+- FFMPEG_WORKERS הרצות במקביל (FFMPEG_CORES / FFMPEG_THREADS), השאר ממתינות בתור
+- כל הרצה מוגבלת ל-FFMPEG_THREADS threads (‎-threads לקלט ולפלט)
+- ה-workers מורידים את העדיפות של עצמם (nice) - ב-Linux כל תהליך ffmpeg
+  שהם מפעילים, כולל אלה של yt-dlp, יורש אותה
+- עומק התור, ההרצות הפעילות וזמן ההמתנה נמדדים בנפרד משלבי ההורדה
+
+ffmpeg עצמו הוא תהליך נפרד, כך שה-workers הם threads שרק ממתינים לו.
+"""
+
+import contextvars
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Sequence, TypeVar
+
+from config import FFMPEG_WORKERS, FFMPEG_THREADS, FFMPEG_NICE
+from utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# nice לכל thread בנפרד נתמך רק ב-Linux (בשאר המערכות setpriority משנה את כל התהליך)
+_THREAD_NICE = sys.platform.startswith('linux') and hasattr(os, 'setpriority')
+
+# המתנה בתור - משניות בודדות ועד קידוד ארוך שתופס את כל ה-workers
+WAIT_BUCKETS = (0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+_registry = get_registry()
+_QUEUE_DEPTH = _registry.gauge('bot_ffmpeg_queue_depth', "הרצות ffmpeg שממתינות ל-worker פנוי")
+_RUNNING = _registry.gauge('bot_ffmpeg_running', "הרצות ffmpeg שרצות כרגע")
+_WAIT = _registry.histogram(
+    'bot_ffmpeg_wait_seconds', "זמן המתנה בתור ה-ffmpeg לפי סוג העבודה", ('kind',), WAIT_BUCKETS
+)
+_RUNS = _registry.counter(
+    'bot_ffmpeg_runs_total', "הרצות ffmpeg לפי סוג העבודה ותוצאה", ('kind', 'outcome')
+)
+_SECONDS = _registry.counter(
+    'bot_ffmpeg_seconds_total', "זמן ריצה מצטבר של ffmpeg לפי סוג העבודה", ('kind',)
+)
+
+
+class FFmpegPool:
+    """מאגר workers שמריץ את כל עבודות ה-ffmpeg בתקציב ליבות קבוע"""
+
+    def __init__(self, workers: int = FFMPEG_WORKERS, threads: int = FFMPEG_THREADS,
+                 nice: int = FFMPEG_NICE):
+        self.workers = workers
+        self.threads = threads
+        self.nice = nice
+
+        # בלי nice לכל thread - הפקודות שלנו עוברות דרך nice (של yt-dlp לא)
+        self._nice_prefix: List[str] = []
+        if nice and not _THREAD_NICE and shutil.which('nice'):
+            self._nice_prefix = ['nice', '-n', str(nice)]
+
+        self._queued = 0
+        self._running = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='ffmpeg', initializer=self._init_worker
+        )
+
+    def call(self, func: Callable[..., T], *args: Any, kind: str = 'ffmpeg', **kwargs: Any) -> T:
+        """
+        הרצת func באחד ה-workers והמתנה לתוצאה
+
+        הפונקציה לא יכולה לקרוא שוב למאגר (אחרת עלולה להיתקע כשכל ה-workers תפוסים).
+
+        Args:
+            func: עבודה שמפעילה ffmpeg
+            *args: ארגומנטים ל-func
+            kind: סוג העבודה (למדדים)
+            **kwargs: ארגומנטים ל-func
+
+        Returns:
+            מה ש-func החזירה (שגיאות עוברות לקורא)
+        """
+        queued_at = time.perf_counter()
+        context = contextvars.copy_context()
+        with self._lock:
+            self._queued += 1
+
+        def work() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._queued -= 1
+                self._running += 1
+            _WAIT.observe(started - queued_at, kind=kind)
+
+            outcome = 'error'
+            try:
+                result = context.run(func, *args, **kwargs)
+                outcome = 'ok'
+                return result
+            finally:
+                with self._lock:
+                    self._running -= 1
+                _RUNS.inc(kind=kind, outcome=outcome)
+                _SECONDS.inc(time.perf_counter() - started, kind=kind)
+
+        return self._executor.submit(work).result()
+
+    def run(self, cmd: Sequence[str], timeout: float, kind: str = 'ffmpeg') -> subprocess.CompletedProcess:
+        """
+        הרצת פקודת ffmpeg במאגר, עם מגבלת ה-threads
+
+        Args:
+            cmd: הפקודה (הארגומנט האחרון - קובץ הפלט)
+            timeout: שניות מקסימום (TimeoutExpired עוברת לקורא)
+            kind: סוג העבודה (למדדים)
+
+        Returns:
+            תוצאת ההרצה עם stdout / stderr
+        """
+        return self.call(subprocess.run, self.limit(cmd), capture_output=True, timeout=timeout, kind=kind)
+
+    def limit(self, cmd: Sequence[str]) -> List[str]:
+        """
+        הוספת מגבלת threads (לפענוח הקלט ולקידוד הפלט) ו-nice לפקודת ffmpeg
+
+        Args:
+            cmd: פקודת ffmpeg שהארגומנט האחרון בה הוא קובץ הפלט
+
+        Returns:
+            הפקודה המוגבלת
+        """
+        threads = str(self.threads)
+        return [
+            *self._nice_prefix, cmd[0], '-threads', threads,
+            *cmd[1:-1], '-threads', threads, '-filter_threads', threads, cmd[-1],
+        ]
+
+    def stats(self) -> Dict[str, int]:
+        """
+        מצב המאגר
+
+        Returns:
+            מילון עם workers, הרצות ממתינות ופעילות
+        """
+        with self._lock:
+            return {'workers': self.workers, 'queued': self._queued, 'running': self._running}
+
+    def _init_worker(self) -> None:
+        """הורדת העדיפות של ה-worker - תהליכי ffmpeg שהוא מפעיל יורשים אותה"""
+        if not self.nice or not _THREAD_NICE:
+            return
+        tid = threading.get_native_id()
+        try:
+            current = os.getpriority(os.PRIO_PROCESS, tid)
+            os.setpriority(os.PRIO_PROCESS, tid, min(19, current + self.nice))
+        except OSError as e:
+            logger.warning(f"[ffmpeg_pool] הורדת עדיפות נכשלה: {e}")
+
+
+_pool: Optional[FFmpegPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_ffmpeg_pool() -> FFmpegPool:
+    """קבלת מאגר ה-ffmpeg המשותף (נוצר בקריאה הראשונה)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = FFmpegPool()
+            logger.info(f"[ffmpeg_pool] {_pool.workers} הרצות במקביל, "
+                        f"{_pool.threads} threads להרצה, nice {_pool.nice}")
+        return _pool
+
+
+def _collect() -> None:
+    if _pool is not None:
+        stats = _pool.stats()
+        _QUEUE_DEPTH.set(stats['queued'])
+        _RUNNING.set(stats['running'])
+
+
+_registry.add_collector(_collect)
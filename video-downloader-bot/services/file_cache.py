@@ -0,0 +1,154 @@
+"""
+קאש קבצים שכבר נשלחו - שמירת file_id של טלגרם לשליחה חוזרת בלי הורדה
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from config import FILE_CACHE_DB, FILE_CACHE_TTL
+from utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+def build_media_keys(url: str, info: Optional[Dict[str, Any]],
+                     quality: str, audio_only: bool) -> List[str]:
+    """
+    בניית מפתחות קאש לקובץ לפי מקור, איכות וסוג
+
+    המפתח הראשי הוא ה-URL הקנוני. אם יש מידע מ-yt-dlp נוסף גם מפתח לפי
+    extractor + id, כך שקישורים שונים לאותו סרטון מוצאים את אותו קובץ.
+
+    Args:
+        url: הקישור לסרטון
+        info: מידע מ-yt-dlp (אופציונלי)
+        quality: האיכות שנבחרה
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        רשימת מפתחות
+    """
+    suffix = 'audio' if audio_only else f"{quality}|video"
+
+    keys = [f"url:{canonicalize_url(url)}|{suffix}"]
+    if info and info.get('extractor_key') and info.get('id'):
+        keys.append(f"id:{info['extractor_key']}:{info['id']}|{suffix}")
+    return keys
+
+
+class FileIdCache:
+    """
+    קאש קבוע (SQLite) של file_id לפי מפתח מדיה
+
+    שליחה לפי file_id מיידית ולא מעבירה את הקובץ שוב לשרתי טלגרם.
+    """
+
+    def __init__(self, db_path: str, ttl: float = FILE_CACHE_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(str(db_path), check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS file_ids (
+                key TEXT PRIMARY KEY,
+                file_id TEXT NOT NULL,
+                media_type TEXT NOT NULL,
+                file_size INTEGER,
+                created_at REAL NOT NULL
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, keys: Iterable[str]) -> Optional[Dict[str, Any]]:
+        """
+        חיפוש file_id לפי אחד המפתחות
+
+        Args:
+            keys: מפתחות מדיה (build_media_keys)
+
+        Returns:
+            מילון עם file_id, media_type, file_size או None
+        """
+        keys = list(keys)
+        min_created = time.time() - self.ttl
+        placeholders = ','.join('?' * len(keys))
+
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT file_id, media_type, file_size FROM file_ids "
+                f"WHERE key IN ({placeholders}) AND created_at > ? "
+                f"ORDER BY created_at DESC LIMIT 1",
+                (*keys, min_created)
+            ).fetchone()
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            return {'file_id': row[0], 'media_type': row[1], 'file_size': row[2]}
+
+    def put(self, keys: Iterable[str], file_id: str, media_type: str,
+            file_size: Optional[int] = None) -> None:
+        """
+        שמירת file_id תחת כל המפתחות
+
+        Args:
+            keys: מפתחות מדיה
+            file_id: המזהה שטלגרם החזיר
+            media_type: video / audio / document
+            file_size: גודל הקובץ בבייטים
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO file_ids (key, file_id, media_type, file_size, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [(key, file_id, media_type, file_size, now) for key in keys]
+            )
+            self._conn.commit()
+
+    def invalidate(self, file_id: str) -> None:
+        """מחיקת file_id שטלגרם כבר לא מקבל"""
+        with self._lock:
+            self._conn.execute("DELETE FROM file_ids WHERE file_id = ?", (file_id,))
+            self._conn.commit()
+
+    def hit_rate(self) -> float:
+        """אחוז הפגיעות מתוך כל החיפושים"""
+        total = self.hits + self.misses
+        return (self.hits / total * 100) if total else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        סטטיסטיקות שימוש
+
+        Returns:
+            מילון עם מונים ואחוז פגיעות
+        """
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM file_ids").fetchone()[0]
+        return {
+            'entries': entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hit_rate(), 1),
+        }
+
+
+_file_cache: Optional[FileIdCache] = None
+_file_cache_lock = threading.Lock()
+
+
+def get_file_cache() -> FileIdCache:
+    """קבלת קאש ה-file_id המשותף (נוצר בקריאה הראשונה)"""
+    global _file_cache
+    with _file_cache_lock:
+        if _file_cache is None:
+            _file_cache = FileIdCache(FILE_CACHE_DB)
+        return _file_cache
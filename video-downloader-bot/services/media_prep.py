@@ -0,0 +1,257 @@
+"""
+הכנת הקובץ לפני העלאה - מטא-דאטה, faststart ותמונה ממוזערת
+
+בלי duration / width / height / thumbnail טלגרם מעבד את הקובץ בעצמו,
+והלקוחות מציגים תצוגה מקדימה ריקה עד שהעיבוד מסתיים. קובץ MP4 שה-moov
+שלו בסוף (אחרי ה-mdat) לא ניתן להזרמה עד שהורד כולו.
+
+לכן אחרי ההורדה:
+1. ffprobe אחד קורא את משך הסרטון, הרזולוציה והסיבוב
+2. אם ה-moov אחרי ה-mdat (נבדק מכותרות ה-boxes, בלי ffmpeg) - remux
+   עם ‎-c copy -movflags +faststart, בלי קידוד מחדש
+3. פריים אחד נשמר כ-JPEG (עד 320 פיקסלים לצלע, עד 200KB - מגבלות טלגרם)
+
+כל שלב שנכשל מדולג - ההעלאה ממשיכה עם מה שיש.
+"""
+
+import json
+import logging
+import os
+import shutil
+import struct
+import subprocess
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import MEDIA_PREP, MEDIA_PREP_TIMEOUT, THUMBNAIL_SIZE
+from utils.helpers import check_ffmpeg
+from utils.tracing import traced, current_span
+from .ffmpeg_pool import get_ffmpeg_pool
+
+logger = logging.getLogger(__name__)
+
+# מכולות ISO BMFF שבהן מיקום ה-moov משנה
+_MP4_EXTENSIONS = ('.mp4', '.m4v', '.mov', '.m4a')
+_THUMBNAIL_MAX_BYTES = 200 * 1024
+
+
+class MediaPrepError(Exception):
+    """שגיאה בהרצת ffprobe / ffmpeg"""
+    pass
+
+
+@dataclass
+class MediaMeta:
+    """מה שנמדד והוכן לקובץ - מועבר להעלאה"""
+    duration: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    thumbnail: Optional[str] = None
+    outcome: str = 'skipped'  # skipped / ok / remuxed / failed
+
+    def upload_params(self, media_type: str) -> Dict[str, Any]:
+        """
+        פרמטרים לבקשת השליחה לפי סוג המדיה
+
+        Args:
+            media_type: video / audio / document
+
+        Returns:
+            duration / width / height שנמדדו (בלי thumbnail)
+        """
+        if media_type == 'document':
+            return {}
+        fields = ('duration', 'width', 'height') if media_type == 'video' else ('duration',)
+        return {name: getattr(self, name) for name in fields if getattr(self, name)}
+
+
+def _run(cmd: List[str], kind: Optional[str] = None) -> bytes:
+    """
+    הרצת ffprobe / ffmpeg עם מגבלת זמן - מחזיר את ה-stdout
+
+    עם kind הפקודה רצה במאגר ה-ffmpeg; ffprobe קורא רק כותרות ורץ ישירות.
+    """
+    try:
+        if kind:
+            result = get_ffmpeg_pool().run(cmd, MEDIA_PREP_TIMEOUT, kind=kind)
+        else:
+            result = subprocess.run(cmd, capture_output=True, timeout=MEDIA_PREP_TIMEOUT)
+    except (subprocess.TimeoutExpired, OSError) as e:
+        raise MediaPrepError(str(e))
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', 'replace').strip()
+        raise MediaPrepError(stderr[-300:] or f"{cmd[0]} exit code {result.returncode}")
+    return result.stdout
+
+
+def probe(filepath: str) -> Dict[str, Any]:
+    """
+    קריאת המטא-דאטה של הקובץ (ffprobe)
+
+    Args:
+        filepath: נתיב הקובץ
+
+    Returns:
+        פלט ה-JSON של ffprobe (format + streams)
+
+    Raises:
+        MediaPrepError: אם ffprobe נכשל
+    """
+    output = _run([
+        'ffprobe', '-v', 'error', '-print_format', 'json',
+        '-show_format', '-show_streams', filepath,
+    ])
+    try:
+        return json.loads(output)
+    except ValueError as e:
+        raise MediaPrepError(f"פלט ffprobe לא תקין: {e}")
+
+
+def _meta_from_probe(data: Dict[str, Any]) -> MediaMeta:
+    """משך ורזולוציה (אחרי סיבוב) מפלט ffprobe"""
+    meta = MediaMeta()
+
+    try:
+        meta.duration = round(float(data.get('format', {}).get('duration')))
+    except (TypeError, ValueError):
+        pass
+
+    video = next((s for s in data.get('streams', []) if s.get('codec_type') == 'video'
+                  and not s.get('disposition', {}).get('attached_pic')), None)
+    if video and video.get('width') and video.get('height'):
+        meta.width, meta.height = int(video['width']), int(video['height'])
+
+        rotation = video.get('tags', {}).get('rotate')
+        for side_data in video.get('side_data_list', []):
+            rotation = side_data.get('rotation', rotation)
+        try:
+            if abs(int(float(rotation or 0))) % 180 == 90:
+                meta.width, meta.height = meta.height, meta.width
+        except ValueError:
+            pass
+
+    return meta
+
+
+def needs_faststart(filepath: str) -> bool:
+    """
+    האם ה-moov נמצא אחרי ה-mdat (סריקת כותרות ה-boxes העליונים)
+
+    Args:
+        filepath: קובץ MP4 / MOV
+
+    Returns:
+        True אם צריך להעביר את ה-moov לתחילת הקובץ
+    """
+    with open(filepath, 'rb') as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+            size, box = struct.unpack('>I4s', header)
+            if box == b'moov':
+                return False
+            if box == b'mdat':
+                return True
+
+            if size == 1:
+                # גודל 64 ביט אחרי הכותרת
+                extended = f.read(8)
+                if len(extended) < 8:
+                    return False
+                size = struct.unpack('>Q', extended)[0]
+                f.seek(size - 16, os.SEEK_CUR)
+            elif size >= 8:
+                f.seek(size - 8, os.SEEK_CUR)
+            else:
+                # size 0 = עד סוף הקובץ
+                return False
+
+
+def _remux_faststart(filepath: str) -> None:
+    """העברת ה-moov לתחילת הקובץ בלי קידוד מחדש (במקום)"""
+    base, ext = os.path.splitext(filepath)
+    output = f"{base}_faststart{ext}"
+    try:
+        _run([
+            'ffmpeg', '-y', '-v', 'error', '-i', filepath,
+            '-map', '0', '-c', 'copy', '-movflags', '+faststart', output,
+        ], 'faststart')
+        os.replace(output, filepath)
+    finally:
+        if os.path.exists(output):
+            os.remove(output)
+
+
+def _make_thumbnail(filepath: str, duration: Optional[int]) -> Optional[str]:
+    """
+    פריים מתוך הסרטון כ-JPEG בגבולות של טלגרם
+
+    Returns:
+        נתיב התמונה, או None אם יצאה גדולה מדי
+    """
+    output = f"{os.path.splitext(filepath)[0]}_thumb.jpg"
+    # קצת אחרי ההתחלה - הפריים הראשון הוא לעיתים קרובות שחור
+    offset = min(duration * 0.1, 5.0) if duration else 0.0
+    size = THUMBNAIL_SIZE
+
+    _run([
+        'ffmpeg', '-y', '-v', 'error', '-ss', f'{offset:.2f}', '-i', filepath, '-frames:v', '1',
+        '-vf', f"scale='min({size},iw)':'min({size},ih)':force_original_aspect_ratio=decrease",
+        '-q:v', '5', output,
+    ], 'thumbnail')
+
+    if os.path.getsize(output) > _THUMBNAIL_MAX_BYTES:
+        os.remove(output)
+        return None
+    return output
+
+
+def media_prep_available() -> bool:
+    """האם השלב פעיל (מוגדר, ו-ffmpeg + ffprobe מותקנים)"""
+    return MEDIA_PREP and check_ffmpeg() and shutil.which('ffprobe') is not None
+
+
+@traced('prepare_media')
+def prepare_media(filepath: str, audio_only: bool = False) -> MediaMeta:
+    """
+    מטא-דאטה, faststart ותמונה ממוזערת לקובץ שהורד
+
+    Args:
+        filepath: נתיב הקובץ (עשוי להיות מוחלף במקום אחרי remux)
+        audio_only: אודיו - רק משך
+
+    Returns:
+        MediaMeta (ריק, עם outcome=skipped, אם השלב כבוי)
+    """
+    if not media_prep_available():
+        return MediaMeta()
+
+    try:
+        meta = _meta_from_probe(probe(filepath))
+    except MediaPrepError as e:
+        logger.warning(f"[media_prep] ffprobe נכשל ל-{os.path.basename(filepath)}: {e}")
+        return MediaMeta(outcome='failed')
+
+    meta.outcome = 'ok'
+    if audio_only or meta.width is None:
+        return meta
+
+    try:
+        if filepath.lower().endswith(_MP4_EXTENSIONS) and needs_faststart(filepath):
+            _remux_faststart(filepath)
+            meta.outcome = 'remuxed'
+    except (MediaPrepError, OSError) as e:
+        logger.warning(f"[media_prep] remux ל-faststart נכשל: {e}")
+
+    try:
+        meta.thumbnail = _make_thumbnail(filepath, meta.duration)
+    except (MediaPrepError, OSError) as e:
+        logger.warning(f"[media_prep] יצירת תמונה ממוזערת נכשלה: {e}")
+
+    current_span().set(
+        duration=meta.duration, width=meta.width, height=meta.height,
+        remuxed=meta.outcome == 'remuxed', thumbnail=meta.thumbnail is not None
+    )
+    return meta
@@ -0,0 +1,229 @@
+"""
+מדדי צינור ההורדה - זמנים ותוצאות לכל שלב, מצב התור והקאשים
+
+שלבים: url_received, info, download, postprocess, transcode, prepare,
+stream, upload, cleanup. כל שלב נמדד עם התוויות extractor / quality / outcome,
+והעבודה השלמה נספרת בנפרד לפי התוצאה הסופית (success / cached / streamed /
+too_large / private / error...).
+
+המדדים נחשפים בפורמט Prometheus ב-/metrics - דרך אפליקציית ה-webhook
+או שרת HTTP קטן (METRICS_PORT) במצבי polling.
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from utils.metrics import get_registry, CONTENT_TYPE
+from .scheduler import get_scheduler
+from .file_cache import get_file_cache
+from .ydl_pool import get_ydl_pool
+
+logger = logging.getLogger(__name__)
+
+UNKNOWN = 'unknown'
+
+# זמני שלבים - מחילוץ מידע (שניות בודדות) ועד הורדה/העלאה ארוכה
+STAGE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+_registry = get_registry()
+_STAGE_LABELS = ('stage', 'extractor', 'quality', 'outcome')
+_JOB_LABELS = ('extractor', 'quality', 'outcome')
+
+STAGE_DURATION = _registry.histogram(
+    'bot_stage_duration_seconds', "משך כל שלב בצינור ההורדה", _STAGE_LABELS, STAGE_BUCKETS
+)
+STAGE_TOTAL = _registry.counter(
+    'bot_stage_total', "מספר הרצות של כל שלב לפי תוצאה", _STAGE_LABELS
+)
+JOB_DURATION = _registry.histogram(
+    'bot_job_duration_seconds', "משך עבודת הורדה מלאה (מהתחלה ועד שליחה)", _JOB_LABELS, STAGE_BUCKETS
+)
+JOBS_TOTAL = _registry.counter(
+    'bot_jobs_total', "עבודות הורדה שהסתיימו לפי תוצאה סופית", _JOB_LABELS
+)
+TRANSFER_BYTES = _registry.counter(
+    'bot_transfer_bytes_total', "בייטים שהורדו / הועלו", ('direction', 'extractor')
+)
+
+QUEUE_PENDING = _registry.gauge('bot_queue_pending', "עבודות שממתינות בתור ההורדות")
+JOBS_RUNNING = _registry.gauge('bot_jobs_running', "עבודות הורדה שרצות כרגע")
+CACHE_HITS = _registry.gauge('bot_cache_hits', "פגיעות בקאש מאז ההפעלה", ('cache',))
+CACHE_MISSES = _registry.gauge('bot_cache_misses', "החטאות בקאש מאז ההפעלה", ('cache',))
+CACHE_ENTRIES = _registry.gauge('bot_cache_entries', "רשומות בקאש כרגע", ('cache',))
+YDL_POOL = _registry.gauge('bot_ydl_pool_instances', "מופעי YoutubeDL במאגר", ('state',))
+
+# שם קאש -> פונקציית stats() (כל מודול רושם את הקאש שלו)
+_caches: Dict[str, Callable[[], Dict[str, Any]]] = {}
+_caches_lock = threading.Lock()
+
+
+def register_cache(name: str, stats: Callable[[], Dict[str, Any]]) -> None:
+    """
+    רישום קאש לחשיפת hits / misses / entries
+
+    Args:
+        name: שם הקאש בתווית cache
+        stats: פונקציה שמחזירה מילון עם hits, misses ו-entries
+    """
+    with _caches_lock:
+        _caches[name] = stats
+
+
+def _collect() -> None:
+    """עדכון ה-gauges ממצב חי לפני כל scrape"""
+    scheduler = get_scheduler().stats()
+    QUEUE_PENDING.set(scheduler['pending'])
+    JOBS_RUNNING.set(scheduler['running'])
+
+    for state, value in get_ydl_pool().stats().items():
+        YDL_POOL.set(value, state=state)
+
+    with _caches_lock:
+        caches = dict(_caches)
+    caches.setdefault('file_id', get_file_cache().stats)
+
+    for name, stats_func in caches.items():
+        try:
+            stats = stats_func()
+        except Exception as e:
+            logger.warning(f"[metrics] שגיאה בקריאת סטטיסטיקות {name}: {e}")
+            continue
+        CACHE_HITS.set(stats.get('hits', 0), cache=name)
+        CACHE_MISSES.set(stats.get('misses', 0), cache=name)
+        CACHE_ENTRIES.set(stats.get('entries', 0), cache=name)
+
+
+_registry.add_collector(_collect)
+
+
+def job_labels(extractor: Optional[str], quality: Optional[str], audio_only: bool = False) -> Dict[str, str]:
+    """
+    תוויות extractor / quality אחידות לכל השלבים
+
+    Args:
+        extractor: extractor_key של yt-dlp (אם ידוע)
+        quality: איכות שנבחרה
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        מילון תוויות
+    """
+    return {
+        'extractor': extractor or UNKNOWN,
+        'quality': 'audio' if audio_only else (quality or UNKNOWN),
+    }
+
+
+def observe_stage(stage: str, seconds: float, outcome: str = 'ok',
+                  extractor: str = UNKNOWN, quality: str = UNKNOWN) -> None:
+    """
+    רישום הרצה של שלב שכבר נמדד
+
+    Args:
+        stage: שם השלב
+        seconds: משך בשניות
+        outcome: תוצאה (ok / error / ...)
+        extractor: תווית האתר
+        quality: תווית האיכות
+    """
+    labels = {'stage': stage, 'extractor': extractor, 'quality': quality, 'outcome': outcome}
+    STAGE_DURATION.observe(seconds, **labels)
+    STAGE_TOTAL.inc(**labels)
+
+
+@contextmanager
+def track_stage(stage: str, extractor: str = UNKNOWN, quality: str = UNKNOWN) -> Iterator[Dict[str, str]]:
+    """
+    מדידת שלב - outcome הוא ok בסיום רגיל ו-error בחריגה
+
+    מחזיר מילון תוויות שאפשר לעדכן תוך כדי (לדוגמה extractor אחרי חילוץ
+    המידע, או outcome מפורש כמו private).
+
+    Args:
+        stage: שם השלב
+        extractor: תווית האתר
+        quality: תווית האיכות
+
+    Yields:
+        מילון התוויות (extractor / quality / outcome)
+    """
+    labels = {'extractor': extractor, 'quality': quality}
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        labels.setdefault('outcome', 'error')
+        raise
+    finally:
+        labels.setdefault('outcome', 'ok')
+        observe_stage(stage, time.perf_counter() - start, **labels)
+
+
+def record_job(outcome: str, seconds: float, extractor: str = UNKNOWN, quality: str = UNKNOWN) -> None:
+    """
+    רישום סיום עבודת הורדה
+
+    Args:
+        outcome: התוצאה הסופית
+        seconds: משך העבודה
+        extractor: תווית האתר
+        quality: תווית האיכות
+    """
+    JOB_DURATION.observe(seconds, extractor=extractor, quality=quality, outcome=outcome)
+    JOBS_TOTAL.inc(extractor=extractor, quality=quality, outcome=outcome)
+
+
+def record_bytes(direction: str, count: int, extractor: str = UNKNOWN) -> None:
+    """
+    רישום בייטים שהועברו
+
+    Args:
+        direction: download / upload
+        count: מספר הבייטים
+        extractor: תווית האתר
+    """
+    if count:
+        TRANSFER_BYTES.inc(count, direction=direction, extractor=extractor)
+
+
+def render_metrics() -> str:
+    """כל המדדים בפורמט הטקסט של Prometheus"""
+    return _registry.render()
+
+
+def start_metrics_server(host: str, port: int) -> ThreadingHTTPServer:
+    """
+    הפעלת שרת HTTP קטן שמגיש את /metrics (במצבי polling)
+
+    Args:
+        host: כתובת האזנה
+        port: פורט
+
+    Returns:
+        השרת (רץ ב-thread ברקע)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def do_GET(self) -> None:
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = render_metrics().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    logger.info(f"[metrics] /metrics זמין על {host}:{port}")
+    return server
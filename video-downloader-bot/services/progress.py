@@ -0,0 +1,208 @@
+"""
+דיווח התקדמות הורדה/העלאה בהודעת הסטטוס
+
+העדכונים מגיעים מה-progress_hooks של yt-dlp ומההעלאה הזורמת, ומאוחדים
+לעריכה אחת לכל PROGRESS_EDIT_INTERVAL שניות להודעה, תחת מגבלת עריכות
+גלובלית - כדי להישאר בתוך מגבלות הקצב של טלגרם.
+
+ההודעה מנוהלת כאן מתחילתה ועד סופה: מעברי שלב שמגיעים מהר מדי מתאחדים
+לעריכה אחת בסוף המרווח, ובסיום ההודעה נמחקת (close) או נערכת לטקסט סופי
+(finish) - ואחרי זה שום עריכה ממתינה לא נשלחת.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import requests
+from telebot import TeleBot
+from telebot.apihelper import ApiTelegramException
+
+from config import MESSAGES, PROGRESS_EDIT_INTERVAL, PROGRESS_GLOBAL_EDITS_PER_SECOND
+from utils import format_size, format_duration
+from utils.formatters import format_progress_bar
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# מגבלת עריכות משותפת לכל ההורדות (עדכוני התקדמות בלבד - מותר לדלג עליהם)
+_global_edits = TokenBucket(rate=PROGRESS_GLOBAL_EDITS_PER_SECOND)
+
+
+class ProgressReporter:
+    """
+    עדכון הודעת סטטוס אחת עם התקדמות, בקצב מוגבל
+
+    עדכוני התקדמות נזרקים אם הגיעו מוקדם מדי; מעברי שלב (stage) ועדכונים
+    (update) שהגיעו מוקדם מדי נדחים לסוף המרווח, ורק האחרון שבהם נשלח.
+    """
+
+    def __init__(self, bot: TeleBot, chat_id: int, message_id: int,
+                 min_interval: float = PROGRESS_EDIT_INTERVAL):
+        self.bot = bot
+        self.chat_id = chat_id
+        self.message_id = message_id
+        self.min_interval = min_interval
+        self.edits = 0
+
+        self._last_text: Optional[str] = None
+        self._last_edit = 0.0
+        self._upload_start: Optional[float] = None
+        self._pending: Optional[str] = None
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def stage(self, text: str) -> None:
+        """
+        מעבר שלב (מוריד / מעבד / מעלה) - מיד, או בסוף המרווח אם נערך הרגע
+
+        Args:
+            text: הטקסט להצגה
+        """
+        self._edit(text, defer=True)
+
+    def update(self, text: str) -> None:
+        """
+        עדכון טקסט חופשי (לדוגמה התקדמות של אצווה) - כמו stage
+
+        Args:
+            text: הטקסט להצגה
+        """
+        self._edit(text, defer=True)
+
+    def finish(self, text: str) -> None:
+        """
+        סיום ההודעה בטקסט סופי (שגיאה / סיכום) - עריכה מיידית
+
+        Args:
+            text: הטקסט להצגה
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._close()
+            if text == self._last_text:
+                return
+            self._last_text = text
+
+        self._send(text)
+
+    def close(self) -> None:
+        """סיום מוצלח - מחיקת הודעת הסטטוס"""
+        with self._lock:
+            if self._closed:
+                return
+            self._close()
+
+        try:
+            self.bot.delete_message(self.chat_id, self.message_id)
+        except (ApiTelegramException, requests.RequestException) as e:
+            logger.warning(f"[progress] מחיקת הודעה נכשלה: {e}")
+
+    def download_hook(self, d: Dict[str, Any]) -> None:
+        """
+        progress hook של yt-dlp
+
+        Args:
+            d: מילון הסטטוס מ-yt-dlp
+        """
+        status = d.get('status')
+
+        if status == 'downloading':
+            total = d.get('total_bytes') or d.get('total_bytes_estimate')
+            self._progress(
+                MESSAGES['downloading_progress'],
+                d.get('downloaded_bytes') or 0, total,
+                d.get('speed'), d.get('eta')
+            )
+        elif status == 'finished':
+            self.stage(MESSAGES['processing'])
+
+    def upload_callback(self, sent: int, total: int) -> None:
+        """
+        callback של ההעלאה הזורמת
+
+        Args:
+            sent: בייטים שנשלחו
+            total: גודל הקובץ
+        """
+        now = time.monotonic()
+        if self._upload_start is None:
+            self._upload_start = now
+
+        elapsed = now - self._upload_start
+        speed = sent / elapsed if elapsed > 0 else None
+        eta = (total - sent) / speed if speed else None
+        self._progress(MESSAGES['uploading_progress'], sent, total, speed, eta)
+
+    def _progress(self, template: str, done: int, total: Optional[int],
+                  speed: Optional[float], eta: Optional[float]) -> None:
+        """בניית טקסט ההתקדמות ועריכה אם הגיע הזמן"""
+        percent = (done / total * 100) if total else None
+
+        text = template.format(
+            percent=f"{percent:.0f}%" if percent is not None else format_size(done),
+            bar=format_progress_bar(percent or 0),
+            speed=f"{format_size(speed)}/s" if speed else "-",
+            eta=format_duration(int(eta)) if eta else "-",
+        )
+        self._edit(text)
+
+    def _edit(self, text: str, defer: bool = False) -> None:
+        """עריכת ההודעה - עם דילוג (או דחייה, עם defer) על עדכונים מהירים מדי או זהים"""
+        with self._lock:
+            if self._closed:
+                return
+            if text == self._last_text:
+                self._pending = None
+                return
+
+            now = time.monotonic()
+            wait = self._last_edit + self.min_interval - now
+            if wait > 0:
+                if defer:
+                    self._pending = text
+                    if self._timer is None:
+                        self._timer = threading.Timer(wait, self._flush)
+                        self._timer.daemon = True
+                        self._timer.start()
+                return
+            if not defer and not _global_edits.try_acquire():
+                return
+
+            self._pending = None
+            self._last_text = text
+            self._last_edit = now
+
+        self._send(text)
+
+    def _flush(self) -> None:
+        """שליחת העדכון שנדחה (מ-Timer)"""
+        with self._lock:
+            self._timer = None
+            text = self._pending
+            if self._closed or text is None:
+                return
+            self._pending = None
+            self._last_text = text
+            self._last_edit = time.monotonic()
+
+        self._send(text)
+
+    def _close(self) -> None:
+        """סימון סוף חיי ההודעה וביטול עדכון ממתין (נקרא תחת נעילה)"""
+        self._closed = True
+        self._pending = None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _send(self, text: str) -> None:
+        try:
+            self.bot.edit_message_text(text, self.chat_id, self.message_id)
+            self.edits += 1
+        except (ApiTelegramException, requests.RequestException) as e:
+            # התקדמות היא לא קריטית - לא מפילים את ההורדה בגלל עריכה (או רשת) שנכשלה
+            logger.warning(f"[progress] עריכת הודעה נכשלה: {e}")
@@ -0,0 +1,200 @@
+"""
+הורדה מקבילה בטווחי בייטים (HTTP Range) לקבצים רציפים
+
+yt-dlp מוריד קובץ רציף (לדוגמה וידאו/אודיו נפרדים של YouTube) בחיבור אחד,
+ושרתים שמגבילים קצב לכל חיבור הופכים אותו לצוואר בקבוק. כאן הקובץ מחולק
+ל-N טווחים שיורדים במקביל ונכתבים ישר למקום שלהם בקובץ.
+
+המוריד נרשם ב-yt-dlp כ-external downloader בשם parallel_range, כך שמפעילים
+אותו דרך האפשרות הרגילה external_downloader={'http': 'parallel_range'}.
+אם הרישום לא אפשרי (RANGE_AVAILABLE=False) ההורדה נשארת ב-HttpFD הרגיל.
+"""
+
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+from yt_dlp.downloader import external
+from yt_dlp.downloader.http import HttpFD
+from yt_dlp.networking import Request
+from yt_dlp.networking.exceptions import TransportError, HTTPError
+from yt_dlp.utils.networking import HTTPHeaderDict
+
+from config import RANGE_MIN_SIZE
+
+logger = logging.getLogger(__name__)
+
+DOWNLOADER_NAME = 'parallel_range'
+
+_BLOCK_SIZE = 256 * 1024
+_PART_RETRIES = 3
+
+
+class ParallelRangeFD(HttpFD):
+    """
+    מוריד yt-dlp שמחלק קובץ רציף לטווחים ומוריד אותם במקביל
+
+    מספר החיבורים נקרא מהפרמטר range_connections של YoutubeDL. אם השרת לא
+    תומך ב-Range, הקובץ קטן מ-RANGE_MIN_SIZE או שביקשו חיבור אחד - נופל
+    להורדה הרגילה של HttpFD.
+    """
+
+    EXE_NAME = DOWNLOADER_NAME
+
+    @classmethod
+    def get_basename(cls) -> str:
+        return DOWNLOADER_NAME
+
+    @classmethod
+    def can_download(cls, info_dict: Dict[str, Any], path: Optional[str] = None) -> bool:
+        return info_dict.get('protocol') in ('http', 'https')
+
+    def real_download(self, filename: str, info_dict: Dict[str, Any]) -> bool:
+        connections = self.params.get('range_connections') or 1
+        headers = HTTPHeaderDict({'Accept-Encoding': 'identity'}, info_dict.get('http_headers'))
+
+        if connections <= 1 or 'Range' in headers or self.params.get('test'):
+            return super().real_download(filename, info_dict)
+
+        total = self._probe_size(info_dict['url'], headers)
+        if not total or total < RANGE_MIN_SIZE:
+            return super().real_download(filename, info_dict)
+
+        return self._download_ranges(filename, info_dict, headers, total, connections)
+
+    def _probe_size(self, url: str, headers: HTTPHeaderDict) -> Optional[int]:
+        """בקשת הבייט הראשון - מחזיר את גודל הקובץ אם השרת תומך ב-Range"""
+        try:
+            response = self.ydl.urlopen(Request(url, headers={**headers, 'Range': 'bytes=0-0'}))
+        except (TransportError, HTTPError) as e:
+            logger.debug(f"[range] בדיקת Range נכשלה: {e}")
+            return None
+
+        try:
+            content_range = response.headers.get('Content-Range') or ''
+            if response.status != 206 or '/' not in content_range:
+                return None
+            size = content_range.rsplit('/', 1)[1]
+            return int(size) if size.isdigit() else None
+        finally:
+            response.close()
+
+    def _download_ranges(self, filename: str, info_dict: Dict[str, Any],
+                         headers: HTTPHeaderDict, total: int, connections: int) -> bool:
+        """הורדת כל הטווחים במקביל לקובץ זמני והעברתו לשם הסופי"""
+        tmpfilename = self.temp_name(filename)
+        part_size = -(-total // connections)
+        ranges: List[Tuple[int, int]] = [
+            (start, min(start + part_size, total) - 1) for start in range(0, total, part_size)
+        ]
+
+        state = {'downloaded': 0, 'last_hook': 0.0}
+        lock = threading.Lock()
+        start_time = time.time()
+
+        def report(count: int) -> None:
+            with lock:
+                state['downloaded'] += count
+                now = time.time()
+                if now - state['last_hook'] < 0.5:
+                    return
+                state['last_hook'] = now
+                downloaded = state['downloaded']
+
+            speed = self.calc_speed(start_time, now, downloaded)
+            self._hook_progress({
+                'status': 'downloading',
+                'downloaded_bytes': downloaded,
+                'total_bytes': total,
+                'filename': filename,
+                'tmpfilename': tmpfilename,
+                'elapsed': now - start_time,
+                'speed': speed,
+                'eta': self.calc_eta(speed, total - downloaded),
+            }, info_dict)
+
+        self.report_destination(filename)
+        fd = os.open(tmpfilename, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            os.ftruncate(fd, total)
+            with ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="range") as pool:
+                for future in [pool.submit(self._download_part, info_dict['url'], headers, fd, r, report)
+                               for r in ranges]:
+                    future.result()
+        except BaseException:
+            # קובץ .part בגודל מלא עם חורים - HttpFD היה "ממשיך" ממנו קובץ פגום
+            os.close(fd)
+            self._remove_partial(tmpfilename)
+            raise
+        else:
+            os.close(fd)
+
+        self.try_rename(tmpfilename, filename)
+        self._hook_progress({
+            'status': 'finished',
+            'downloaded_bytes': total,
+            'total_bytes': total,
+            'filename': filename,
+            'elapsed': time.time() - start_time,
+        }, info_dict)
+        return True
+
+    @staticmethod
+    def _remove_partial(tmpfilename: str) -> None:
+        try:
+            os.unlink(tmpfilename)
+        except OSError as e:
+            logger.warning(f"[range] לא ניתן למחוק קובץ חלקי {tmpfilename}: {e}")
+
+    def _download_part(self, url: str, headers: HTTPHeaderDict, fd: int,
+                       byte_range: Tuple[int, int], report) -> None:
+        """הורדת טווח אחד, עם המשך מהמקום שנעצר אם החיבור נפל"""
+        offset, end = byte_range
+
+        for attempt in range(_PART_RETRIES + 1):
+            try:
+                response = self.ydl.urlopen(Request(url, headers={**headers, 'Range': f'bytes={offset}-{end}'}))
+                try:
+                    while offset <= end:
+                        block = response.read(min(_BLOCK_SIZE, end - offset + 1))
+                        if not block:
+                            break
+                        os.pwrite(fd, block, offset)
+                        offset += len(block)
+                        report(len(block))
+                finally:
+                    response.close()
+
+                if offset > end:
+                    return
+                raise TransportError(f'הטווח נקטע ב-{offset}/{end}')
+
+            except (TransportError, HTTPError) as e:
+                if attempt == _PART_RETRIES:
+                    raise
+                logger.warning(f"[range] ניסיון חוזר לטווח {offset}-{end}: {e}")
+                time.sleep(attempt + 1)
+
+
+def _register() -> bool:
+    """
+    רישום כ-external downloader של yt-dlp (בחירה דרך external_downloader)
+
+    הרישום עובר דרך external._BY_NAME, שהוא פרטי ב-yt-dlp. אם גרסה אחרת
+    שינתה אותו - לא רושמים, וההורדה נשארת ב-HttpFD הרגיל.
+
+    Returns:
+        האם המוריד נרשם
+    """
+    registry = getattr(external, '_BY_NAME', None)
+    if not isinstance(registry, dict):
+        logger.warning("[range] yt-dlp בלי external._BY_NAME - הורדה בטווחים כבויה")
+        return False
+    registry[DOWNLOADER_NAME] = ParallelRangeFD
+    return True
+
+
+RANGE_AVAILABLE = _register()
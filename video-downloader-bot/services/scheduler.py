@@ -0,0 +1,355 @@
+"""
+מתזמן הורדות - מאגר workers קבוע ותור חסום במקום thread לכל לחיצה
+
+סדר ההרצה הוא תור הוגן משוקלל (WFQ) לפי משתמש: כל עבודה מקבלת תג סיום
+וירטואלי = max(הזמן הווירטואלי, התג האחרון של המשתמש) + עלות / משקל,
+ורצה העבודה עם התג הנמוך ביותר. כך משתמש ששולח 40 קישורים לא מעכב
+בקשות בודדות של אחרים, עבודות קצרות ואודיו (עלות נמוכה) מקדימות, ומחלקות
+admin / vip (משקל גבוה) מתקדמות מהר יותר.
+
+עבודה שרצה יכולה לבקש מקומות נוספים (try_acquire_slot) - אצווה שמורידה
+כמה פריטים במקביל. המקומות נספרים באותן מגבלות (גלובלית ולמשתמש) כמו
+עבודות, ולא ניתנים כשיש עבודה ממתינה שמותר להריץ.
+"""
+
+import itertools
+import logging
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from config import (
+    DOWNLOAD_WORKERS,
+    DOWNLOAD_QUEUE_SIZE,
+    MAX_ACTIVE_DOWNLOADS_PER_USER,
+    MAX_QUEUED_DOWNLOADS_PER_USER,
+    ADMIN_USER_IDS,
+    VIP_USER_IDS,
+    PRIORITY_WEIGHTS,
+)
+from utils.metrics import get_registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOB_COST = 50.0  # MB - כשאין גודל ולא משך
+AUDIO_COST_FACTOR = 0.1  # אודיו בלבד - בערך עשירית מהנפח של וידאו
+_BYTES_PER_SECOND = 250_000  # הערכת נפח לפי משך (~2Mbps)
+
+# מחלקת עדיפות -> משקל
+_weights: Dict[str, float] = {
+    name.strip().lower(): float(weight)
+    for name, weight in (
+        item.split(':', 1) for item in PRIORITY_WEIGHTS.split(',') if ':' in item
+    )
+}
+
+# זמני המתנה בתור - משניות ועד הרבה דקות בעומס
+_WAIT_BUCKETS = (0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800)
+_QUEUE_WAIT = get_registry().histogram(
+    'bot_queue_wait_seconds', "זמן המתנה בתור עד תחילת העבודה", ('priority',), _WAIT_BUCKETS
+)
+
+
+class QueueFullError(Exception):
+    """שגיאה כשהתור הכללי מלא"""
+    pass
+
+
+class UserLimitError(Exception):
+    """שגיאה כשלמשתמש יש יותר מדי הורדות ממתינות"""
+    pass
+
+
+class SchedulerClosedError(Exception):
+    """שגיאה כשהמתזמן בתהליך כיבוי ולא מקבל עבודות חדשות"""
+    pass
+
+
+def priority_class(user_id: int) -> str:
+    """
+    מחלקת העדיפות של משתמש
+
+    Args:
+        user_id: מזהה המשתמש
+
+    Returns:
+        admin / vip / user
+    """
+    if user_id in ADMIN_USER_IDS:
+        return 'admin'
+    if user_id in VIP_USER_IDS:
+        return 'vip'
+    return 'user'
+
+
+def job_cost(info: Optional[Dict[str, Any]], audio_only: bool = False) -> float:
+    """
+    הערכת עלות עבודה (ב-MB) לפי הגודל או המשך שב-info
+
+    Args:
+        info: המידע שחולץ (slim_info)
+        audio_only: האם אודיו בלבד
+
+    Returns:
+        העלות (לפחות 1)
+    """
+    info = info or {}
+    size = info.get('filesize') or info.get('filesize_approx')
+    if not size and info.get('duration'):
+        size = info['duration'] * _BYTES_PER_SECOND
+
+    cost = size / (1024 * 1024) if size else DEFAULT_JOB_COST
+    if audio_only:
+        cost *= AUDIO_COST_FACTOR
+    return max(1.0, cost)
+
+
+@dataclass
+class DownloadJob:
+    """עבודת הורדה בתור"""
+    user_id: int
+    func: Callable[..., Any]
+    args: Tuple[Any, ...] = ()
+    priority: str = 'user'
+    cost: float = 1.0
+    tag: float = 0.0  # תג סיום וירטואלי (WFQ)
+    seq: int = 0
+    enqueued: float = field(default_factory=time.monotonic)
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:12])
+
+
+class DownloadScheduler:
+    """
+    מאגר workers עם תור חסום ומגבלות מקביליות
+
+    - מגבלה גלובלית: מספר ה-workers (הורדות שרצות במקביל, כולל מקומות נוספים)
+    - מגבלה למשתמש: מספר הורדות פעילות ומספר הורדות ממתינות
+    - סדר: תור הוגן משוקלל לפי משתמש (ראה תיאור המודול)
+    - כיבוי: ה-workers מסיימים את כל העבודות בתור לפני יציאה
+    """
+
+    def __init__(self, workers: int = DOWNLOAD_WORKERS,
+                 max_queue: int = DOWNLOAD_QUEUE_SIZE,
+                 max_active_per_user: int = MAX_ACTIVE_DOWNLOADS_PER_USER,
+                 max_queued_per_user: int = MAX_QUEUED_DOWNLOADS_PER_USER):
+        self._workers_count = max(1, workers)
+        self._max_queue = max(1, max_queue)
+        self._max_active_per_user = max(1, max_active_per_user)
+        self._max_queued_per_user = max(1, max_queued_per_user)
+
+        self._pending: List[DownloadJob] = []
+        self._active: Dict[int, int] = {}
+        self._vtime = 0.0
+        self._last_tag: Dict[int, float] = {}
+        self._seq = itertools.count()
+        self._running = 0
+        self._closing = False
+        self._cond = threading.Condition()
+        self._threads: List[threading.Thread] = []
+
+        for i in range(self._workers_count):
+            thread = threading.Thread(
+                target=self._worker_loop,
+                name=f"download-worker-{i}",
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, user_id: int, func: Callable[..., Any], *args: Any, cost: float = 1.0) -> int:
+        """
+        הכנסת עבודה לתור
+
+        Args:
+            user_id: מזהה המשתמש
+            func: הפונקציה להרצה
+            *args: ארגומנטים לפונקציה
+            cost: עלות משוערת (job_cost) - עבודות זולות מקדימות
+
+        Returns:
+            מיקום בתור (0 = תתחיל מיד)
+
+        Raises:
+            SchedulerClosedError: אם המתזמן בכיבוי
+            QueueFullError: אם התור הכללי מלא
+            UserLimitError: אם למשתמש יותר מדי הורדות ממתינות
+        """
+        with self._cond:
+            if self._closing:
+                raise SchedulerClosedError()
+            if len(self._pending) >= self._max_queue:
+                raise QueueFullError()
+
+            user_pending = sum(1 for job in self._pending if job.user_id == user_id)
+            if user_pending >= self._max_queued_per_user:
+                raise UserLimitError()
+
+            priority = priority_class(user_id)
+            tag = max(self._vtime, self._last_tag.get(user_id, 0.0)) + cost / _weights.get(priority, 1.0)
+            self._last_tag[user_id] = tag
+
+            job = DownloadJob(
+                user_id=user_id, func=func, args=args,
+                priority=priority, cost=cost, tag=tag, seq=next(self._seq)
+            )
+            self._pending.append(job)
+            position = sum(1 for other in self._pending if other.tag <= tag)
+
+            # אם יש worker פנוי והמשתמש לא הגיע למגבלה - העבודה תתחיל מיד
+            free_workers = self._workers_count - self._running
+            user_active = self._active.get(user_id, 0) + user_pending
+            if position <= free_workers and user_active < self._max_active_per_user:
+                position = 0
+
+            self._cond.notify()
+
+        logger.info(
+            f"[scheduler] עבודה {job.job_id} נכנסה לתור "
+            f"(מיקום: {position}, {priority}, עלות: {cost:.1f})"
+        )
+        return position
+
+    def _next_job(self) -> Optional[DownloadJob]:
+        """
+        בחירת העבודה הבאה שמותר להריץ (נקרא תחת נעילה)
+
+        Returns:
+            העבודה עם התג הנמוך ביותר שהמשתמש שלה לא הגיע למגבלה, או None
+        """
+        # מקומות נוספים של עבודות שרצות תופסים גם הם מהמגבלה הגלובלית
+        if self._running >= self._workers_count:
+            return None
+
+        eligible = self._eligible()
+        if not eligible:
+            return None
+
+        job = min(eligible, key=lambda j: (j.tag, j.seq))
+        self._pending.remove(job)
+
+        # הזמן הווירטואלי מתקדם לתג העבודה שנכנסת לביצוע (SCFQ)
+        self._vtime = max(self._vtime, job.tag)
+        for user_id in [u for u, tag in self._last_tag.items() if tag <= self._vtime]:
+            del self._last_tag[user_id]
+        return job
+
+    def _eligible(self) -> List[DownloadJob]:
+        """עבודות ממתינות שהמשתמש שלהן לא הגיע למגבלה (נקרא תחת נעילה)"""
+        return [
+            job for job in self._pending
+            if self._active.get(job.user_id, 0) < self._max_active_per_user
+        ]
+
+    def try_acquire_slot(self, user_id: int) -> bool:
+        """
+        מקום הורדה נוסף לעבודה שכבר רצה (למשל פריט נוסף באצווה) - בלי המתנה
+
+        Args:
+            user_id: המשתמש של העבודה
+
+        Returns:
+            True אם התקבל מקום (יש לשחרר ב-release_slot)
+        """
+        with self._cond:
+            if self._closing or self._running >= self._workers_count:
+                return False
+            if self._active.get(user_id, 0) >= self._max_active_per_user:
+                return False
+            # עבודות בתור קודמות למקום נוסף של עבודה שכבר רצה
+            if self._eligible():
+                return False
+
+            self._running += 1
+            self._active[user_id] = self._active.get(user_id, 0) + 1
+            return True
+
+    def release_slot(self, user_id: int) -> None:
+        """
+        שחרור מקום שהתקבל ב-try_acquire_slot
+
+        Args:
+            user_id: המשתמש של העבודה
+        """
+        with self._cond:
+            self._release(user_id)
+
+    def _release(self, user_id: int) -> None:
+        """שחרור מקום של עבודה (נקרא תחת נעילה)"""
+        self._running -= 1
+        self._active[user_id] -= 1
+        if not self._active[user_id]:
+            del self._active[user_id]
+        self._cond.notify_all()
+
+    def _worker_loop(self) -> None:
+        """לולאת worker - לוקח עבודות מהתור עד לכיבוי וריקון התור"""
+        while True:
+            with self._cond:
+                job = self._next_job()
+                while job is None:
+                    if self._closing and not self._pending:
+                        return
+                    self._cond.wait()
+                    job = self._next_job()
+
+                self._running += 1
+                self._active[job.user_id] = self._active.get(job.user_id, 0) + 1
+
+            _QUEUE_WAIT.observe(time.monotonic() - job.enqueued, priority=job.priority)
+
+            try:
+                job.func(*job.args)
+            except Exception as e:
+                logger.error(f"[scheduler] שגיאה בעבודה {job.job_id}: {e}", exc_info=True)
+            finally:
+                with self._cond:
+                    self._release(job.user_id)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        מצב נוכחי של המתזמן
+
+        Returns:
+            מילון עם מספר עבודות רצות וממתינות
+        """
+        with self._cond:
+            return {
+                'workers': self._workers_count,
+                'running': self._running,
+                'pending': len(self._pending),
+            }
+
+    def shutdown(self, wait: bool = True, timeout: Optional[float] = None) -> None:
+        """
+        כיבוי מסודר - הפסקת קבלת עבודות וריקון התור
+
+        Args:
+            wait: האם להמתין לסיום כל העבודות
+            timeout: זמן המתנה מקסימלי לכל worker
+        """
+        with self._cond:
+            if self._closing:
+                return
+            self._closing = True
+            pending = len(self._pending)
+            self._cond.notify_all()
+
+        logger.info(f"[scheduler] מכבה את מתזמן ההורדות ({pending} עבודות ממתינות)")
+
+        if wait:
+            for thread in self._threads:
+                thread.join(timeout)
+
+
+_scheduler: Optional[DownloadScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> DownloadScheduler:
+    """קבלת מתזמן ההורדות המשותף (נוצר בקריאה הראשונה)"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DownloadScheduler()
+        return _scheduler
@@ -0,0 +1,191 @@
+"""
+תיקיות עבודה לפי גודל - זיכרון (tmpfs) לעבודות קטנות, דיסק לשאר
+
+רוב העבודות הן קליפים קצרים (TikTok / Instagram) שנכתבים לדיסק ונקראים
+ממנו שוב להעלאה. עבודה שהנפח המוערך שלה קטן מ-RAM_SCRATCH_THRESHOLD
+מקבלת תיקייה תחת RAM_SCRATCH_DIR (לדוגמה /dev/shm), כל עוד סך העבודות
+בזיכרון לא עובר את RAM_SCRATCH_CAP. אחרת - תיקייה רגילה ב-DOWNLOADS_DIR
+עם תקציב הדיסק.
+
+לכל שכבה נמדדים מספר העבודות, הבייטים וזמן ההורדה + ההעלאה, ומהם
+מחושב הזמן שנחסך (בהשוואה לקצב של שכבת הדיסק).
+"""
+
+import logging
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+from config import (
+    RAM_SCRATCH_DIR,
+    RAM_SCRATCH_THRESHOLD,
+    RAM_SCRATCH_CAP,
+    LOCAL_BOT_API_DOWNLOADS_DIR,
+)
+from utils import cleanup_dir
+from utils.metrics import get_registry
+from .disk_budget import DiskBudget, Reservation, get_disk_budget
+from .downloader import create_job_dir
+
+logger = logging.getLogger(__name__)
+
+TIERS = ('ram', 'disk')
+
+_registry = get_registry()
+_JOBS = _registry.counter(
+    'bot_scratch_jobs_total', "עבודות לפי שכבת אחסון וסיבת הבחירה", ('tier', 'reason')
+)
+_BYTES = _registry.counter('bot_scratch_bytes_total', "בייטים שעברו דרך כל שכבה", ('tier',))
+_SECONDS = _registry.counter(
+    'bot_scratch_io_seconds_total', "זמן הורדה + העלאה בכל שכבה", ('tier',)
+)
+_SAVED = _registry.gauge(
+    'bot_scratch_time_saved_seconds', "הערכת הזמן שנחסך בעבודות בזיכרון לעומת דיסק"
+)
+
+
+class Scratch:
+    """תיקיית העבודה של עבודה אחת והנפח ששמור לה"""
+
+    def __init__(self, manager: 'ScratchManager', tier: str, workdir: Path, reservation: Reservation):
+        self.manager = manager
+        self.tier = tier
+        self.workdir = workdir
+        self.reservation = reservation
+
+    def record(self, seconds: float, nbytes: int) -> None:
+        """
+        רישום זמן ההורדה + ההעלאה של העבודה (למדדי השכבה)
+
+        Args:
+            seconds: זמן ההורדה וההעלאה (בלי קידוד)
+            nbytes: גודל הקובץ
+        """
+        self.manager._record(self.tier, seconds, nbytes)
+
+    def release(self) -> None:
+        """מחיקת התיקייה ושחרור הנפח השמור"""
+        cleanup_dir(self.workdir)
+        self.reservation.release()
+
+
+class ScratchManager:
+    """בחירת שכבת אחסון לכל עבודה לפי הנפח המוערך"""
+
+    def __init__(self, ram_dir: str = RAM_SCRATCH_DIR, threshold: int = RAM_SCRATCH_THRESHOLD,
+                 cap: int = RAM_SCRATCH_CAP):
+        self.threshold = threshold
+        self.ram: Optional[DiskBudget] = None
+        self._totals = {tier: {'jobs': 0, 'bytes': 0, 'seconds': 0.0} for tier in TIERS}
+        self._lock = threading.Lock()
+
+        if not ram_dir:
+            return
+        if LOCAL_BOT_API_DOWNLOADS_DIR:
+            # שרת Bot API בקונטיינר אחר רואה רק את תיקיית ההורדות
+            logger.warning("[scratch] RAM_SCRATCH_DIR לא נתמך עם LOCAL_BOT_API_DOWNLOADS_DIR - כבוי")
+            return
+        try:
+            Path(ram_dir).mkdir(parents=True, exist_ok=True)
+        except OSError as e:
+            logger.warning(f"[scratch] לא ניתן ליצור את {ram_dir}: {e} - כבוי")
+            return
+        self.ram = DiskBudget(Path(ram_dir), capacity=cap, min_free=0, tier='ram')
+        logger.info(f"[scratch] עבודות עד {threshold} בייטים בזיכרון ({ram_dir}), תקרה {cap}")
+
+    def acquire(self, nbytes: int, on_wait: Optional[Callable[[], None]] = None) -> Scratch:
+        """
+        הקצאת תיקיית עבודה - בזיכרון אם העבודה קטנה ויש מקום, אחרת בדיסק
+
+        עבודה קטנה לא ממתינה לזיכרון: אם התקרה מלאה היא עוברת לדיסק.
+
+        Args:
+            nbytes: הנפח המוערך (disk_estimate)
+            on_wait: נקרא אם העבודה ממתינה למקום בדיסק
+
+        Returns:
+            Scratch שיש לשחרר בסיום
+
+        Raises:
+            DiskBudgetError: אם אין מקום בדיסק גם אחרי ההמתנה
+        """
+        if self.ram is None:
+            reason = 'disabled'
+        elif nbytes > self.threshold:
+            reason = 'large'
+        else:
+            reservation = self.ram.try_reserve(nbytes)
+            if reservation is not None:
+                try:
+                    workdir = create_job_dir(self.ram.directory)
+                except OSError:
+                    reservation.release()
+                    raise
+                _JOBS.inc(tier='ram', reason='small')
+                return Scratch(self, 'ram', workdir, reservation)
+            reason = 'ram_full'
+
+        reservation = get_disk_budget().reserve(nbytes, on_wait=on_wait)
+        try:
+            workdir = create_job_dir()
+        except OSError:
+            reservation.release()
+            raise
+        _JOBS.inc(tier='disk', reason=reason)
+        return Scratch(self, 'disk', workdir, reservation)
+
+    def _record(self, tier: str, seconds: float, nbytes: int) -> None:
+        with self._lock:
+            totals = self._totals[tier]
+            totals['jobs'] += 1
+            totals['bytes'] += nbytes
+            totals['seconds'] += seconds
+        _BYTES.inc(nbytes, tier=tier)
+        _SECONDS.inc(seconds, tier=tier)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        סטטיסטיקות השכבות
+
+        הזמן שנחסך מוערך כך: הבייטים שעברו בזיכרון כפול ההפרש בין
+        שניות-לבייט בדיסק לשניות-לבייט בזיכרון.
+
+        Returns:
+            מילון עם נתוני כל שכבה, אחוז העבודות בזיכרון והזמן שנחסך
+        """
+        with self._lock:
+            totals = {tier: dict(values) for tier, values in self._totals.items()}
+
+        jobs = sum(t['jobs'] for t in totals.values())
+        ram, disk = totals['ram'], totals['disk']
+        saved = 0.0
+        if ram['bytes'] and disk['bytes']:
+            saved = ram['bytes'] * (disk['seconds'] / disk['bytes'] - ram['seconds'] / ram['bytes'])
+
+        return {
+            'tiers': totals,
+            'ram_hit_rate': (ram['jobs'] / jobs * 100) if jobs else 0.0,
+            'time_saved': saved,
+            'ram_budget': self.ram.stats() if self.ram else None,
+        }
+
+
+_manager: Optional[ScratchManager] = None
+_lock = threading.Lock()
+
+
+def get_scratch() -> ScratchManager:
+    """קבלת מנהל שכבות האחסון המשותף (נוצר בקריאה הראשונה)"""
+    global _manager
+    with _lock:
+        if _manager is None:
+            _manager = ScratchManager()
+        return _manager
+
+
+def _collect() -> None:
+    if _manager is not None:
+        _SAVED.set(_manager.stats()['time_saved'])
+
+
+_registry.add_collector(_collect)
@@ -0,0 +1,232 @@
+"""
+התאמת גודל להעלאה - תכנון לפני ההורדה
+
+במקום לגלות אחרי הורדה מלאה שהקובץ גדול מדי, הגודל מוערך מראש מתוך
+המידע של yt-dlp (filesize / filesize_approx / tbr × duration) ונבחר הפורמט
+הטוב ביותר שנכנס במגבלה. אם אף פורמט לא נכנס - מורידים את הקטן ביותר
+ומקודדים מחדש (ffmpeg, שני מעברים) לקצב שמתאים לגודל.
+"""
+
+import logging
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    SIZE_FIT_MARGIN,
+    SIZE_FIT_TRANSCODE,
+    TRANSCODE_AUDIO_BITRATE,
+    TRANSCODE_MIN_VIDEO_BITRATE,
+)
+from utils.helpers import check_ffmpeg
+from .transcode import transcode_to_size, TranscodeError
+
+logger = logging.getLogger(__name__)
+
+# קצבי mp3 אפשריים להורדת אודיו (kbps), מהגבוה לנמוך
+AUDIO_BITRATES = (192, 160, 128, 96, 64, 48, 32)
+
+
+@dataclass
+class DownloadPlan:
+    """תוכנית הורדה שמתאימה למגבלת הגודל"""
+    format_selector: Optional[str] = None   # None = בורר ברירת המחדל של הפרופיל
+    estimated_size: Optional[int] = None
+    audio_bitrate: Optional[int] = None     # קצב mp3 (אודיו בלבד)
+    transcode: bool = False                 # אף פורמט לא נכנס - קידוד מחדש אחרי ההורדה
+    fits: bool = True                       # False = ידוע מראש שאי אפשר לשלוח
+
+
+def estimate_format_size(fmt: Dict[str, Any], duration: Optional[float]) -> Optional[int]:
+    """
+    הערכת גודל פורמט בבייטים
+
+    Args:
+        fmt: פורמט מ-yt-dlp
+        duration: אורך הסרטון בשניות
+
+    Returns:
+        גודל משוער, או None אם אין מספיק מידע
+    """
+    size = fmt.get('filesize') or fmt.get('filesize_approx')
+    if size:
+        return int(size)
+
+    tbr = fmt.get('tbr') or (fmt.get('vbr') or 0) + (fmt.get('abr') or 0)
+    if tbr and duration:
+        return int(tbr * 1000 / 8 * duration)
+    return None
+
+
+def _best_audio(formats: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """האודיו הטוב ביותר (עדיפות ל-m4a, כמו בורר ברירת המחדל)"""
+    audio = [f for f in formats if f.get('vcodec') == 'none' and f.get('acodec') not in (None, 'none')]
+    if not audio:
+        return None
+    return max(audio, key=lambda f: (f.get('ext') == 'm4a', f.get('abr') or 0))
+
+
+def video_candidates(info: Dict[str, Any],
+                     max_height: Optional[int] = None) -> List[Tuple[int, str, Optional[int]]]:
+    """
+    כל דרכי ההורדה לווידאו עם אודיו, מהעדיף לפחות עדיף
+
+    Args:
+        info: מידע על הסרטון
+        max_height: גובה מקסימלי (None = ללא הגבלה)
+
+    Returns:
+        רשימת (גובה, בורר פורמט, גודל משוער)
+    """
+    formats = info.get('formats') or []
+    duration = info.get('duration')
+    audio = _best_audio(formats)
+    audio_size = estimate_format_size(audio, duration) if audio else None
+
+    candidates = []
+    for fmt in formats:
+        height = fmt.get('height')
+        if not height or fmt.get('vcodec') == 'none' or (max_height and height > max_height):
+            continue
+
+        size = estimate_format_size(fmt, duration)
+        if fmt.get('acodec') not in (None, 'none'):
+            # וידאו ואודיו בקובץ אחד
+            candidates.append((height, fmt.get('ext') == 'mp4', fmt['format_id'], size))
+        elif audio:
+            total = size + audio_size if size and audio_size else None
+            candidates.append((height, fmt.get('ext') == 'mp4', f"{fmt['format_id']}+{audio['format_id']}", total))
+
+    # גובה גבוה קודם, mp4 קודם, ובאותו גובה - האיכות (הגודל) הגבוהה
+    candidates.sort(key=lambda c: (c[0], c[1], c[3] or 0), reverse=True)
+    return [(height, selector, size) for height, _, selector, size in candidates]
+
+
+def heights_fit(info: Dict[str, Any], limit: int) -> Dict[int, Tuple[Optional[int], Optional[bool]]]:
+    """
+    לכל גובה - הגודל המשוער והאם ייכנס במגבלה
+
+    Args:
+        info: מידע על הסרטון
+        limit: מגבלת ההעלאה בבייטים
+
+    Returns:
+        גובה -> (גודל משוער, True/False/None אם לא ידוע)
+    """
+    budget = limit * SIZE_FIT_MARGIN
+    result: Dict[int, Tuple[Optional[int], Optional[bool]]] = {}
+
+    for height, _, size in video_candidates(info):
+        current = result.get(height)
+        if current and current[1]:
+            continue  # כבר נמצאה דרך שנכנסת בגובה הזה
+        if size is None:
+            if not current:
+                result[height] = (None, None)
+        elif size <= budget:
+            result[height] = (size, True)
+        elif not current or (current[0] is not None and size < current[0]):
+            result[height] = (size, False)
+
+    return result
+
+
+def can_transcode(duration: Optional[float], limit: int) -> bool:
+    """
+    האם קידוד מחדש יכול להכניס את הסרטון למגבלה באיכות סבירה
+
+    Args:
+        duration: אורך בשניות
+        limit: גודל מקסימלי בבייטים
+    """
+    if not SIZE_FIT_TRANSCODE or not duration or not check_ffmpeg():
+        return False
+    return _video_bitrate_for(limit * SIZE_FIT_MARGIN, duration) >= TRANSCODE_MIN_VIDEO_BITRATE
+
+
+def _video_bitrate_for(target_bytes: float, duration: float) -> int:
+    """קצב וידאו (kbps) שמשאיר מקום לאודיו בגודל היעד"""
+    return int(target_bytes * 8 / duration / 1000) - TRANSCODE_AUDIO_BITRATE
+
+
+def plan_download(info: Optional[Dict[str, Any]], quality: str,
+                  audio_only: bool, limit: int) -> DownloadPlan:
+    """
+    בחירת הפורמט הטוב ביותר שנכנס במגבלה - לפני שמתחילים להוריד
+
+    Args:
+        info: מידע על הסרטון (יכול להיות None - אז ללא תכנון)
+        quality: איכות נבחרת (best או גובה)
+        audio_only: האם אודיו בלבד
+        limit: מגבלת ההעלאה בבייטים
+
+    Returns:
+        DownloadPlan
+    """
+    if not info:
+        return DownloadPlan()
+
+    duration = info.get('duration')
+    budget = limit * SIZE_FIT_MARGIN
+
+    if audio_only:
+        if not duration:
+            return DownloadPlan()
+        for bitrate in AUDIO_BITRATES:
+            size = int(bitrate * 1000 / 8 * duration)
+            if size <= budget:
+                return DownloadPlan(audio_bitrate=bitrate, estimated_size=size)
+        return DownloadPlan(fits=False)
+
+    max_height = None if quality == 'best' else int(quality)
+    candidates = video_candidates(info, max_height)
+
+    for height, selector, size in candidates:
+        if size is None:
+            # אין הערכה - נשארים עם בורר ברירת המחדל ובדיקה אחרי ההורדה
+            return DownloadPlan()
+        if size <= budget:
+            return DownloadPlan(format_selector=selector, estimated_size=size)
+
+    if not candidates:
+        return DownloadPlan()
+
+    # שום פורמט לא נכנס - הקטן ביותר + קידוד מחדש
+    height, selector, size = min(candidates, key=lambda c: c[2])
+    if can_transcode(duration, limit):
+        logger.info(f"[size_fit] אין פורמט עד {limit} בייטים, {selector} יקודד מחדש")
+        return DownloadPlan(format_selector=selector, estimated_size=size, transcode=True)
+
+    return DownloadPlan(fits=False, estimated_size=size)
+
+
+def fit_file(filepath: str, duration: Optional[float], limit: int) -> Optional[str]:
+    """
+    קידוד מחדש של קובץ שחרג מהמגבלה
+
+    Args:
+        filepath: הקובץ שהורד
+        duration: אורך בשניות
+        limit: מגבלת ההעלאה בבייטים
+
+    Returns:
+        נתיב הקובץ המקודד, או None אם אי אפשר להקטין אותו מספיק (או שהקידוד נכשל)
+    """
+    if not can_transcode(duration, limit):
+        return None
+
+    target = int(limit * SIZE_FIT_MARGIN)
+    try:
+        output = transcode_to_size(
+            filepath, _video_bitrate_for(target, duration), TRANSCODE_AUDIO_BITRATE
+        )
+    except TranscodeError as e:
+        # הפלט של ffmpeg נשאר בלוג - המשתמש מקבל את הודעת "גדול מדי" הרגילה
+        logger.warning(f"[size_fit] הקידוד מחדש נכשל: {e}")
+        return None
+
+    if os.path.getsize(output) > limit:
+        logger.warning(f"[size_fit] גם אחרי קידוד הקובץ גדול מדי: {os.path.getsize(output)}")
+        os.remove(output)
+        return None
+    return output
@@ -0,0 +1,188 @@
+"""
+צינור הורדה-העלאה זורם לפורמטים שלא דורשים מיזוג
+
+yt-dlp כותב את הקובץ ל-stdout, החלקים עוברים דרך חוצץ חסום בזיכרון
+ומשם ישר להעלאה multipart. ההורדה וההעלאה חופפות בזמן, ושום קובץ לא
+נכתב לדיסק - השימוש בזיכרון מוגבל לגודל החלון.
+"""
+
+import logging
+import queue
+import subprocess
+import sys
+import threading
+from typing import Any, Dict, Iterator, List, Optional
+
+from telebot import TeleBot, types
+
+from config import COOKIES_FILE, STREAM_CHUNK_SIZE, STREAM_BUFFER_CHUNKS
+from .bot_api import get_api_limits
+from .uploader import upload_stream, ProgressCallback
+from .ydl_pool import PROXY_URL
+
+logger = logging.getLogger(__name__)
+
+# פרוטוקולים שבהם הקובץ מגיע כזרם אחד רציף (בלי מניפסט/מקטעים)
+_PROGRESSIVE_PROTOCOLS = {'http', 'https'}
+
+# סימון סוף הזרם בתור
+_EOF = object()
+
+
+class StreamError(Exception):
+    """שגיאה בצינור הזורם (yt-dlp נכשל או הקובץ חרג מהמגבלה)"""
+    pass
+
+
+def pick_stream_format(info: Optional[Dict[str, Any]], quality: str) -> Optional[Dict[str, Any]]:
+    """
+    בחירת פורמט שאפשר להזרים ישירות - וידאו+אודיו בקובץ אחד, mp4, HTTP רגיל
+
+    Args:
+        info: מידע (slim_info) על הסרטון
+        quality: איכות נבחרת (best או גובה)
+
+    Returns:
+        הפורמט הנבחר, או None אם אין פורמט מתאים (נדרש מיזוג / מניפסט)
+    """
+    if not info:
+        return None
+
+    max_height = None if quality == 'best' else int(quality)
+    max_size = get_api_limits().max_upload
+    candidates: List[Dict[str, Any]] = []
+
+    for fmt in info.get('formats', []):
+        if fmt.get('vcodec') in (None, 'none') or fmt.get('acodec') in (None, 'none'):
+            continue
+        if fmt.get('ext') != 'mp4' or fmt.get('protocol') not in _PROGRESSIVE_PROTOCOLS:
+            continue
+        if max_height and (fmt.get('height') or 0) > max_height:
+            continue
+        size = fmt.get('filesize') or fmt.get('filesize_approx')
+        if size and size > max_size:
+            continue
+        candidates.append(fmt)
+
+    if not candidates:
+        return None
+
+    return max(candidates, key=lambda f: (f.get('height') or 0, f.get('filesize') or 0))
+
+
+class _StreamReader:
+    """
+    קריאת פלט yt-dlp ב-thread נפרד לתוך תור חסום
+
+    כשהתור מלא ה-thread נחסם, ולכן yt-dlp מאט להקצב של ההעלאה.
+    """
+
+    def __init__(self, url: str, format_id: str):
+        cmd = [
+            sys.executable, '-m', 'yt_dlp',
+            '--quiet', '--no-warnings', '--no-part',
+            '-f', format_id,
+            '-o', '-',
+        ]
+        if COOKIES_FILE.exists():
+            cmd += ['--cookies', str(COOKIES_FILE)]
+        if PROXY_URL:
+            cmd += ['--proxy', PROXY_URL]
+        cmd.append(url)
+
+        self.bytes_read = 0
+        self.max_size = get_api_limits().max_upload
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=STREAM_BUFFER_CHUNKS)
+        self._proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        self._thread = threading.Thread(target=self._pump, name="stream-reader", daemon=True)
+        self._thread.start()
+
+    def _pump(self) -> None:
+        """העברת פלט התהליך לתור עד סוף הזרם"""
+        try:
+            while True:
+                chunk = self._proc.stdout.read(STREAM_CHUNK_SIZE)
+                if not chunk:
+                    break
+                self._queue.put(chunk)
+
+            code = self._proc.wait()
+            if code != 0:
+                stderr = self._proc.stderr.read().decode('utf-8', 'replace').strip()
+                self._queue.put(StreamError(stderr[-200:] or f"yt-dlp exit code {code}"))
+                return
+        except Exception as e:
+            self._queue.put(StreamError(str(e)))
+            return
+
+        self._queue.put(_EOF)
+
+    def chunks(self) -> Iterator[bytes]:
+        """
+        חלקי הקובץ לפי הסדר
+
+        Raises:
+            StreamError: אם yt-dlp נכשל או שהקובץ חרג ממגבלת ההעלאה
+        """
+        while True:
+            item = self._queue.get()
+            if item is _EOF:
+                return
+            if isinstance(item, StreamError):
+                raise item
+
+            self.bytes_read += len(item)
+            if self.bytes_read > self.max_size:
+                self.close()
+                raise StreamError("הקובץ חרג מגודל ההעלאה המקסימלי")
+            yield item
+
+    def close(self) -> None:
+        """עצירת התהליך (אם עדיין רץ) וריקון התור כדי לשחרר את ה-thread"""
+        if self._proc.poll() is None:
+            self._proc.kill()
+        while self._thread.is_alive():
+            try:
+                self._queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+        self._proc.wait()
+
+
+def stream_to_telegram(bot: TeleBot, chat_id: int, url: str, fmt: Dict[str, Any],
+                       caption: str, on_progress: Optional[ProgressCallback] = None) -> types.Message:
+    """
+    הורדה והעלאה במקביל - בלי קובץ זמני בדיסק
+
+    Args:
+        bot: אובייקט הבוט
+        chat_id: הצ'אט היעד
+        url: קישור לסרטון
+        fmt: הפורמט מ-pick_stream_format
+        caption: כיתוב לקובץ
+        on_progress: callback(נשלחו, משוער)
+
+    Returns:
+        ההודעה שנשלחה
+
+    Raises:
+        StreamError: אם ההורדה נכשלה באמצע
+    """
+    expected = fmt.get('filesize') or fmt.get('filesize_approx')
+    reader = _StreamReader(url, fmt['format_id'])
+
+    # מעל מגבלת הווידאו של השרת – שולחים כקובץ רגיל (כמו בהעלאה מהדיסק)
+    if expected and expected > get_api_limits().max_video:
+        method, field, params = 'sendDocument', 'document', {'caption': caption}
+    else:
+        method, field, params = 'sendVideo', 'video', {'caption': caption, 'supports_streaming': True}
+
+    try:
+        message = upload_stream(
+            bot, method, chat_id, field, reader.chunks(), 'video.mp4',
+            params, expected, on_progress
+        )
+        logger.info(f"[streaming] הועלו {reader.bytes_read} בייטים בזרימה ישירה")
+        return message
+    finally:
+        reader.close()
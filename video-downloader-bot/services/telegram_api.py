@@ -0,0 +1,420 @@
+"""
+לקוח HTTP ל-Bot API - חיבורים קבועים, הגבלת קצב ו-flood wait
+
+כל הבקשות של telebot (דרך apihelper.CUSTOM_REQUEST_SENDER) ושל ההעלאה
+הזורמת עוברות כאן:
+- session אחד משותף עם מאגר חיבורים (keep-alive) בגודל TELEGRAM_POOL_SIZE,
+  במקום session נפרד לכל thread
+- דלי אסימונים גלובלי ודלי לכל צ'אט - בקשות ממתינות במקום לקבל 429
+- 429 (Too Many Requests): הצ'אט (או כל הבוט) מושהה ל-retry_after שניות,
+  וכל הבקשות אליו ממתינות עם jitter ואז נשלחות שוב
+- שגיאות רשת ו-5xx: ניסיון חוזר עם backoff אקספוננציאלי ו-jitter - רק
+  כשאפשר לשלוח את גוף הבקשה מחדש. במתודות שיוצרות הודעה (send*) שגיאת רשת
+  חוזרת רק אם החיבור לא נוצר - אחרת ייתכן שההודעה כבר נשלחה (כפילות)
+- זמני ההמתנה נספרים במדדים (bot_api_throttle_seconds_total)
+
+AsyncTeleBot שולח דרך aiohttp (asyncio_helper) ולא דרך ה-session הזה -
+install_api_client עוטף גם אותו, כך שאותם דליים, השהיות flood ומדדים
+חלים על בקשות מלולאת האירועים (בלי לחסום אותה). שגיאות רשת שם לא חוזרות.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+from telebot import apihelper, asyncio_helper
+from telebot.asyncio_helper import ApiTelegramException
+
+from config import (
+    TELEGRAM_POOL_SIZE,
+    TELEGRAM_GLOBAL_RATE,
+    TELEGRAM_CHAT_RATE,
+    TELEGRAM_CHAT_BURST,
+    TELEGRAM_MAX_RETRIES,
+    TELEGRAM_MAX_RETRY_AFTER,
+)
+from utils.metrics import get_registry
+from utils.rate_limit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+# מתודות שלא נספרות במגבלות הקצב (polling, הגדרות)
+_UNTHROTTLED = frozenset({
+    'getUpdates', 'getMe', 'getFile', 'getWebhookInfo',
+    'setWebhook', 'deleteWebhook', 'logOut', 'close',
+})
+# מתודות שיוצרות הודעה - שליחה חוזרת אחרי שהבקשה יצאה עלולה לשכפל אותה
+_NON_IDEMPOTENT_PREFIXES = ('send', 'copy', 'forward')
+_GLOBAL = ''  # מפתח ההשהיה של כל הבוט
+_MAX_CHATS = 10000  # דליים לצ'אטים (הישנים ביותר נמחקים)
+_FLOOD_JITTER = 1.0  # שניות אקראיות מעבר ל-retry_after - שהממתינים לא יתעוררו יחד
+_BACKOFF_BASE = 0.5
+_BACKOFF_MAX = 10.0
+
+_registry = get_registry()
+_REQUESTS = _registry.counter(
+    'bot_api_requests_total', "בקשות ל-Bot API לפי מתודה ותוצאה (ok / קוד HTTP / network)",
+    ('method', 'outcome')
+)
+_RETRIES = _registry.counter(
+    'bot_api_retries_total', "ניסיונות חוזרים ל-Bot API לפי סיבה (flood / server / network)",
+    ('method', 'reason')
+)
+_THROTTLE = _registry.counter(
+    'bot_api_throttle_seconds_total', "זמן המתנה לפני בקשות ל-Bot API (global / chat / flood)",
+    ('scope',)
+)
+
+
+def _method_name(url: str) -> str:
+    return url.rsplit('/', 1)[-1].split('?', 1)[0]
+
+
+def _connect_failed(error: requests.ConnectionError) -> bool:
+    """
+    האם החיבור נכשל לפני שהבקשה נשלחה (timeout בהתחברות, DNS, חיבור שנדחה)
+
+    Args:
+        error: שגיאת הרשת של requests
+
+    Returns:
+        True אם בטוח שהשרת לא קיבל את הבקשה
+    """
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+
+    # requests עוטף את MaxRetryError של urllib3 - הסיבה האמיתית ב-reason
+    seen = set()
+    cause: Optional[BaseException] = error
+    while cause is not None and id(cause) not in seen:
+        seen.add(id(cause))
+        if isinstance(cause, NewConnectionError):
+            return True
+        reason = getattr(cause, 'reason', None)
+        if isinstance(reason, BaseException):
+            cause = reason
+        elif cause.args and isinstance(cause.args[0], BaseException):
+            cause = cause.args[0]
+        else:
+            cause = cause.__cause__ or cause.__context__
+    return False
+
+
+def _retry_after(response: requests.Response) -> float:
+    """retry_after מתשובת 429 (שניות)"""
+    try:
+        return float(response.json().get('parameters', {}).get('retry_after') or 1)
+    except (ValueError, AttributeError):
+        return 1.0
+
+
+def _backoff(attempt: int) -> float:
+    """המתנה לפני ניסיון חוזר - אקספוננציאלי עם jitter"""
+    delay = min(_BACKOFF_MAX, _BACKOFF_BASE * 2 ** attempt)
+    return delay * random.uniform(0.5, 1.0)
+
+
+def _file_positions(files: Optional[Dict[str, Any]]) -> Optional[List[Tuple[Any, int]]]:
+    """
+    מיקומי הקבצים שב-files של telebot - כדי לקרוא אותם שוב בניסיון חוזר
+
+    Returns:
+        רשימת (קובץ, מיקום), או None אם יש קובץ שאי אפשר לחזור בו
+    """
+    positions = []
+    for value in (files or {}).values():
+        fileobj = value[1] if isinstance(value, tuple) else value
+        if isinstance(fileobj, (bytes, str)):
+            continue
+        try:
+            positions.append((fileobj, fileobj.tell()))
+        except (AttributeError, OSError):
+            return None
+    return positions
+
+
+class TelegramApiClient:
+    """session משותף ל-Bot API עם הגבלת קצב וניסיונות חוזרים"""
+
+    def __init__(self, pool_size: int = TELEGRAM_POOL_SIZE,
+                 global_rate: float = TELEGRAM_GLOBAL_RATE,
+                 chat_rate: float = TELEGRAM_CHAT_RATE,
+                 chat_burst: float = TELEGRAM_CHAT_BURST,
+                 max_retries: int = TELEGRAM_MAX_RETRIES,
+                 max_retry_after: float = TELEGRAM_MAX_RETRY_AFTER):
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=max(1, pool_size))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self._global = TokenBucket(rate=global_rate)
+        self._chats: 'OrderedDict[str, TokenBucket]' = OrderedDict()
+        self._paused: Dict[str, float] = {}  # צ'אט (או _GLOBAL) -> monotonic של סוף ההשהיה
+        self._lock = threading.Lock()
+
+    def request(self, http_method: str, url: str, params: Optional[Dict[str, Any]] = None,
+                files: Optional[Dict[str, Any]] = None, **kwargs: Any) -> requests.Response:
+        """
+        שליחת בקשה של telebot (החתימה של apihelper.CUSTOM_REQUEST_SENDER)
+
+        Args:
+            http_method: get / post
+            url: כתובת המתודה
+            params: פרמטרים
+            files: קבצים
+            **kwargs: timeout, proxies
+
+        Returns:
+            התשובה (telebot בודק אותה ומעלה ApiTelegramException)
+        """
+        method = _method_name(url)
+        if method in _UNTHROTTLED:
+            return self.session.request(http_method, url, params=params, files=files, **kwargs)
+
+        positions = _file_positions(files)
+
+        def send() -> requests.Response:
+            for fileobj, position in positions or ():
+                fileobj.seek(position)
+            return self.session.request(http_method, url, params=params, files=files, **kwargs)
+
+        return self.call(method, (params or {}).get('chat_id'), send, retry=positions is not None)
+
+    def call(self, method: str, chat_id: Any, send: Callable[[], requests.Response],
+             retry: bool = True) -> requests.Response:
+        """
+        שליחה עם הגבלת קצב, המתנה ל-flood wait וניסיונות חוזרים
+
+        Args:
+            method: מתודת ה-API (למדדים)
+            chat_id: הצ'אט היעד (None = רק המגבלה הגלובלית)
+            send: שולחת את הבקשה - נקראת שוב בכל ניסיון
+            retry: האם מותר לשלוח שוב (גוף שנקרא פעם אחת - לא)
+
+        Returns:
+            התשובה האחרונה
+
+        Raises:
+            requests.ConnectionError: אם הרשת נכשלה בכל הניסיונות (ב-send* - מיד,
+                אלא אם החיבור לא נוצר)
+        """
+        key = str(chat_id) if chat_id is not None else None
+        attempt = 0
+        idempotent = not method.startswith(_NON_IDEMPOTENT_PREFIXES)
+
+        while True:
+            self._throttle(key)
+            can_retry = retry and attempt < self.max_retries
+            attempt += 1
+
+            try:
+                response = send()
+            except requests.ConnectionError as e:
+                _REQUESTS.inc(method=method, outcome='network')
+                if not can_retry or not (idempotent or _connect_failed(e)):
+                    raise
+                _RETRIES.inc(method=method, reason='network')
+                delay = _backoff(attempt)
+                logger.warning(f"[telegram_api] {method}: שגיאת רשת, ניסיון חוזר בעוד {delay:.1f}s: {e}")
+                time.sleep(delay)
+                continue
+
+            status = response.status_code
+            _REQUESTS.inc(method=method, outcome='ok' if status == 200 else str(status))
+
+            if status == 429:
+                retry_after = _retry_after(response)
+                if retry_after > self.max_retry_after:
+                    logger.warning(f"[telegram_api] {method}: flood wait של {retry_after:.0f}s - מוותר")
+                    return response
+                self._pause(key, retry_after)
+                if not can_retry:
+                    return response
+                _RETRIES.inc(method=method, reason='flood')
+                logger.warning(f"[telegram_api] {method}: 429, ממתין {retry_after:.0f}s (צ'אט {key})")
+                continue
+
+            if status >= 500 and can_retry:
+                _RETRIES.inc(method=method, reason='server')
+                time.sleep(_backoff(attempt))
+                continue
+
+            return response
+
+    async def call_async(self, method: str, chat_id: Any, send: Callable[[], Awaitable[Any]],
+                         retry: bool = True) -> Any:
+        """
+        כמו call, לבקשות של AsyncTeleBot (asyncio_helper)
+
+        Args:
+            method: מתודת ה-API (למדדים)
+            chat_id: הצ'אט היעד (None = רק המגבלה הגלובלית)
+            send: שולחת את הבקשה - נקראת שוב בכל ניסיון
+            retry: האם מותר לשלוח שוב (קבצים שנקראו פעם אחת - לא)
+
+        Returns:
+            התוצאה של send
+
+        Raises:
+            asyncio_helper.ApiTelegramException: שגיאת API (כולל 429 אחרי שנגמרו הניסיונות)
+        """
+        key = str(chat_id) if chat_id is not None else None
+        attempt = 0
+
+        while True:
+            await self._throttle_async(key)
+            can_retry = retry and attempt < self.max_retries
+            attempt += 1
+
+            try:
+                result = await send()
+            except ApiTelegramException as e:
+                status = e.error_code
+                _REQUESTS.inc(method=method, outcome=str(status))
+
+                if status == 429:
+                    retry_after = float(((e.result_json or {}).get('parameters') or {}).get('retry_after') or 1)
+                    if retry_after > self.max_retry_after:
+                        logger.warning(f"[telegram_api] {method}: flood wait של {retry_after:.0f}s - מוותר")
+                        raise
+                    self._pause(key, retry_after)
+                    if not can_retry:
+                        raise
+                    _RETRIES.inc(method=method, reason='flood')
+                    logger.warning(f"[telegram_api] {method}: 429, ממתין {retry_after:.0f}s (צ'אט {key})")
+                    continue
+
+                if status >= 500 and can_retry:
+                    _RETRIES.inc(method=method, reason='server')
+                    await asyncio.sleep(_backoff(attempt))
+                    continue
+                raise
+            except Exception:
+                _REQUESTS.inc(method=method, outcome='network')
+                raise
+
+            _REQUESTS.inc(method=method, outcome='ok')
+            return result
+
+    def _throttle(self, key: Optional[str]) -> None:
+        """המתנה להשהיית flood ולאסימונים של הצ'אט ושל הבוט"""
+        delay, bucket = self._throttle_state(key)
+        if delay > 0:
+            _THROTTLE.inc(delay, scope='flood')
+            time.sleep(delay)
+
+        if bucket is not None:
+            waited = bucket.acquire()
+            if waited:
+                _THROTTLE.inc(waited, scope='chat')
+
+        waited = self._global.acquire()
+        if waited:
+            _THROTTLE.inc(waited, scope='global')
+
+    async def _throttle_async(self, key: Optional[str]) -> None:
+        """כמו _throttle, בלי לחסום את לולאת האירועים"""
+        delay, bucket = self._throttle_state(key)
+        if delay > 0:
+            _THROTTLE.inc(delay, scope='flood')
+            await asyncio.sleep(delay)
+
+        if bucket is not None:
+            waited = await bucket.acquire_async()
+            if waited:
+                _THROTTLE.inc(waited, scope='chat')
+
+        waited = await self._global.acquire_async()
+        if waited:
+            _THROTTLE.inc(waited, scope='global')
+
+    def _throttle_state(self, key: Optional[str]) -> Tuple[float, Optional[TokenBucket]]:
+        """
+        Returns:
+            (המתנה להשהיית flood כולל jitter - 0 אם אין, דלי הצ'אט או None)
+        """
+        with self._lock:
+            until = max(self._paused.get(_GLOBAL, 0.0), self._paused.get(key, 0.0) if key else 0.0)
+            bucket = self._chat_bucket(key) if key else None
+
+        delay = until - time.monotonic()
+        if delay > 0:
+            delay += random.uniform(0, _FLOOD_JITTER)
+        return max(0.0, delay), bucket
+
+    def _chat_bucket(self, key: str) -> TokenBucket:
+        """דלי הצ'אט (נקרא תחת נעילה)"""
+        bucket = self._chats.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.chat_rate, capacity=self.chat_burst)
+            self._chats[key] = bucket
+            while len(self._chats) > _MAX_CHATS:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(key)
+        return bucket
+
+    def _pause(self, key: Optional[str], seconds: float) -> None:
+        """השהיית צ'אט (או כל הבוט, בלי צ'אט) אחרי 429"""
+        now = time.monotonic()
+        with self._lock:
+            target = key if key is not None else _GLOBAL
+            self._paused[target] = max(self._paused.get(target, 0.0), now + seconds)
+            for expired in [k for k, until in self._paused.items() if until <= now]:
+                del self._paused[expired]
+
+
+_client: Optional[TelegramApiClient] = None
+_client_lock = threading.Lock()
+
+
+def get_api_client() -> TelegramApiClient:
+    """קבלת לקוח ה-Bot API המשותף (נוצר בקריאה הראשונה)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = TelegramApiClient()
+        return _client
+
+
+_async_sender: Optional[Callable[..., Awaitable[Any]]] = None  # asyncio_helper._process_request המקורי
+
+
+def install_api_client() -> None:
+    """הפניית כל הבקשות של telebot (סינכרוני ואסינכרוני) דרך הלקוח המשותף"""
+    global _async_sender
+    client = get_api_client()
+    apihelper.CUSTOM_REQUEST_SENDER = client.request
+
+    if _async_sender is None:
+        _async_sender = asyncio_helper._process_request
+    original = _async_sender
+
+    async def process_request(token: str, url: str, method: str = 'get',
+                              params: Optional[Dict[str, Any]] = None,
+                              files: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        # ב-asyncio_helper הפרמטר url הוא שם המתודה
+        if url in _UNTHROTTLED:
+            return await original(token, url, method, params, files, **kwargs)
+
+        def send() -> Awaitable[Any]:
+            # asyncio_helper מוציא את timeout מ-params - עותק לכל ניסיון
+            return original(token, url, method, dict(params) if params else params, files, **kwargs)
+
+        return await client.call_async(url, (params or {}).get('chat_id'), send, retry=not files)
+
+    asyncio_helper._process_request = process_request
+    logger.info(f"[telegram_api] לקוח Bot API: {TELEGRAM_POOL_SIZE} חיבורים, "
+                f"{TELEGRAM_GLOBAL_RATE}/s גלובלי, {TELEGRAM_CHAT_RATE}/s לצ'אט")
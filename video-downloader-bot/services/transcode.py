@@ -0,0 +1,140 @@
+"""
+קידוד מחדש עם ffmpeg - לקצב יעד (שני מעברים) וחילוץ אודיו
+
+קידוד בשני מעברים מודד במעבר הראשון את מורכבות הסרטון ומחלק את הביטים
+בהתאם במעבר השני, כך שגודל הקובץ יוצא קרוב מאוד ליעד.
+
+חילוץ אודיו שומר את הזרם המקורי (‎-c copy) כשהקודק נתמך והקצב שלו לא
+עובר את היעד, ומקודד ל-mp3 רק אחרת. כל ההרצות עוברות דרך מאגר ה-ffmpeg.
+"""
+
+import logging
+import os
+import subprocess
+from typing import List, Optional
+
+from config import DOWNLOAD_TIMEOUT, TRANSCODE_PRESET, AUDIO_COPY_CODECS
+from utils.helpers import check_ffmpeg
+from .ffmpeg_pool import get_ffmpeg_pool
+
+logger = logging.getLogger(__name__)
+
+# קודק -> מכולה לשמירה בלי קידוד מחדש
+AUDIO_CONTAINERS = {'aac': 'm4a', 'mp3': 'mp3', 'opus': 'ogg'}
+_COPY_CODECS = {c.strip().lower() for c in AUDIO_COPY_CODECS.split(',') if c.strip()}
+_BITRATE_TOLERANCE = 1.05  # abr של yt-dlp הוא ממוצע משוער
+
+
+class TranscodeError(Exception):
+    """שגיאה בקידוד ffmpeg"""
+    pass
+
+
+def _run(cmd: List[str], kind: str) -> None:
+    """הרצת ffmpeg במאגר עם מגבלת זמן"""
+    try:
+        result = get_ffmpeg_pool().run(cmd, DOWNLOAD_TIMEOUT, kind=kind)
+    except subprocess.TimeoutExpired:
+        raise TranscodeError("ffmpeg חרג מזמן הקידוד המקסימלי")
+
+    if result.returncode != 0:
+        stderr = result.stderr.decode('utf-8', 'replace').strip()
+        raise TranscodeError(stderr[-300:] or f"ffmpeg exit code {result.returncode}")
+
+
+def transcode_to_size(src: str, video_kbps: int, audio_kbps: int) -> str:
+    """
+    קידוד H.264/AAC בשני מעברים לקצב נתון
+
+    Args:
+        src: קובץ המקור
+        video_kbps: קצב וידאו
+        audio_kbps: קצב אודיו
+
+    Returns:
+        נתיב הקובץ החדש (mp4, ליד המקור)
+
+    Raises:
+        TranscodeError: אם ffmpeg נכשל
+    """
+    base = os.path.splitext(src)[0]
+    output = f"{base}_fit.mp4"
+    passlog = f"{base}_2pass"
+    common = ['-c:v', 'libx264', '-preset', TRANSCODE_PRESET, '-b:v', f'{video_kbps}k', '-passlogfile', passlog]
+
+    logger.info(f"[transcode] {os.path.basename(src)} -> {video_kbps}k וידאו + {audio_kbps}k אודיו")
+
+    try:
+        _run([
+            'ffmpeg', '-y', '-v', 'error', '-i', src, *common, '-pass', '1', '-an', '-f', 'null', os.devnull,
+        ], 'transcode')
+        _run([
+            'ffmpeg', '-y', '-v', 'error', '-i', src, *common, '-pass', '2',
+            '-c:a', 'aac', '-b:a', f'{audio_kbps}k', '-movflags', '+faststart', output,
+        ], 'transcode')
+    except TranscodeError:
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+    finally:
+        for suffix in ('-0.log', '-0.log.mbtree'):
+            if os.path.exists(passlog + suffix):
+                os.remove(passlog + suffix)
+
+    return output
+
+
+def _audio_codec(acodec: Optional[str]) -> Optional[str]:
+    """שם קודק אחיד מה-acodec של yt-dlp (mp4a.40.2 -> aac)"""
+    codec = (acodec or '').lower().split('.', 1)[0]
+    return 'aac' if codec == 'mp4a' else codec or None
+
+
+def extract_audio(src: str, bitrate: int, acodec: Optional[str] = None,
+                  abr: Optional[float] = None, exact: bool = False) -> str:
+    """
+    קובץ אודיו לשליחה - העתקת הזרם כשאפשר, אחרת mp3 בקצב הנתון
+
+    Args:
+        src: הקובץ שהורד (המקור נמחק אם נוצר קובץ חדש)
+        bitrate: קצב היעד (kbps)
+        acodec: הקודק לפי yt-dlp
+        abr: קצב המקור לפי yt-dlp (kbps)
+        exact: הקצב נבחר כדי להיכנס במגבלת גודל - בלי abr ידוע אין העתקה
+
+    Returns:
+        נתיב קובץ האודיו
+
+    Raises:
+        TranscodeError: אם ffmpeg נכשל
+    """
+    base, ext = os.path.splitext(src)
+    codec = _audio_codec(acodec)
+    fits = abr <= bitrate * _BITRATE_TOLERANCE if abr else not exact
+
+    if not check_ffmpeg():
+        logger.warning(f"[transcode] ffmpeg לא מותקן - {os.path.basename(src)} נשלח כמו שהוא")
+        return src
+
+    if codec in _COPY_CODECS and codec in AUDIO_CONTAINERS and fits:
+        container = AUDIO_CONTAINERS[codec]
+        if ext.lower() == f'.{container}':
+            return src
+        output = f"{base}.{container}"
+        args = ['-c:a', 'copy', *(['-movflags', '+faststart'] if container == 'm4a' else [])]
+        kind = 'audio_copy'
+    else:
+        output = f"{base}.{bitrate}k.mp3" if ext.lower() == '.mp3' else f"{base}.mp3"
+        args = ['-c:a', 'libmp3lame', '-b:a', f'{bitrate}k']
+        kind = 'audio_mp3'
+
+    logger.info(f"[transcode] {os.path.basename(src)} ({codec or '?'}) -> {os.path.basename(output)}")
+    try:
+        _run(['ffmpeg', '-y', '-v', 'error', '-i', src, '-map', '0:a:0', '-vn', *args, output], kind)
+    except TranscodeError:
+        if os.path.exists(output):
+            os.remove(output)
+        raise
+
+    os.remove(src)
+    return output
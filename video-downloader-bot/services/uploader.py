@@ -0,0 +1,295 @@
+"""
+העלאת קבצים ל-Bot API ב-multipart זורם
+
+requests (דרך telebot) קורא את כל הקובץ לזיכרון לפני השליחה, כך שאי אפשר
+לדעת כמה כבר עלה. כאן גוף הבקשה נבנה בחלקים ונשלח תוך כדי קריאה מהמקור
+(קובץ או זרם חלקים), עם callback על כל חלק שנשלח.
+"""
+
+import json
+import logging
+import os
+import uuid
+from contextlib import ExitStack
+from dataclasses import dataclass
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import requests
+from telebot import TeleBot, apihelper, types
+from telebot.apihelper import ApiTelegramException
+
+from config import UPLOAD_CHUNK_SIZE, UPLOAD_TIMEOUT
+from .bot_api import api_url
+from .telegram_api import get_api_client
+
+logger = logging.getLogger(__name__)
+
+# callback(נשלחו, סה"כ)
+ProgressCallback = Callable[[int, int], None]
+
+# מקסימום פריטים ב-sendMediaGroup (מגבלת טלגרם)
+MEDIA_GROUP_MAX = 10
+
+
+@dataclass
+class FilePart:
+    """קובץ אחד בגוף ה-multipart"""
+    field: str
+    filename: str
+    chunks: Iterable[bytes]
+    size: Optional[int] = None
+
+
+class MultipartStream:
+    """
+    גוף multipart/form-data שנקרא בחלקים
+
+    כשגודל כל הקבצים ידוע מוגדר __len__ ו-requests שולח Content-Length.
+    כשהוא לא ידוע (זרם) שולחים iter(body) ו-requests עובר ל-chunked encoding.
+    """
+
+    def __init__(self, fields: Dict[str, Any], parts: Sequence[FilePart],
+                 on_progress: Optional[ProgressCallback] = None):
+        self.boundary = uuid.uuid4().hex
+        self.parts = list(parts)
+        self.on_progress = on_progress
+
+        sizes = [part.size for part in self.parts]
+        self.file_size = None if None in sizes else sum(sizes)
+
+        self._fields = b''.join(self._field(k, v) for k, v in fields.items() if v is not None)
+        self._heads = [
+            (
+                f'--{self.boundary}\r\n'
+                f'Content-Disposition: form-data; name="{part.field}"; filename="{part.filename}"\r\n'
+                f'Content-Type: application/octet-stream\r\n\r\n'
+            ).encode('utf-8')
+            for part in self.parts
+        ]
+        self._tail = f'--{self.boundary}--\r\n'.encode('utf-8')
+
+    @property
+    def content_type(self) -> str:
+        return f'multipart/form-data; boundary={self.boundary}'
+
+    def _field(self, name: str, value: Any) -> bytes:
+        if isinstance(value, (dict, list)):
+            value = json.dumps(value)
+        elif isinstance(value, bool):
+            value = 'true' if value else 'false'
+        return (
+            f'--{self.boundary}\r\n'
+            f'Content-Disposition: form-data; name="{name}"\r\n\r\n'
+            f'{value}\r\n'
+        ).encode('utf-8')
+
+    def __len__(self) -> int:
+        if self.file_size is None:
+            raise TypeError("גודל הזרם לא ידוע")
+        # כל קובץ מסתיים ב-CRLF לפני ה-boundary הבא
+        return len(self._fields) + sum(len(head) + 2 for head in self._heads) \
+            + self.file_size + len(self._tail)
+
+    def __iter__(self) -> Iterator[bytes]:
+        yield self._fields
+
+        sent = 0
+        for head, part in zip(self._heads, self.parts):
+            yield head
+            for chunk in part.chunks:
+                sent += len(chunk)
+                yield chunk
+                if self.on_progress:
+                    self.on_progress(sent, self.file_size or 0)
+            yield b'\r\n'
+
+        yield self._tail
+
+
+def read_chunks(fileobj: BinaryIO, chunk_size: int = UPLOAD_CHUNK_SIZE) -> Iterator[bytes]:
+    """
+    קריאת קובץ בחלקים
+
+    Args:
+        fileobj: קובץ פתוח לקריאה בינארית
+        chunk_size: גודל כל חלק
+
+    Yields:
+        חלקי הקובץ
+    """
+    while True:
+        chunk = fileobj.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def upload_file(bot: TeleBot, method: str, chat_id: int, file_field: str, filepath: str,
+                params: Optional[Dict[str, Any]] = None,
+                on_progress: Optional[ProgressCallback] = None,
+                attachments: Optional[Dict[str, str]] = None) -> types.Message:
+    """
+    שליחת קובץ לטלגרם עם דיווח התקדמות
+
+    Args:
+        bot: אובייקט הבוט (לטוקן)
+        method: מתודת ה-API (sendVideo / sendAudio / sendDocument)
+        chat_id: הצ'אט היעד
+        file_field: שם השדה של הקובץ (video / audio / document)
+        filepath: נתיב הקובץ
+        params: פרמטרים נוספים (caption, supports_streaming...)
+        on_progress: callback(נשלחו, סה"כ) אחרי כל חלק
+        attachments: קבצים נוספים {שם: נתיב} - מופנים מ-params כ-attach://שם
+            (לדוגמה thumbnail)
+
+    Returns:
+        ההודעה שנשלחה
+
+    Raises:
+        ApiTelegramException: אם טלגרם החזיר שגיאה
+    """
+    fields = {'chat_id': chat_id, **(params or {})}
+    file_size = os.path.getsize(filepath)
+
+    def open_body(stack: ExitStack) -> MultipartStream:
+        f = stack.enter_context(open(filepath, 'rb'))
+        parts = [FilePart(file_field, os.path.basename(filepath), read_chunks(f), file_size)]
+        parts += _attachment_parts(stack, attachments or {})
+        return MultipartStream(fields, parts, on_progress)
+
+    return types.Message.de_json(_request(bot, method, chat_id, open_body))
+
+
+def upload_stream(bot: TeleBot, method: str, chat_id: int, file_field: str,
+                  chunks: Iterable[bytes], filename: str,
+                  params: Optional[Dict[str, Any]] = None,
+                  expected_size: Optional[int] = None,
+                  on_progress: Optional[ProgressCallback] = None) -> types.Message:
+    """
+    שליחת זרם נתונים שגודלו לא ידוע מראש (chunked transfer encoding)
+
+    Args:
+        bot: אובייקט הבוט (לטוקן)
+        method: מתודת ה-API
+        chat_id: הצ'אט היעד
+        file_field: שם השדה של הקובץ
+        chunks: מקור החלקים (נקרא פעם אחת)
+        filename: שם הקובץ שיוצג בטלגרם
+        params: פרמטרים נוספים
+        expected_size: גודל משוער - לחישוב אחוזים בלבד
+        on_progress: callback(נשלחו, משוער) אחרי כל חלק
+
+    Returns:
+        ההודעה שנשלחה
+    """
+    fields = {'chat_id': chat_id, **(params or {})}
+    body = MultipartStream(fields, [FilePart(file_field, filename, chunks)], on_progress)
+
+    if on_progress and expected_size:
+        body.on_progress = lambda sent, _: on_progress(min(sent, expected_size), expected_size)
+
+    # הזרם נקרא פעם אחת - אין ניסיון חוזר
+    return types.Message.de_json(_request(bot, method, chat_id, lambda stack: body, retry=False))
+
+
+def upload_media_group(bot: TeleBot, chat_id: int, media: Sequence[Tuple[str, str]],
+                       caption: Optional[str] = None,
+                       on_progress: Optional[ProgressCallback] = None,
+                       extras: Optional[Sequence[Dict[str, Any]]] = None) -> List[types.Message]:
+    """
+    שליחת כמה קבצים בבקשה אחת (sendMediaGroup) - אלבום אחד בצ'אט
+
+    Args:
+        bot: אובייקט הבוט (לטוקן)
+        chat_id: הצ'אט היעד
+        media: רשימת (סוג, נתיב) - video / audio / document, עד MEDIA_GROUP_MAX
+        caption: כיתוב לפריט הראשון
+        on_progress: callback(נשלחו, סה"כ) על כל הקבצים יחד
+        extras: שדות נוספים לכל פריט (duration / width / height, ו-thumbnail
+            כנתיב קובץ)
+
+    Returns:
+        ההודעות שנשלחו, בסדר הקבצים
+
+    Raises:
+        ApiTelegramException: אם טלגרם החזיר שגיאה
+    """
+    items = []
+    attachments: Dict[str, str] = {}
+    for index, (media_type, filepath) in enumerate(media):
+        item: Dict[str, Any] = {'type': media_type, 'media': f'attach://file{index}'}
+        if media_type == 'video':
+            item['supports_streaming'] = True
+        if index == 0 and caption:
+            item['caption'] = caption
+        item.update(extras[index] if extras else {})
+        thumbnail = item.pop('thumbnail', None)
+        if thumbnail:
+            attachments[f'thumb{index}'] = thumbnail
+            item['thumbnail'] = f'attach://thumb{index}'
+        items.append(item)
+
+    def open_body(stack: ExitStack) -> MultipartStream:
+        parts = [
+            FilePart(f'file{index}', os.path.basename(filepath),
+                     read_chunks(stack.enter_context(open(filepath, 'rb'))),
+                     os.path.getsize(filepath))
+            for index, (_, filepath) in enumerate(media)
+        ]
+        parts += _attachment_parts(stack, attachments)
+        return MultipartStream({'chat_id': chat_id, 'media': items}, parts, on_progress)
+
+    result = _request(bot, 'sendMediaGroup', chat_id, open_body)
+    return [types.Message.de_json(message) for message in result]
+
+
+def _attachment_parts(stack: ExitStack, attachments: Dict[str, str]) -> List[FilePart]:
+    """חלקי multipart לקבצים נוספים (attach://שם)"""
+    return [
+        FilePart(name, os.path.basename(path), read_chunks(stack.enter_context(open(path, 'rb'))),
+                 os.path.getsize(path))
+        for name, path in attachments.items()
+    ]
+
+
+def _request(bot: TeleBot, method: str, chat_id: int,
+             open_body: Callable[[ExitStack], MultipartStream], retry: bool = True) -> Any:
+    """
+    שליחת גוף multipart ל-API (דרך לקוח ה-API המשותף) והחזרת ה-result
+
+    Args:
+        bot: אובייקט הבוט (לטוקן)
+        method: מתודת ה-API
+        chat_id: הצ'אט היעד (להגבלת הקצב)
+        open_body: בונה את הגוף (קבצים נפתחים על ה-ExitStack) - בכל ניסיון מחדש
+        retry: האם מותר לשלוח שוב
+
+    Raises:
+        ApiTelegramException: אם טלגרם החזיר שגיאה
+    """
+    url = api_url(bot.token, method)
+
+    def send() -> requests.Response:
+        with ExitStack() as stack:
+            body = open_body(stack)
+            return get_api_client().session.post(
+                url,
+                data=body if body.file_size is not None else iter(body),
+                headers={'Content-Type': body.content_type},
+                timeout=(apihelper.CONNECT_TIMEOUT, UPLOAD_TIMEOUT),
+                proxies=apihelper.proxy,
+            )
+
+    response = get_api_client().call(method, chat_id, send, retry=retry)
+
+    try:
+        result = response.json()
+    except ValueError:
+        raise ApiTelegramException(method, response, {
+            'ok': False, 'error_code': response.status_code, 'description': response.text[:200]
+        })
+
+    if not result.get('ok'):
+        raise ApiTelegramException(method, response, result)
+
+    return result['result']
@@ -2,18 +2,40 @@
 שירות לקבלת מידע על סרטונים
 """
 
-import os
 import logging
+import threading
+from concurrent.futures import Future
 from typing import Dict, List, Any, Optional
 
 import yt_dlp
 
-from config import COOKIES_FILE, MAX_QUALITIES
+from config import (
+    MAX_QUALITIES,
+    BATCH_MAX_ENTRIES,
+    INFO_MEMO_TTL,
+    INFO_MEMO_MAX_ENTRIES,
+    INFO_MEMO_MAX_BYTES,
+)
+from utils import canonicalize_url, TTLCache
+from .ydl_pool import get_ydl_pool, base_options
+from .bot_api import get_api_limits
+from .size_fit import heights_fit
+from .metrics import track_stage, register_cache
+from utils.tracing import traced, current_span
 
 logger = logging.getLogger(__name__)
 
-# Proxy אופציונלי (נדרש ל-YouTube ב-Render)
-PROXY_URL = os.getenv('PROXY_URL')
+# זיכרון משותף של מידע שחולץ - לפי URL קנוני, לכל המשתמשים
+_info_memo = TTLCache(
+    max_entries=INFO_MEMO_MAX_ENTRIES,
+    max_bytes=INFO_MEMO_MAX_BYTES,
+    ttl=INFO_MEMO_TTL
+)
+register_cache('info', _info_memo.stats)
+
+# חילוצים שרצים כרגע - בקשות מקבילות לאותו מפתח ממתינות לאותה תוצאה
+_inflight: Dict[str, Future] = {}
+_inflight_lock = threading.Lock()
 
 
 class PrivateContentError(Exception):
@@ -21,66 +43,203 @@ class PrivateContentError(Exception):
     pass
 
 
+@traced('get_video_info')
 def get_video_info(url: str) -> Optional[Dict[str, Any]]:
     """
     קבלת מידע על סרטון מ-URL
 
+    התוצאה נשמרת לזמן קצר לפי ה-URL הקנוני, ובקשות מקבילות לאותו
+    סרטון מחכות לחילוץ אחד במקום להריץ כל אחת בנפרד.
+
     Args:
         url: קישור לסרטון
 
     Returns:
-        מילון עם מידע על הסרטון
+        מילון מצומצם (slim_info) עם מידע על הסרטון
 
     Raises:
         PrivateContentError: אם התוכן פרטי
     """
-    ydl_opts = {
-        'quiet': True,
-        'no_warnings': True,
-        'extract_flat': False,
-    }
+    key = canonicalize_url(url)
+
+    info = _info_memo.get(key)
+    if info is not None:
+        logger.info(f"[video_info] נמצא בזיכרון: {key}")
+        current_span().set(memo='hit')
+        return info
+
+    with _inflight_lock:
+        # בדיקה חוזרת - ייתכן שחילוץ אחר הסתיים בינתיים
+        info = _info_memo.get(key)
+        if info is not None:
+            return info
 
-    # הוספת cookies אם קיים
-    if COOKIES_FILE.exists():
-        ydl_opts['cookiefile'] = str(COOKIES_FILE)
-        logger.info(f"[video_info] משתמש ב-cookies: {COOKIES_FILE}")
-    else:
-        logger.warning(f"[video_info] קובץ cookies לא נמצא: {COOKIES_FILE}")
+        future = _inflight.get(key)
+        is_leader = future is None
+        if is_leader:
+            future = Future()
+            _inflight[key] = future
 
-    # הוספת proxy אם מוגדר
-    if PROXY_URL:
-        ydl_opts['proxy'] = PROXY_URL
-        logger.info("[video_info] משתמש ב-proxy")
+    if not is_leader:
+        logger.info(f"[video_info] ממתין לחילוץ קיים: {key}")
+        current_span().set(memo='inflight')
+        return future.result()
 
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(url, download=False)
-            return info
-
-    except yt_dlp.utils.DownloadError as e:
-        error_msg = str(e).lower()
-        if 'private' in error_msg or 'login' in error_msg or 'sign in' in error_msg:
-            raise PrivateContentError()
+        info = _extract_info(url)
+        if info:
+            info = slim_info(info)
+            _info_memo.set(key, info)
+        future.set_result(info)
+        return info
+
+    except BaseException as e:
+        future.set_exception(e)
         raise
 
-    except Exception as e:
-        logger.error(f"שגיאה בקבלת מידע: {e}")
-        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+
+
+def get_info_memo() -> TTLCache:
+    """קבלת הזיכרון המשותף של מידע שחולץ"""
+    return _info_memo
+
+
+def info_options() -> Dict[str, Any]:
+    """
+    אפשרויות yt-dlp לחילוץ מידע בלבד
+
+    Returns:
+        מילון אפשרויות
+    """
+    ydl_opts = base_options()
+    # פלייליסט מחזיר רשימת קישורים בלבד (בלי חילוץ מלא של כל פריט),
+    # ונטען בעמודים רק עד BATCH_MAX_ENTRIES פריטים
+    ydl_opts['extract_flat'] = 'in_playlist'
+    ydl_opts['lazy_playlist'] = True
+    ydl_opts['playlistend'] = BATCH_MAX_ENTRIES
+    return ydl_opts
+
+
+def _extract_info(url: str) -> Optional[Dict[str, Any]]:
+    """
+    חילוץ מידע מלא מ-yt-dlp (ללא זיכרון)
+
+    Args:
+        url: קישור לסרטון
+
+    Returns:
+        מילון המידע המלא מ-yt-dlp
+
+    Raises:
+        PrivateContentError: אם התוכן פרטי
+    """
+    ydl_opts = info_options()
+
+    with track_stage('info') as labels:
+        try:
+            with get_ydl_pool().acquire('info', ydl_opts) as ydl:
+                info = ydl.extract_info(url, download=False)
+                labels['extractor'] = (info or {}).get('extractor_key') or labels['extractor']
+                return info
+
+        except yt_dlp.utils.DownloadError as e:
+            error_msg = str(e).lower()
+            if 'private' in error_msg or 'login' in error_msg or 'sign in' in error_msg:
+                labels['outcome'] = 'private'
+                raise PrivateContentError()
+            raise
+
+        except Exception as e:
+            logger.error(f"שגיאה בקבלת מידע: {e}")
+            raise
+
+
+# שדות מהמידע של yt-dlp שבהם משתמשים format_video_details ו-get_available_qualities
+_INFO_FIELDS = (
+    'id', 'title', 'duration', 'uploader', 'channel', 'upload_date', 'view_count',
+    'extractor', 'extractor_key', 'webpage_url', 'filesize', 'filesize_approx',
+    '_type', 'playlist_count',
+)
+_ENTRY_FIELDS = ('url', 'id', 'title', 'duration', 'ie_key')
+_FORMAT_FIELDS = (
+    'format_id', 'ext', 'protocol', 'vcodec', 'acodec', 'height', 'tbr', 'vbr', 'abr',
+    'filesize', 'filesize_approx',
+)
+
+
+def slim_info(info: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    יצירת עותק מצומצם של המידע לשמירה בקאש
+
+    המידע המלא מ-yt-dlp יכול להגיע למאות KB (בעיקר בגלל formats),
+    לכן נשמרים רק השדות שבהם משתמשים בפועל.
 
+    Args:
+        info: מילון מידע מ-yt-dlp
+
+    Returns:
+        מילון מצומצם עם אותו מבנה
+    """
+    slim = {k: info[k] for k in _INFO_FIELDS if info.get(k) is not None}
+    slim['formats'] = [
+        {k: fmt[k] for k in _FORMAT_FIELDS if fmt.get(k) is not None}
+        for fmt in info.get('formats') or []
+    ]
+    if is_playlist(info):
+        slim['entries'] = [
+            {k: entry[k] for k in _ENTRY_FIELDS if entry.get(k) is not None}
+            for entry in info.get('entries') or [] if entry
+        ]
+    return slim
 
-def get_available_qualities(info: Dict[str, Any]) -> List[Dict[str, Any]]:
+
+def is_playlist(info: Optional[Dict[str, Any]]) -> bool:
+    """
+    האם המידע הוא פלייליסט / ערוץ (רשימת פריטים) ולא סרטון בודד
+
+    Args:
+        info: מילון מידע מ-yt-dlp
+
+    Returns:
+        True לפלייליסט
+    """
+    return bool(info) and info.get('_type') in ('playlist', 'multi_video')
+
+
+def playlist_urls(info: Dict[str, Any]) -> List[str]:
+    """
+    הקישורים של פריטי פלייליסט (מחילוץ שטוח)
+
+    Args:
+        info: מידע של פלייליסט
+
+    Returns:
+        רשימת קישורים לפי הסדר
+    """
+    return [entry['url'] for entry in info.get('entries') or [] if entry.get('url')]
+
+
+def get_available_qualities(info: Dict[str, Any], max_size: Optional[int] = None) -> List[Dict[str, Any]]:
     """
     חילוץ איכויות זמינות מהמידע
 
     Args:
         info: מילון מידע מ-yt-dlp
+        max_size: מגבלת ההעלאה (ברירת מחדל - לפי שרת ה-API)
 
     Returns:
-        רשימת איכויות זמינות
+        רשימת איכויות זמינות, עם fits - האם הגובה ייכנס במגבלה (None = לא ידוע)
     """
     qualities = []
     seen_heights = set()
 
+    if max_size is None:
+        max_size = get_api_limits().max_upload
+    fit_by_height = heights_fit(info, max_size)
+
     formats = info.get('formats', [])
 
     # סינון ומיון פורמטים עם וידאו
@@ -95,12 +254,14 @@ def get_available_qualities(info: Dict[str, Any]) -> List[Dict[str, Any]]:
         height = fmt.get('height')
         if height and height not in seen_heights:
             seen_heights.add(height)
+            size, fits = fit_by_height.get(height, (None, None))
             qualities.append({
                 'format_id': fmt.get('format_id'),
                 'height': height,
-                'label': f"{height}p",
-                'filesize': fmt.get('filesize') or fmt.get('filesize_approx'),
-                'ext': fmt.get('ext', 'mp4')
+                'label': f"{height}p" if fits is not False else f"{height}p ⚠️",
+                'filesize': size or fmt.get('filesize') or fmt.get('filesize_approx'),
+                'ext': fmt.get('ext', 'mp4'),
+                'fits': fits,
             })
 
     # הוספת אופציית אודיו בלבד
@@ -136,6 +297,14 @@ def format_video_details(info: Dict[str, Any]) -> str:
     from utils import format_duration, format_number, format_size
 
     title = info.get('title', 'לא ידוע')[:100]
+
+    if is_playlist(info):
+        count = info.get('playlist_count') or len(info.get('entries') or [])
+        return f"""📃 *פלייליסט*
+
+*כותרת:* {title}
+
+🎞️ *פריטים:* {count} (יורדו עד {len(info.get('entries') or [])})"""
     duration = format_duration(info.get('duration'))
     uploader = info.get('uploader', info.get('channel', 'לא ידוע'))
 
@@ -0,0 +1,63 @@
+"""
+fixtures משותפים - שרת Bot API מזויף (benchmarks/fake_telegram.py) ובוט שמחובר אליו
+"""
+
+import os
+import sys
+from typing import Any, Dict, Iterator, List, Tuple
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('BOT_TOKEN', '123456:TEST_TOKEN')
+
+from telebot import TeleBot, apihelper, asyncio_helper  # noqa: E402
+
+from benchmarks.fake_telegram import FakeTelegramServer  # noqa: E402
+
+
+@pytest.fixture(scope='session')
+def fake_server() -> Iterator[FakeTelegramServer]:
+    """שרת מזויף אחד לכל הריצה - כל הבקשות של telebot מופנות אליו"""
+    from services import install_api_client
+
+    server = FakeTelegramServer().start()
+    original_url, original_sender = apihelper.API_URL, apihelper.CUSTOM_REQUEST_SENDER
+    original_async_url, original_async_sender = asyncio_helper.API_URL, asyncio_helper._process_request
+    apihelper.API_URL = asyncio_helper.API_URL = server.api_url
+    install_api_client()
+    try:
+        yield server
+    finally:
+        apihelper.API_URL, apihelper.CUSTOM_REQUEST_SENDER = original_url, original_sender
+        asyncio_helper.API_URL, asyncio_helper._process_request = original_async_url, original_async_sender
+        server.stop()
+
+
+@pytest.fixture
+def api_calls(fake_server: FakeTelegramServer) -> Iterator[List[Tuple[str, Dict[str, Any]]]]:
+    """הקריאות שהגיעו לשרת בבדיקה הנוכחית - (מתודה, פרמטרים)"""
+    calls: List[Tuple[str, Dict[str, Any]]] = []
+    fake_server.on_call = lambda method, params: calls.append((method, params))
+    try:
+        yield calls
+    finally:
+        fake_server.on_call = None
+
+
+@pytest.fixture
+def bot(fake_server: FakeTelegramServer) -> TeleBot:
+    return TeleBot(os.environ['BOT_TOKEN'], threaded=False)
+
+
+@pytest.fixture
+def cloud_api(monkeypatch: pytest.MonkeyPatch) -> None:
+    """ענן טלגרם - העלאת בייטים, מגבלת 50MB"""
+    monkeypatch.setattr('services.bot_api.LOCAL_BOT_API_URL', '')
+
+
+@pytest.fixture
+def local_api(monkeypatch: pytest.MonkeyPatch, fake_server: FakeTelegramServer) -> None:
+    """שרת Bot API מקומי (--local) - שליחת נתיב file://, מגבלת 2000MB"""
+    monkeypatch.setattr('services.bot_api.LOCAL_BOT_API_URL', fake_server.base_url)
+    monkeypatch.setattr('services.bot_api.LOCAL_BOT_API_DOWNLOADS_DIR', '')
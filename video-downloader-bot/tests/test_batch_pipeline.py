@@ -0,0 +1,84 @@
+"""
+צינור האצווה (StreamingPipeline) - שגיאות לא עוצרות את הצינור ולא תוקעות את run()
+"""
+
+import json
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, List
+
+import pytest
+
+from handlers.sending import send_media_group
+from services import MEDIA_GROUP_MAX
+from services.batch import Stage, StreamingPipeline
+
+
+def _run(pipeline: StreamingPipeline, items: List[Any], timeout: float = 10) -> None:
+    thread = threading.Thread(target=pipeline.run, args=(items,), daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "run() לא הסתיים"
+
+
+def _odd_fails(item: int) -> List[int]:
+    if item % 2:
+        raise ValueError(item)
+    return [item]
+
+
+def test_failed_items_reported_and_dropped() -> None:
+    done: List[int] = []
+    errors: List[Any] = []
+    pipeline = StreamingPipeline(
+        [Stage('first', _odd_fails, workers=2), Stage('second', lambda item: done.append(item))],
+        on_error=lambda stage, item, error: errors.append((stage, item)),
+    )
+
+    _run(pipeline, list(range(6)))
+
+    assert sorted(done) == [0, 2, 4]
+    assert sorted(errors) == [('first', 1), ('first', 3), ('first', 5)]
+
+
+def test_failing_on_error_does_not_hang_run() -> None:
+    done: List[int] = []
+
+    def broken_on_error(stage: str, item: Any, error: Exception) -> None:
+        raise RuntimeError("on_error broke")
+
+    pipeline = StreamingPipeline(
+        [Stage('first', _odd_fails, workers=2), Stage('second', lambda item: done.append(item))],
+        on_error=broken_on_error,
+    )
+
+    _run(pipeline, list(range(6)))
+
+    assert sorted(done) == [0, 2, 4]
+
+
+@pytest.mark.parametrize('count', [2, 10, 12, 23])
+def test_finished_items_sent_as_full_albums(count: int, cloud_api, bot, api_calls,
+                                            tmp_path: Path) -> None:
+    def download(index: int) -> List[str]:
+        # הורדות בקצב לא אחיד - התור לשלב ההעלאה מתרוקן ביניהן
+        time.sleep(0.02 * (index % 3))
+        path = tmp_path / f'{index}.mp4'
+        path.write_bytes(b'\0' * 1024)
+        return [str(path)]
+
+    def upload(paths: List[str]) -> None:
+        send_media_group(bot, 1, paths, audio_only=False)
+
+    pipeline = StreamingPipeline([
+        Stage('download', download, workers=2),
+        Stage('upload', upload, workers=2, group=MEDIA_GROUP_MAX),
+    ], queue_size=1)
+
+    _run(pipeline, list(range(count)))
+
+    methods = [method for method, _ in api_calls]
+    assert methods == ['sendMediaGroup'] * math.ceil(count / MEDIA_GROUP_MAX)
+    assert sum(len(json.loads(params['media'])) for _, params in api_calls) == count
@@ -0,0 +1,117 @@
+"""
+מקומות הורדה לאצווה - פריטי אצווה נספרים במגבלות המתזמן (גלובלית ולמשתמש)
+"""
+
+import threading
+import time
+from typing import Callable, Iterator, List
+
+import pytest
+
+from handlers.batch import DownloadSlots
+from services.scheduler import DownloadScheduler
+
+SchedulerFactory = Callable[..., DownloadScheduler]
+
+
+@pytest.fixture
+def make_scheduler() -> Iterator[SchedulerFactory]:
+    schedulers: List[DownloadScheduler] = []
+
+    def make(workers: int = 3, max_active_per_user: int = 1) -> DownloadScheduler:
+        scheduler = DownloadScheduler(workers=workers, max_queue=10,
+                                      max_active_per_user=max_active_per_user,
+                                      max_queued_per_user=10)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown(wait=True, timeout=5)
+
+
+def _run_in_job(scheduler: DownloadScheduler, user_id: int, func: Callable[[], None]) -> None:
+    """הרצת func כעבודה במתזמן והמתנה לסיומה (שגיאות עוברות לבדיקה)"""
+    done = threading.Event()
+    errors: List[BaseException] = []
+
+    def job() -> None:
+        try:
+            func()
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    scheduler.submit(user_id, job)
+    assert done.wait(10), "העבודה לא הסתיימה"
+    if errors:
+        raise errors[0]
+
+
+def _batch_concurrency(scheduler: DownloadScheduler, items: int = 4) -> int:
+    """כמה 'הורדות' של אצווה רצו במקביל לכל היותר"""
+    peak = 0
+    active = 0
+    lock = threading.Lock()
+
+    def batch() -> None:
+        slots = DownloadSlots(1, scheduler, poll=0.01)
+
+        def download() -> None:
+            nonlocal peak, active
+            with slots.hold():
+                with lock:
+                    active += 1
+                    peak = max(peak, active)
+                time.sleep(0.05)
+                with lock:
+                    active -= 1
+
+        threads = [threading.Thread(target=download) for _ in range(items)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    _run_in_job(scheduler, 1, batch)
+    return peak
+
+
+def test_batch_respects_per_user_limit(make_scheduler: SchedulerFactory) -> None:
+    assert _batch_concurrency(make_scheduler(workers=3, max_active_per_user=1)) == 1
+
+
+def test_batch_uses_free_slots_within_limits(make_scheduler: SchedulerFactory) -> None:
+    assert _batch_concurrency(make_scheduler(workers=3, max_active_per_user=2)) == 2
+    assert _batch_concurrency(make_scheduler(workers=2, max_active_per_user=5)) == 2
+
+
+def test_extra_slot_counts_against_global_limit(make_scheduler: SchedulerFactory) -> None:
+    scheduler = make_scheduler(workers=2, max_active_per_user=5)
+
+    def batch() -> None:
+        assert scheduler.try_acquire_slot(1)
+        # שני המקומות תפוסים (העבודה עצמה + הנוסף)
+        assert not scheduler.try_acquire_slot(1)
+        assert scheduler.stats()['running'] == 2
+        scheduler.release_slot(1)
+        assert scheduler.stats()['running'] == 1
+
+    _run_in_job(scheduler, 1, batch)
+
+
+def test_queued_job_beats_extra_slot(make_scheduler: SchedulerFactory) -> None:
+    scheduler = make_scheduler(workers=2, max_active_per_user=5)
+    started = threading.Event()
+
+    def batch() -> None:
+        assert scheduler.try_acquire_slot(1)
+        # משתמש אחר נכנס לתור בזמן שהאצווה מחזיקה את שני המקומות
+        scheduler.submit(2, started.set)
+        scheduler.release_slot(1)
+        # המקום שהתפנה שייך לעבודה שבתור, לא לעוד פריט של האצווה
+        assert not scheduler.try_acquire_slot(1)
+        assert started.wait(5)
+
+    _run_in_job(scheduler, 1, batch)
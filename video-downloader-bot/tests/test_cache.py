@@ -0,0 +1,124 @@
+"""
+TTLCache - תפוגה לפי זמן, פינוי LRU ותקציב בייטים
+"""
+
+from types import SimpleNamespace
+from typing import List
+
+import pytest
+
+from utils import TTLCache
+from utils.cache import estimate_size
+
+
+class FakeClock:
+    """שעון monotonic מזויף - הזמן מתקדם רק ב-advance"""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float) -> None:
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    fake = FakeClock()
+    monkeypatch.setattr('utils.cache.time', SimpleNamespace(monotonic=fake.monotonic))
+    return fake
+
+
+def _value(size: int) -> str:
+    """מחרוזת שגודלה המשוער (JSON) הוא size בייטים"""
+    return 'x' * (size - 2)
+
+
+def test_entries_expire_after_ttl(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=10, max_bytes=1000, ttl=60)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=10)
+
+    clock.advance(30)
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert 'b' not in cache
+
+    clock.advance(30)
+    assert cache.get('a', 'gone') == 'gone'
+    assert cache.stats()['expirations'] == 2
+
+
+def test_update_keeps_expiry(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=10, max_bytes=1000, ttl=60)
+    cache.set('a', {'n': 1})
+
+    clock.advance(50)
+    assert cache.update('a', n=2)
+    assert cache.get('a') == {'n': 2}
+
+    clock.advance(10)
+    assert cache.get('a') is None
+    assert not cache.update('a', n=3)
+
+
+def test_lru_eviction_by_count(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=3, max_bytes=1000, ttl=60)
+    for key in 'abc':
+        cache.set(key, key)
+
+    cache.get('a')  # a הופך לאחרון בשימוש - b הוא הישן
+    cache.set('d', 'd')
+
+    assert [key for key in 'abcd' if key in cache] == ['a', 'c', 'd']
+    assert cache.stats()['evictions'] == 1
+
+
+def test_byte_budget_evicts_oldest(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=100, max_bytes=100, ttl=60)
+    for key in 'abc':
+        cache.set(key, _value(40))
+    assert estimate_size(_value(40)) == 40
+
+    assert [key for key in 'abc' if key in cache] == ['b', 'c']
+    assert cache.stats()['bytes'] == 80
+
+    # החלפת ערך מעדכנת את מונה הבייטים
+    cache.set('c', _value(10))
+    assert cache.stats()['bytes'] == 50
+
+
+def test_value_larger_than_budget_not_stored(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=10, max_bytes=100, ttl=60)
+    cache.set('a', _value(50))
+    cache.set('big', _value(101))
+
+    assert 'big' not in cache
+    assert cache.get('a') == _value(50)
+
+
+def test_expired_entries_evicted_before_live_ones(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=2, max_bytes=1000, ttl=60)
+    cache.set('old', 1)
+    cache.set('short', 2, ttl=5)
+
+    clock.advance(10)
+    cache.set('new', 3)
+
+    # short פג - הוא מפונה, ו-old (הישן ב-LRU) נשאר
+    kept: List[str] = [key for key in ('old', 'short', 'new') if key in cache]
+    assert kept == ['old', 'new']
+    assert cache.stats()['evictions'] == 0
+
+
+def test_purge_expired(clock: FakeClock) -> None:
+    cache = TTLCache(max_entries=10, max_bytes=1000, ttl=60)
+    cache.set('a', 1, ttl=5)
+    cache.set('b', 2, ttl=5)
+    cache.set('c', 3)
+
+    clock.advance(10)
+    assert cache.purge_expired() == 2
+    assert len(cache) == 1
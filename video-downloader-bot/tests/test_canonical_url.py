@@ -0,0 +1,80 @@
+"""
+URL קנוני - קישורים לאותו תוכן מתאחדים, ותוכן שונה (פלייליסט מול סרטון) לא
+"""
+
+from typing import Any, Dict, List
+
+import pytest
+
+import services.video_info as video_info
+from services.cache_backend import MemoryCacheBackend
+from utils import TTLCache, canonicalize_url
+
+VIDEO_ID = 'dQw4w9WgXcQ'
+PLAIN = f'https://www.youtube.com/watch?v={VIDEO_ID}'
+IN_PLAYLIST = f'https://www.youtube.com/watch?v={VIDEO_ID}&list=PL1234567890'
+
+
+@pytest.mark.parametrize('url', [
+    f'https://youtu.be/{VIDEO_ID}?si=abc',
+    f'https://m.youtube.com/watch?v={VIDEO_ID}&feature=share',
+    f'https://www.youtube.com/shorts/{VIDEO_ID}',
+    f'http://youtube.com/watch?pp=xyz&v={VIDEO_ID}',
+])
+def test_youtube_forms_share_key(url: str) -> None:
+    assert canonicalize_url(url) == PLAIN
+
+
+@pytest.mark.parametrize('url', [
+    IN_PLAYLIST,
+    f'https://youtu.be/{VIDEO_ID}?list=PL1234567890&si=abc',
+    f'https://www.youtube.com/watch?list=PL1234567890&index=3&v={VIDEO_ID}',
+])
+def test_youtube_playlist_link_keeps_list(url: str) -> None:
+    assert canonicalize_url(url) == IN_PLAYLIST
+
+
+@pytest.mark.parametrize('url, expected', [
+    ('https://example.com/v?id=1&utm_source=x&fbclid=y', 'https://example.com/v?id=1'),
+    ('http://example.com:8080/v/', 'http://example.com:8080/v'),
+    ('https://example.com:443/v', 'https://example.com/v'),
+    ('https://x.com/user/status/1?s=20&t=abc', 'https://twitter.com/user/status/1'),
+    ('https://vimeo.com/1?s=keep', 'https://vimeo.com/1?s=keep'),
+])
+def test_other_sites(url: str, expected: str) -> None:
+    assert canonicalize_url(url) == expected
+
+
+@pytest.fixture
+def extracted(monkeypatch: pytest.MonkeyPatch) -> List[str]:
+    """yt-dlp מזויף - list= מחזיר פלייליסט, כמו yt-dlp בלי noplaylist"""
+    calls: List[str] = []
+
+    def fake_extract(url: str) -> Dict[str, Any]:
+        calls.append(url)
+        if 'list=' in url:
+            return {'_type': 'playlist', 'id': 'PL1234567890',
+                    'entries': [{'url': PLAIN, 'id': VIDEO_ID}]}
+        return {'id': VIDEO_ID, 'title': 'video', 'duration': 10, 'formats': []}
+
+    monkeypatch.setattr(video_info, '_extract_info', fake_extract)
+    monkeypatch.setattr(video_info, '_info_memo', TTLCache(max_entries=10, max_bytes=1 << 20, ttl=60))
+    return calls
+
+
+@pytest.mark.parametrize('first, second', [(PLAIN, IN_PLAYLIST), (IN_PLAYLIST, PLAIN)])
+def test_info_memo_keeps_playlist_and_video_apart(extracted: List[str], first: str, second: str) -> None:
+    infos = {url: video_info.get_video_info(url) for url in (first, second)}
+
+    assert video_info.is_playlist(infos[IN_PLAYLIST])
+    assert not video_info.is_playlist(infos[PLAIN])
+    assert extracted == [first, second]
+
+
+@pytest.mark.parametrize('first, second', [(PLAIN, IN_PLAYLIST), (IN_PLAYLIST, PLAIN)])
+def test_find_by_url_keeps_playlist_and_video_apart(first: str, second: str) -> None:
+    cache = MemoryCacheBackend()
+    cache.set('first', {'url': first, 'info': {'id': first}})
+
+    assert cache.find_by_url(second) is None
+    assert cache.find_by_url(first)[0] == 'first'
@@ -0,0 +1,56 @@
+"""
+needs_faststart - סריקת ה-boxes העליונים של MP4 בלי ffmpeg
+"""
+
+import struct
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from services.media_prep import needs_faststart
+
+FTYP = struct.pack('>I4s', 16, b'ftyp') + b'isom\0\0\0\1'
+
+
+def _box(name: bytes, payload: bytes = b'') -> bytes:
+    return struct.pack('>I4s', 8 + len(payload), name) + payload
+
+
+def _large_box(name: bytes, payload: bytes = b'') -> bytes:
+    """box עם גודל 64 ביט (size = 1 ואחריו הגודל האמיתי)"""
+    return struct.pack('>I4sQ', 1, name, 16 + len(payload)) + payload
+
+
+MOOV = _box(b'moov', _box(b'mvhd', b'\0' * 100))
+MDAT = _box(b'mdat', b'\0' * 4096)
+
+
+@pytest.mark.parametrize('boxes, expected', [
+    ([FTYP, MOOV, MDAT], False),
+    ([FTYP, MDAT, MOOV], True),
+    ([FTYP, _box(b'free', b'\0' * 32), MDAT, MOOV], True),
+    ([FTYP, _box(b'free'), MOOV, MDAT], False),
+    # גודל 64 ביט - הסריקה מדלגת על כל ה-box ולא רק על הכותרת
+    ([FTYP, _large_box(b'wide', b'\0' * 64), MOOV, MDAT], False),
+    ([FTYP, _large_box(b'mdat', b'\0' * 4096), MOOV], True),
+    # moov שמופיע רק בתוך נתונים של box אחר לא נחשב
+    ([FTYP, _box(b'uuid', MOOV), MDAT, MOOV], True),
+])
+def test_top_level_box_order(tmp_path: Path, boxes: List[bytes], expected: bool) -> None:
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b''.join(boxes))
+    assert needs_faststart(str(path)) is expected
+
+
+@pytest.mark.parametrize('data', [
+    b'',
+    FTYP[:5],
+    FTYP,
+    FTYP + struct.pack('>I4s', 1, b'wide') + b'\0\0',  # גודל 64 ביט שנקטע
+    FTYP + struct.pack('>I4s', 0, b'free') + MDAT,      # size 0 - עד סוף הקובץ
+])
+def test_unreadable_layouts_left_alone(tmp_path: Path, data: bytes) -> None:
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(data)
+    assert needs_faststart(str(path)) is False
@@ -0,0 +1,39 @@
+"""
+הורדה בטווחים - ניקוי הקובץ החלקי אחרי כשל, ורישום מוגן ב-yt-dlp
+"""
+
+from pathlib import Path
+
+import pytest
+import yt_dlp
+from yt_dlp.downloader import external
+from yt_dlp.networking.exceptions import TransportError
+from yt_dlp.utils.networking import HTTPHeaderDict
+
+from services import range_download
+from services.range_download import DOWNLOADER_NAME, ParallelRangeFD
+
+
+def test_failed_ranges_remove_partial_file(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    def broken_part(self, url, headers, fd, byte_range, report) -> None:
+        raise TransportError('connection reset')
+
+    monkeypatch.setattr(ParallelRangeFD, '_download_part', broken_part)
+    filename = str(tmp_path / 'video.mp4')
+
+    with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+        fd = ParallelRangeFD(ydl, ydl.params)
+        with pytest.raises(TransportError):
+            fd._download_ranges(filename, {'url': 'http://127.0.0.1/v.mp4'}, HTTPHeaderDict(), 1024, 4)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_registered_as_external_downloader() -> None:
+    assert range_download.RANGE_AVAILABLE
+    assert external.get_external_downloader(DOWNLOADER_NAME) is ParallelRangeFD
+
+
+def test_register_without_private_hook(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.delattr(external, '_BY_NAME')
+    assert not range_download._register()
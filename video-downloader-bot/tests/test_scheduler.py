@@ -0,0 +1,152 @@
+"""
+מתזמן ההורדות - מגבלות גלובליות ולמשתמש, ותור הוגן משוקלל (WFQ)
+"""
+
+import threading
+from typing import Callable, Iterator, List, Tuple
+
+import pytest
+
+from services.scheduler import (
+    DownloadScheduler,
+    QueueFullError,
+    SchedulerClosedError,
+    UserLimitError,
+)
+
+SchedulerFactory = Callable[..., DownloadScheduler]
+
+
+@pytest.fixture
+def make_scheduler() -> Iterator[SchedulerFactory]:
+    schedulers: List[DownloadScheduler] = []
+
+    def make(workers: int = 1, max_queue: int = 10, max_active_per_user: int = 1,
+             max_queued_per_user: int = 10) -> DownloadScheduler:
+        scheduler = DownloadScheduler(workers=workers, max_queue=max_queue,
+                                      max_active_per_user=max_active_per_user,
+                                      max_queued_per_user=max_queued_per_user)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make
+    for scheduler in schedulers:
+        scheduler.shutdown(wait=True, timeout=5)
+
+
+def _blocker(scheduler: DownloadScheduler, user_id: int) -> threading.Event:
+    """עבודה שתופסת worker עד שמשחררים אותה (מחזיר את האירוע לשחרור)"""
+    started, release = threading.Event(), threading.Event()
+
+    def job() -> None:
+        started.set()
+        release.wait(10)
+
+    scheduler.submit(user_id, job)
+    assert started.wait(5), "העבודה החוסמת לא התחילה"
+    return release
+
+
+def test_per_user_active_limit(make_scheduler: SchedulerFactory) -> None:
+    scheduler = make_scheduler(workers=2, max_active_per_user=1)
+    release = _blocker(scheduler, 1)
+    second, other = threading.Event(), threading.Event()
+
+    scheduler.submit(1, second.set)
+    scheduler.submit(2, other.set)
+
+    # יש worker פנוי, אבל רק המשתמש השני מקבל אותו
+    assert other.wait(5)
+    assert not second.wait(0.2)
+    release.set()
+    assert second.wait(5)
+
+
+def test_queue_limits(make_scheduler: SchedulerFactory) -> None:
+    scheduler = make_scheduler(workers=1, max_queue=3, max_queued_per_user=2)
+    release = _blocker(scheduler, 1)
+
+    assert scheduler.submit(1, lambda: None) == 1
+    scheduler.submit(1, lambda: None)
+    with pytest.raises(UserLimitError):
+        scheduler.submit(1, lambda: None)
+
+    scheduler.submit(2, lambda: None)
+    with pytest.raises(QueueFullError):
+        scheduler.submit(3, lambda: None)
+
+    assert scheduler.stats() == {'workers': 1, 'running': 1, 'pending': 3}
+    release.set()
+
+
+def test_shutdown_drains_queue_and_rejects_new_jobs(make_scheduler: SchedulerFactory) -> None:
+    scheduler = make_scheduler(workers=1)
+    release = _blocker(scheduler, 1)
+    done: List[int] = []
+    for user_id in (2, 3):
+        scheduler.submit(user_id, done.append, user_id)
+
+    threading.Timer(0.1, release.set).start()
+    scheduler.shutdown(wait=True, timeout=5)
+
+    assert sorted(done) == [2, 3]
+    with pytest.raises(SchedulerClosedError):
+        scheduler.submit(1, lambda: None)
+
+
+def test_failing_job_frees_its_worker(make_scheduler: SchedulerFactory) -> None:
+    scheduler = make_scheduler(workers=1)
+    done = threading.Event()
+
+    def broken() -> None:
+        raise RuntimeError("boom")
+
+    scheduler.submit(1, broken)
+    scheduler.submit(1, done.set)
+    assert done.wait(5)
+
+
+def _run_order(scheduler: DownloadScheduler, jobs: List[Tuple[str, int, float]]) -> List[str]:
+    """
+    הכנסת עבודות (שם, משתמש, עלות) מאחורי עבודה חוסמת - מחזיר את סדר ההרצה
+    """
+    release = _blocker(scheduler, 0)
+    order: List[str] = []
+    finished = threading.Event()
+
+    def run(name: str) -> None:
+        order.append(name)
+        if len(order) == len(jobs):
+            finished.set()
+
+    for name, user_id, cost in jobs:
+        scheduler.submit(user_id, run, name, cost=cost)
+    release.set()
+    assert finished.wait(5)
+    return order
+
+
+def test_single_request_not_stuck_behind_bulk_user(make_scheduler: SchedulerFactory) -> None:
+    jobs = [(f'a{i}', 1, 1.0) for i in range(4)] + [('b', 2, 1.0)]
+    assert _run_order(make_scheduler(), jobs) == ['a0', 'b', 'a1', 'a2', 'a3']
+
+
+def test_cheap_job_runs_before_expensive(make_scheduler: SchedulerFactory) -> None:
+    jobs = [('video', 1, 50.0), ('audio', 2, 5.0)]
+    assert _run_order(make_scheduler(), jobs) == ['audio', 'video']
+
+
+def test_tags_interleave_users_by_cost(make_scheduler: SchedulerFactory) -> None:
+    # תגים מעל הזמן הווירטואלי: a - 2, 4, 6 / b - 3, 5
+    jobs = [('a1', 1, 2.0), ('a2', 1, 2.0), ('a3', 1, 2.0), ('b1', 2, 3.0), ('b2', 2, 2.0)]
+    assert _run_order(make_scheduler(), jobs) == ['a1', 'b1', 'a2', 'b2', 'a3']
+
+
+def test_higher_weight_advances_faster(make_scheduler: SchedulerFactory,
+                                       monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr('services.scheduler.ADMIN_USER_IDS', {9})
+    monkeypatch.setattr('services.scheduler._weights', {'admin': 8.0, 'user': 1.0})
+
+    # אותה עלות - לאדמין התג מתקדם בשמינית
+    jobs = [('user1', 1, 8.0), ('user2', 1, 8.0), ('admin1', 9, 8.0), ('admin2', 9, 8.0)]
+    assert _run_order(make_scheduler(), jobs) == ['admin1', 'admin2', 'user1', 'user2']
@@ -0,0 +1,112 @@
+"""
+תכנון גודל לפני ההורדה - בחירת הפורמט שנכנס במגבלה וקצב האודיו
+"""
+
+from typing import Any, Dict, Optional
+
+import pytest
+
+from services.size_fit import DownloadPlan, estimate_format_size, plan_download, video_candidates
+
+MB = 1_000_000
+
+
+def _fmt(format_id: str, height: Optional[int] = None, ext: str = 'mp4', size: Optional[int] = None,
+         vcodec: str = 'avc1', acodec: str = 'none', **extra: Any) -> Dict[str, Any]:
+    return {'format_id': format_id, 'height': height, 'ext': ext, 'filesize': size,
+            'vcodec': vcodec, 'acodec': acodec, **extra}
+
+
+INFO: Dict[str, Any] = {
+    'duration': 100,
+    'formats': [
+        _fmt('a-m4a', ext='m4a', size=1_600_000, vcodec='none', acodec='mp4a', abr=128),
+        _fmt('a-webm', ext='webm', size=2 * MB, vcodec='none', acodec='opus', abr=160),
+        _fmt('1080', 1080, size=50 * MB),
+        _fmt('720', 720, size=20 * MB),
+        _fmt('720w', 720, ext='webm', size=15 * MB, vcodec='vp9'),
+        _fmt('360c', 360, size=5 * MB, acodec='mp4a'),
+        _fmt('240', 240, tbr=200),  # בלי filesize - הערכה לפי tbr × משך
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def exact_budget(monkeypatch: pytest.MonkeyPatch) -> None:
+    """בלי מרווח ביטחון ובלי קידוד מחדש - כל בדיקה מפעילה מה שהיא צריכה"""
+    monkeypatch.setattr('services.size_fit.SIZE_FIT_MARGIN', 1.0)
+    monkeypatch.setattr('services.size_fit.SIZE_FIT_TRANSCODE', False)
+
+
+def test_estimate_from_bitrate() -> None:
+    assert estimate_format_size({'tbr': 200}, 100) == 2_500_000
+    assert estimate_format_size({'vbr': 150, 'abr': 50}, 100) == 2_500_000
+    assert estimate_format_size({'filesize_approx': 123}, None) == 123
+    assert estimate_format_size({'tbr': 200}, None) is None
+
+
+def test_candidates_order_and_audio_pairing() -> None:
+    selectors = [selector for _, selector, _ in video_candidates(INFO)]
+    assert selectors == ['1080+a-m4a', '720+a-m4a', '720w+a-m4a', '360c', '240+a-m4a']
+    assert video_candidates(INFO, max_height=360)[0] == (360, '360c', 5 * MB)
+
+
+@pytest.mark.parametrize('limit, selector, size', [
+    (100 * MB, '1080+a-m4a', 51_600_000),
+    (30 * MB, '720+a-m4a', 21_600_000),
+    # mp4 ב-720 לא נכנס - webm באותו גובה לפני ירידה ל-360
+    (20 * MB, '720w+a-m4a', 16_600_000),
+    (10 * MB, '360c', 5 * MB),
+    (4_100_000, '240+a-m4a', 4_100_000),
+])
+def test_best_candidate_that_fits(limit: int, selector: str, size: int) -> None:
+    plan = plan_download(INFO, 'best', False, limit)
+    assert (plan.format_selector, plan.estimated_size, plan.fits) == (selector, size, True)
+
+
+def test_quality_caps_height() -> None:
+    assert plan_download(INFO, '360', False, 100 * MB).format_selector == '360c'
+
+
+def test_unknown_size_keeps_default_selector() -> None:
+    info = {'duration': 100, 'formats': [_fmt('720', 720, acodec='mp4a'), _fmt('360', 360, size=MB, acodec='mp4a')]}
+    assert plan_download(info, 'best', False, 10 * MB) == DownloadPlan()
+
+
+def test_nothing_fits_without_transcode() -> None:
+    plan = plan_download(INFO, 'best', False, 3 * MB)
+    assert not plan.fits
+    assert plan.estimated_size == 4_100_000
+
+
+def test_nothing_fits_transcodes_smallest(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr('services.size_fit.SIZE_FIT_TRANSCODE', True)
+    monkeypatch.setattr('services.size_fit.check_ffmpeg', lambda: True)
+    monkeypatch.setattr('services.size_fit.TRANSCODE_AUDIO_BITRATE', 64)
+    monkeypatch.setattr('services.size_fit.TRANSCODE_MIN_VIDEO_BITRATE', 100)
+
+    # 3MB ב-100 שניות = 240kbps, פחות 64 לאודיו - מעל המינימום
+    plan = plan_download(INFO, 'best', False, 3 * MB)
+    assert plan == DownloadPlan(format_selector='240+a-m4a', estimated_size=4_100_000, transcode=True)
+
+    # 1MB = 80kbps - לא נשאר מספיק לווידאו
+    assert not plan_download(INFO, 'best', False, MB).fits
+
+
+@pytest.mark.parametrize('limit, bitrate', [
+    (10 * MB, 192),
+    (2 * MB, 160),       # בדיוק בגבול
+    (1_900_000, 128),
+    (MB, 64),
+    (400_000, 32),
+])
+def test_audio_bitrate_fits_limit(limit: int, bitrate: int) -> None:
+    plan = plan_download(INFO, 'best', True, limit)
+    assert plan.audio_bitrate == bitrate
+    assert plan.estimated_size == bitrate * 1000 // 8 * 100
+
+
+def test_audio_too_long_or_unknown_duration() -> None:
+    assert not plan_download(INFO, 'best', True, 300_000).fits
+    assert plan_download({'formats': []}, 'best', True, MB) == DownloadPlan()
+    assert plan_download(None, 'best', True, MB) == DownloadPlan()
@@ -0,0 +1,125 @@
+"""
+ניסיונות חוזרים בלקוח ה-Bot API - send* לא נשלח פעמיים אחרי שהבקשה יצאה
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+import requests
+
+from telebot.async_telebot import AsyncTeleBot
+
+from benchmarks.fake_telegram import FakeTelegramServer
+from services.telegram_api import TelegramApiClient
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr('services.telegram_api._backoff', lambda attempt: 0.0)
+
+
+@pytest.fixture
+def refused_url() -> str:
+    """פורט שאף אחד לא מקשיב בו - החיבור נדחה לפני שהבקשה נשלחה"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        port = sock.getsockname()[1]
+    return f'http://127.0.0.1:{port}/bot1:x/method'
+
+
+@pytest.fixture
+def dropping_url() -> Iterator[str]:
+    """שרת שקורא את הבקשה וסוגר את החיבור בלי תשובה - אולי הבקשה טופלה"""
+    server = socket.socket()
+    server.bind(('127.0.0.1', 0))
+    server.listen(16)
+
+    def serve() -> None:
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with conn:
+                conn.recv(65536)
+
+    threading.Thread(target=serve, daemon=True).start()
+    try:
+        yield f'http://127.0.0.1:{server.getsockname()[1]}/bot1:x/method'
+    finally:
+        server.close()
+
+
+def _attempts(method: str, url: str) -> int:
+    client = TelegramApiClient(max_retries=2)
+    calls: List[int] = []
+
+    def send() -> requests.Response:
+        calls.append(1)
+        return client.session.post(url, data={'text': 'x'}, timeout=5)
+
+    with pytest.raises(requests.ConnectionError):
+        client.call(method, None, send)
+    return len(calls)
+
+
+@pytest.mark.parametrize('method', ['sendMessage', 'editMessageText'])
+def test_connect_failure_retried(method: str, refused_url: str) -> None:
+    assert _attempts(method, refused_url) == 3
+
+
+def test_send_not_retried_after_request_left(dropping_url: str) -> None:
+    assert _attempts('sendMessage', dropping_url) == 1
+
+
+def test_edit_retried_after_request_left(dropping_url: str) -> None:
+    assert _attempts('editMessageText', dropping_url) == 3
+
+
+def test_async_requests_share_chat_bucket() -> None:
+    client = TelegramApiClient(chat_rate=10, chat_burst=1)
+    sent: List[float] = []
+
+    async def send() -> bool:
+        sent.append(time.monotonic())
+        return True
+
+    def ok_response() -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        return response
+
+    async def main() -> None:
+        # בקשה סינכרונית ואז שתי אסינכרוניות לאותו צ'אט - דלי אחד
+        client.call('sendMessage', 7, ok_response)
+        for _ in range(2):
+            await client.call_async('sendMessage', 7, send)
+
+    started = time.monotonic()
+    asyncio.run(main())
+    assert len(sent) == 2
+    assert time.monotonic() - started >= 0.15
+
+
+def test_async_bot_waits_out_flood(fake_server: FakeTelegramServer, api_calls) -> None:
+    fake_server.flood['sendMessage'] = 1
+    fake_server.flood_retry_after = 1
+
+    async def main() -> None:
+        bot = AsyncTeleBot('123456:TEST_TOKEN')
+        try:
+            await bot.send_message(42, 'hello')
+        finally:
+            await bot.close_session()
+
+    started = time.monotonic()
+    asyncio.run(main())
+
+    # 429 אחד (לא מגיע ל-on_call), השהיית הצ'אט, ואז הצלחה
+    assert [method for method, _ in api_calls] == ['sendMessage']
+    assert fake_server.flood['sendMessage'] == 0
+    assert time.monotonic() - started >= 1
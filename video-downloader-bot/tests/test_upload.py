@@ -0,0 +1,97 @@
+"""
+שליחת קבצים מול שרת ה-Bot API המזויף - מגבלות, העלאה או נתיב, וסוג השליחה
+"""
+
+from pathlib import Path
+from urllib.parse import unquote, urlparse
+
+import pytest
+
+from benchmarks.fake_telegram import FakeTelegramServer
+from handlers.sending import send_file
+from services import get_api_limits
+from services.bot_api import CLOUD_LIMITS, MB, ApiLimits
+
+GB = 1024 * MB
+
+
+@pytest.fixture
+def video_file(tmp_path: Path) -> Path:
+    path = tmp_path / 'video.mp4'
+    path.write_bytes(b'\0' * (64 * 1024))
+    return path
+
+
+@pytest.fixture(autouse=True)
+def default_max_size(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr('services.bot_api.MAX_FILE_SIZE', 2 * GB)
+
+
+def test_cloud_limits(cloud_api) -> None:
+    limits = get_api_limits()
+    assert limits.max_upload == 50 * MB
+    assert limits.max_video == 50 * MB
+    assert not limits.local_paths
+
+
+def test_local_limits(local_api) -> None:
+    limits = get_api_limits()
+    assert limits.max_upload == 2000 * MB
+    assert limits.max_video == 2000 * MB
+    assert limits.local_paths
+
+
+def test_limits_capped_by_max_file_size(local_api, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr('services.bot_api.MAX_FILE_SIZE', 100 * MB)
+    limits = get_api_limits()
+    assert limits.max_upload == 100 * MB
+    assert limits.max_video == 100 * MB
+
+
+def test_local_api_sends_file_path(local_api, bot, api_calls, fake_server: FakeTelegramServer,
+                                   video_file: Path) -> None:
+    uploaded, read_locally = fake_server.upload_bytes, fake_server.local_bytes
+
+    message = send_file(bot, 1, str(video_file), audio_only=False)
+
+    method, params = api_calls[-1]
+    assert method == 'sendVideo'
+    assert params['video'].startswith('file://')
+    assert Path(unquote(urlparse(params['video']).path)) == video_file.resolve()
+    # השרת קרא את הקובץ מהדיסק - שום בייט לא עבר ב-HTTP
+    assert fake_server.local_bytes - read_locally == video_file.stat().st_size
+    assert fake_server.upload_bytes == uploaded
+    assert message.video is not None
+
+
+def test_cloud_api_uploads_bytes(cloud_api, bot, api_calls, fake_server: FakeTelegramServer,
+                                 video_file: Path) -> None:
+    uploaded = fake_server.upload_bytes
+
+    message = send_file(bot, 1, str(video_file), audio_only=False)
+
+    method, params = api_calls[-1]
+    assert method == 'sendVideo'
+    assert not params['video'].startswith('file://')
+    assert fake_server.upload_bytes - uploaded == video_file.stat().st_size
+    assert message.video is not None
+
+
+@pytest.mark.parametrize('max_video, audio_only, expected', [
+    (1 * MB, False, 'sendVideo'),
+    (32 * 1024, False, 'sendDocument'),
+    (32 * 1024, True, 'sendAudio'),
+])
+@pytest.mark.parametrize('server', ['cloud_api', 'local_api'])
+def test_send_method_by_size(server: str, max_video: int, audio_only: bool, expected: str,
+                             request: pytest.FixtureRequest, monkeypatch: pytest.MonkeyPatch,
+                             bot, api_calls, video_file: Path) -> None:
+    request.getfixturevalue(server)
+    limits = ApiLimits(max_upload=CLOUD_LIMITS.max_upload, max_video=max_video,
+                       local_paths=server == 'local_api')
+    monkeypatch.setattr('services.bot_api.CLOUD_LIMITS', limits)
+    monkeypatch.setattr('services.bot_api.LOCAL_LIMITS', limits)
+
+    send_file(bot, 1, str(video_file), audio_only=audio_only)
+
+    assert [method for method, _ in api_calls] == [expected]
@@ -3,4 +3,5 @@
 """
 
 from .formatters import format_duration, format_number, format_size
-from .helpers import extract_url, cleanup_file, setup_logger
+from .helpers import extract_url, extract_urls, canonicalize_url, cleanup_file, cleanup_dir, setup_logger
+from .cache import TTLCache
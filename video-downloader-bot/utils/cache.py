@@ -0,0 +1,191 @@
+"""
+קאש בזיכרון עם TTL, פינוי LRU ותקציב גודל
+"""
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+
+def estimate_size(value: Any) -> int:
+    """
+    הערכת גודל ערך בבייטים (לפי ייצוג JSON)
+
+    Args:
+        value: הערך להערכה
+
+    Returns:
+        גודל משוער בבייטים
+    """
+    try:
+        return len(json.dumps(value, default=str, ensure_ascii=False).encode('utf-8'))
+    except (TypeError, ValueError):
+        return len(repr(value))
+
+
+class TTLCache:
+    """
+    קאש thread-safe עם תפוגה לפי זמן, מגבלת כמות ומגבלת בייטים
+
+    רשומות ישנות מפונות לפי סדר שימוש (LRU) כשעוברים אחת מהמגבלות.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int, ttl: float):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+
+        # מפתח -> (ערך, גודל, זמן תפוגה)
+        self._data: "OrderedDict[str, Tuple[Any, int, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """
+        קבלת ערך מהקאש
+
+        Args:
+            key: המפתח
+            default: ערך ברירת מחדל אם לא נמצא או פג תוקף
+
+        Returns:
+            הערך השמור או ברירת המחדל
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+
+            value, _, expires_at = item
+            if expires_at <= time.monotonic():
+                self._remove(key)
+                self.expirations += 1
+                self.misses += 1
+                return default
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """
+        שמירת ערך בקאש (מחליף ערך קיים)
+
+        Args:
+            key: המפתח
+            value: הערך
+            ttl: זמן חיים בשניות (ברירת מחדל - של הקאש)
+        """
+        size = estimate_size(value)
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+            # ערך גדול מכל התקציב - לא נשמר בכלל
+            if size > self.max_bytes:
+                self.evictions += 1
+                return
+
+            self._data[key] = (value, size, expires_at)
+            self._bytes += size
+            self._evict()
+
+    def update(self, key: str, **fields: Any) -> bool:
+        """
+        עדכון שדות ברשומה קיימת (מילון) תוך שמירה על זמן התפוגה
+
+        Args:
+            key: המפתח
+            **fields: שדות לעדכון
+
+        Returns:
+            True אם הרשומה קיימת ועודכנה
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[2] <= time.monotonic():
+                return False
+
+            value = dict(item[0])
+            value.update(fields)
+            remaining = item[2] - time.monotonic()
+            self.set(key, value, ttl=remaining)
+            return key in self._data
+
+    def delete(self, key: str) -> None:
+        """מחיקת רשומה מהקאש"""
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+
+    def __contains__(self, key: str) -> bool:
+        with self._lock:
+            item = self._data.get(key)
+            return item is not None and item[2] > time.monotonic()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+    def purge_expired(self) -> int:
+        """
+        מחיקת כל הרשומות שפג תוקפן
+
+        Returns:
+            מספר הרשומות שנמחקו
+        """
+        now = time.monotonic()
+        with self._lock:
+            expired = [k for k, (_, _, exp) in self._data.items() if exp <= now]
+            for key in expired:
+                self._remove(key)
+            self.expirations += len(expired)
+            return len(expired)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        סטטיסטיקות שימוש
+
+        Returns:
+            מילון עם מונים וגודל נוכחי
+        """
+        with self._lock:
+            return {
+                'entries': len(self._data),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'expirations': self.expirations,
+            }
+
+    def _remove(self, key: str) -> None:
+        """הסרת רשומה ועדכון מונה הבייטים (נקרא תחת נעילה)"""
+        _, size, _ = self._data.pop(key)
+        self._bytes -= size
+
+    def _evict(self) -> None:
+        """פינוי רשומות לפי LRU עד שחוזרים למגבלות (נקרא תחת נעילה)"""
+        if len(self._data) <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+
+        # קודם כל - רשומות שפג תוקפן
+        now = time.monotonic()
+        for key in [k for k, (_, _, exp) in self._data.items() if exp <= now]:
+            self._remove(key)
+            self.expirations += 1
+
+        while self._data and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+            _, (_, size, _) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
@@ -60,3 +60,18 @@ def format_size(bytes_size: Optional[int]) -> str:
             return f"{bytes_size:.1f} {unit}"
         bytes_size /= 1024
     return f"{bytes_size:.1f} TB"
+
+
+def format_progress_bar(percent: float, width: int = 10) -> str:
+    """
+    פס התקדמות טקסטואלי
+
+    Args:
+        percent: אחוז התקדמות (0-100)
+        width: מספר התווים בפס
+
+    Returns:
+        מחרוזת כמו ▓▓▓▓░░░░░░
+    """
+    filled = int(round(max(0.0, min(percent, 100.0)) / 100 * width))
+    return '▓' * filled + '░' * (width - filled)
@@ -6,7 +6,24 @@ import os
 import re
 import logging
 import shutil
-from typing import Optional
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# פרמטרי מעקב שלא משנים את התוכן - מוסרים מהמפתח הקנוני בכל אתר (וגם utm_*)
+_TRACKING_PARAMS = {'si', 'fbclid', 'gclid', 'igshid', 'igsh', 'mibextid'}
+
+# פרמטרים שהם מעקב רק באתר מסוים (באתרים אחרים s / ref יכולים לבחור תוכן)
+_SITE_TRACKING_PARAMS = {
+    'youtube.com': {'feature', 'pp'},
+    'twitter.com': {'s', 't', 'ref_src', 'ref_url'},
+    'tiktok.com': {'is_from_webapp', 'sender_device', 'share_id'},
+    'facebook.com': {'ref'},
+}
+
+_DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+_YOUTUBE_HOSTS = {'youtube.com', 'm.youtube.com', 'music.youtube.com', 'youtube-nocookie.com'}
+_YOUTUBE_ID_PATH = re.compile(r'^/(?:shorts|embed|live|v)/([\w-]{11})')
 
 
 def setup_logger(name: str) -> logging.Logger:
@@ -27,6 +44,9 @@ def setup_logger(name: str) -> logging.Logger:
     return logging.getLogger(name)
 
 
+_URL_PATTERN = re.compile(r'https?://[^\s<>"{}|\\^`\[\]]+')
+
+
 def extract_url(text: str) -> Optional[str]:
     """
     חילוץ URL מטקסט
@@ -37,11 +57,90 @@ def extract_url(text: str) -> Optional[str]:
     Returns:
         URL אם נמצא, אחרת None
     """
-    url_pattern = r'https?://[^\s<>"{}|\\^`\[\]]+'
-    match = re.search(url_pattern, text)
+    match = _URL_PATTERN.search(text)
     return match.group(0) if match else None
 
 
+def extract_urls(text: str) -> List[str]:
+    """
+    חילוץ כל ה-URLs מטקסט (בלי כפילויות, לפי סדר ההופעה)
+
+    Args:
+        text: טקסט שעשוי להכיל כמה URLs
+
+    Returns:
+        רשימת URLs (ריקה אם אין)
+    """
+    return list(dict.fromkeys(_URL_PATTERN.findall(text)))
+
+
+def canonicalize_url(url: str) -> str:
+    """
+    נרמול URL למפתח קנוני - קישורים שונים לאותו תוכן מקבלים אותו מפתח
+
+    לדוגמה youtu.be/X ו-youtube.com/watch?v=X&si=... הופכים ל-
+    https://www.youtube.com/watch?v=X. קישור עם list= נשאר נפרד (yt-dlp
+    מחלץ ממנו את הפלייליסט, לא סרטון בודד). בשאר האתרים נשמרים הסכמה,
+    הפורט וכל הפרמטרים חוץ ממעקב מוכר.
+
+    Args:
+        url: הקישור המקורי
+
+    Returns:
+        הקישור בצורה קנונית
+    """
+    try:
+        parts = urlsplit(url.strip())
+        port = parts.port
+    except ValueError:
+        return url
+
+    scheme = (parts.scheme or 'https').lower()
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path or '/'
+
+    # YouTube - כל הצורות מתכנסות ל-watch?v=ID (ועם list= - ל-watch?v=ID&list=...)
+    video_id = None
+    params = dict(parse_qsl(parts.query))
+    if host == 'youtu.be':
+        video_id = path.strip('/').split('/')[0] or None
+    elif host in _YOUTUBE_HOSTS:
+        if path == '/watch':
+            video_id = params.get('v')
+        else:
+            match = _YOUTUBE_ID_PATH.match(path)
+            if match:
+                video_id = match.group(1)
+    if video_id:
+        canonical = f"https://www.youtube.com/watch?v={video_id}"
+        if params.get('list'):
+            canonical += '&' + urlencode({'list': params['list']})
+        return canonical
+
+    # שאר האתרים - הסרת פרמטרי מעקב ומיון הפרמטרים
+    if host in ('m.facebook.com', 'mobile.twitter.com', 'mobile.x.com'):
+        host = host.split('.', 1)[1]
+    if host == 'x.com':
+        host = 'twitter.com'
+
+    tracking = set(_TRACKING_PARAMS)
+    for site, params in _SITE_TRACKING_PARAMS.items():
+        if host == site or host.endswith('.' + site):
+            tracking |= params
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if k.lower() not in tracking and not k.lower().startswith('utm_')
+    )
+    if len(path) > 1:
+        path = path.rstrip('/')
+
+    # הסכמה והפורט נשמרים - שרתים שונים הם תוכן שונה
+    netloc = host if port is None or port == _DEFAULT_PORTS.get(scheme) else f"{host}:{port}"
+    return urlunsplit((scheme, netloc, path, urlencode(query), ''))
+
+
 def cleanup_file(filepath: str) -> None:
     """
     מחיקת קובץ זמני
@@ -58,6 +157,30 @@ def cleanup_file(filepath: str) -> None:
         logger.error(f"שגיאה במחיקת קובץ: {e}")
 
 
+def cleanup_dir(dirpath) -> None:
+    """
+    מחיקת תיקייה זמנית עם כל התוכן שלה
+
+    התיקייה מועברת קודם לשם זמני (פעולה אטומית), כך שאף אחד לא רואה
+    תיקייה מחוקה חלקית, ורק אז נמחקת.
+
+    Args:
+        dirpath: נתיב התיקייה למחיקה
+    """
+    logger = logging.getLogger(__name__)
+    if not dirpath or not os.path.isdir(dirpath):
+        return
+    parent, name = os.path.split(os.path.normpath(dirpath))
+    trash = os.path.join(parent, f".trash-{name}")
+    try:
+        os.rename(dirpath, trash)
+    except OSError as e:
+        logger.error(f"שגיאה בהעברת תיקייה למחיקה: {e}")
+        trash = dirpath
+    shutil.rmtree(trash, ignore_errors=True)
+    logger.info(f"נמחקה תיקייה: {dirpath}")
+
+
 def check_ffmpeg() -> bool:
     """
     בדיקה אם ffmpeg מותקן במערכת
@@ -0,0 +1,95 @@
+"""
+הגבלת קצב - דלי אסימונים (token bucket)
+"""
+
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    דלי אסימונים thread-safe
+
+    הדלי מתמלא בקצב קבוע עד הקיבולת. כל פעולה צורכת אסימון, כך שמתאפשרים
+    פרצים קצרים עד הקיבולת וקצב ממוצע שלא עולה על rate.
+    """
+
+    def __init__(self, rate: float, capacity: Optional[float] = None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        """מילוי אסימונים לפי הזמן שעבר (נקרא תחת נעילה)"""
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1) -> bool:
+        """
+        ניסיון לצרוך אסימונים בלי להמתין
+
+        Args:
+            tokens: מספר אסימונים
+
+        Returns:
+            True אם נצרכו, False אם אין מספיק
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1, timeout: Optional[float] = None) -> float:
+        """
+        צריכת אסימונים עם המתנה עד שיתפנו
+
+        Args:
+            tokens: מספר אסימונים
+            timeout: זמן המתנה מקסימלי (None = ללא הגבלה)
+
+        Returns:
+            זמן ההמתנה בפועל בשניות
+
+        Raises:
+            TimeoutError: אם לא התפנו אסימונים בזמן
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return time.monotonic() - start
+                wait = (tokens - self._tokens) / self.rate
+
+            if timeout is not None and time.monotonic() - start + wait > timeout:
+                raise TimeoutError()
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: float = 1) -> float:
+        """
+        כמו acquire, בלי לחסום את לולאת האירועים
+
+        Args:
+            tokens: מספר אסימונים
+
+        Returns:
+            זמן ההמתנה בפועל בשניות
+        """
+        start = time.monotonic()
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return time.monotonic() - start
+                wait = (tokens - self._tokens) / self.rate
+
+            await asyncio.sleep(wait)
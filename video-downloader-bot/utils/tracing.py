@@ -0,0 +1,244 @@
+"""
+spans קלים למעקב אחרי זמני שלבים בעבודה אחת, ופרופיילינג מדוגם לעבודות איטיות
+
+span נפתח עם context manager או decorator ומקונן אוטומטית תחת ה-span
+הפעיל (contextvars). spans שהסתיימו נכתבים כשורת JSON לקובץ (JSONL),
+כך שאפשר לראות לאן הלכו 90 השניות של עבודה אחת.
+"""
+
+import contextvars
+import cProfile
+import functools
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    """קטע זמן אחד בעבודה"""
+    name: str
+    trace_id: str
+    span_id: str
+    parent_id: Optional[str] = None
+    start: float = field(default_factory=time.time)
+    duration: Optional[float] = None
+    status: str = 'ok'
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    _started: float = field(default_factory=time.perf_counter, repr=False)
+
+    def set(self, **attrs: Any) -> 'Span':
+        """הוספת מאפיינים ל-span"""
+        self.attrs.update(attrs)
+        return self
+
+    def end(self, status: Optional[str] = None) -> None:
+        """
+        סגירת ה-span וייצוא שלו (פעם אחת בלבד)
+
+        Args:
+            status: ok / error (None = להשאיר את הקיים)
+        """
+        if self.duration is not None:
+            return
+        self.duration = time.perf_counter() - self._started
+        if status is not None:
+            self.status = status
+        _export(self)
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data.pop('_started')
+        data['duration'] = round(self.duration or 0.0, 6)
+        return data
+
+
+class JSONLExporter:
+    """כתיבת spans שהסתיימו לקובץ JSONL (שורה לכל span)"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(line + '\n')
+
+
+_current: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar('current_span', default=None)
+_exporter: Optional[JSONLExporter] = None
+
+
+def configure_tracing(path: Optional[str]) -> None:
+    """
+    הפעלת ייצוא spans לקובץ
+
+    Args:
+        path: נתיב קובץ ה-JSONL (ריק/None = בלי ייצוא)
+    """
+    global _exporter
+    _exporter = JSONLExporter(Path(path)) if path else None
+    if _exporter:
+        logger.info(f"[tracing] spans נכתבים ל-{_exporter.path}")
+
+
+def _export(span: Span) -> None:
+    if _exporter is None:
+        return
+    try:
+        _exporter.export(span)
+    except OSError as e:
+        logger.warning(f"[tracing] שגיאה בכתיבת span: {e}")
+
+
+def current_span() -> Optional[Span]:
+    """ה-span הפעיל בהקשר הנוכחי (אם יש)"""
+    return _current.get()
+
+
+def start_span(name: str, parent: Optional[Span] = None, **attrs: Any) -> Span:
+    """
+    פתיחת span תחת ה-span הפעיל, בלי להפוך אותו לפעיל
+
+    מיועד לקטעים שמתחילים ונגמרים ב-callbacks (לדוגמה hooks של yt-dlp).
+    יש לסגור עם span.end().
+
+    Args:
+        name: שם ה-span
+        parent: span אב מפורש (ל-callbacks שרצים ב-thread אחר)
+        **attrs: מאפיינים
+
+    Returns:
+        ה-span שנפתח
+    """
+    parent = parent or _current.get()
+    return Span(
+        name=name,
+        trace_id=parent.trace_id if parent else uuid.uuid4().hex[:16],
+        span_id=uuid.uuid4().hex[:8],
+        parent_id=parent.span_id if parent else None,
+        attrs=attrs,
+    )
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """
+    מדידת בלוק קוד כ-span פעיל (spans פנימיים יקוננו תחתיו)
+
+    Args:
+        name: שם ה-span
+        **attrs: מאפיינים
+
+    Yields:
+        ה-span (אפשר להוסיף מאפיינים עם set)
+    """
+    current = start_span(name, **attrs)
+    token = _current.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.set(error=f"{type(e).__name__}: {e}"[:200])
+        current.end('error')
+        raise
+    finally:
+        _current.reset(token)
+        current.end()
+
+
+def traced(name: Optional[str] = None, profile: bool = False) -> Callable:
+    """
+    decorator שעוטף פונקציה ב-span
+
+    Args:
+        name: שם ה-span (ברירת מחדל - שם הפונקציה)
+        profile: האם לדגום את הקריאה ב-cProfile (ראה sampled_profile)
+
+    Returns:
+        ה-decorator
+    """
+    def decorator(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            with span(span_name) as current:
+                if not profile:
+                    return func(*args, **kwargs)
+                with sampled_profile(f"{span_name}_{current.trace_id}"):
+                    return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+# הגדרות פרופיילינג (configure_profiling)
+_profile_settings: Dict[str, Any] = {'sample_rate': 0.0, 'slow_seconds': 0.0, 'directory': None}
+
+# פרופיילר אחד בכל רגע - ב-Python 3.12+ שני פרופיילרים במקביל נכשלים
+_profile_lock = threading.Lock()
+
+
+def configure_profiling(sample_rate: float, slow_seconds: float, directory: Path) -> None:
+    """
+    הגדרת פרופיילינג מדוגם
+
+    Args:
+        sample_rate: חלק העבודות שנדגמות (0 = כבוי, 1 = כולן)
+        slow_seconds: שומרים פרופיל רק לעבודה שלקחה לפחות זמן זה
+        directory: תיקייה לקבצי ה-.prof
+    """
+    _profile_settings.update(sample_rate=sample_rate, slow_seconds=slow_seconds, directory=Path(directory))
+
+
+@contextmanager
+def sampled_profile(name: str) -> Iterator[None]:
+    """
+    הרצת בלוק תחת cProfile בהסתברות sample_rate, ושמירת התוצאה אם היה איטי
+
+    הפרופיל מכסה רק את ה-thread הנוכחי; קבצים נשמרים כ-{name}.prof
+    וניתנים לפתיחה עם pstats / snakeviz.
+
+    Args:
+        name: שם הקובץ (ללא סיומת)
+    """
+    settings = _profile_settings
+    if not settings['sample_rate'] or random.random() >= settings['sample_rate']:
+        yield
+        return
+
+    if not _profile_lock.acquire(blocking=False):
+        yield  # עבודה אחרת כבר בפרופיילינג
+        return
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    try:
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+
+        elapsed = time.perf_counter() - start
+        if elapsed >= settings['slow_seconds']:
+            directory: Path = settings['directory']
+            directory.mkdir(parents=True, exist_ok=True)
+            path = directory / f"{name}.prof"
+            profiler.dump_stats(str(path))
+            logger.info(f"[tracing] עבודה איטית ({elapsed:.1f}s) - פרופיל נשמר: {path}")
+    finally:
+        _profile_lock.release()
@@ -0,0 +1,243 @@
+"""
+קליטת עדכונים דרך webhook - אפליקציית ASGI (Starlette) במקום long polling
+
+העדכונים נבדקים (secret token - נוצר אקראית אם WEBHOOK_SECRET ריק), נכנסים לתור פנימי חסום ומוחזרת תשובה
+מיידית לטלגרם. צרכנים ברקע מעבירים אותם לבוט. כשהתור מלא מוחזר 503
+וטלגרם שולח את העדכון שוב מאוחר יותר (back-pressure).
+"""
+
+import asyncio
+import hmac
+import json
+import logging
+import secrets
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, List, Optional, Union
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response
+from starlette.routing import Route
+
+from telebot import TeleBot, types
+from telebot.async_telebot import AsyncTeleBot
+
+from config import (
+    WEBHOOK_URL,
+    WEBHOOK_PATH,
+    WEBHOOK_SECRET,
+    WEBHOOK_QUEUE_SIZE,
+    WEBHOOK_CONSUMERS,
+)
+from services import render_metrics
+from utils.metrics import get_registry, CONTENT_TYPE
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = 'X-Telegram-Bot-Api-Secret-Token'
+ALLOWED_UPDATES = ["message", "callback_query"]
+
+
+class UpdateDispatcher:
+    """
+    תור עדכונים חסום עם צרכנים ברקע
+
+    עובד עם AsyncTeleBot (await ישיר) ועם TeleBot סינכרוני (דרך executor).
+    """
+
+    def __init__(self, bot: Union[AsyncTeleBot, TeleBot],
+                 queue_size: int = WEBHOOK_QUEUE_SIZE,
+                 consumers: int = WEBHOOK_CONSUMERS):
+        self.bot = bot
+        self.queue_size = queue_size
+        self.consumers = consumers
+        self.accepted = 0
+        self.rejected = 0
+        self.processed = 0
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """הפעלת הצרכנים (נקרא מתוך לולאת האירועים)"""
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._consume(), name=f"update-consumer-{i}")
+            for i in range(self.consumers)
+        ]
+
+    def offer(self, update: types.Update) -> bool:
+        """
+        הכנסת עדכון לתור בלי להמתין
+
+        Args:
+            update: העדכון מטלגרם
+
+        Returns:
+            True אם נכנס, False אם התור מלא
+        """
+        try:
+            self._queue.put_nowait(update)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def depth(self) -> int:
+        """מספר העדכונים שממתינים בתור"""
+        return self._queue.qsize() if self._queue else 0
+
+    async def stop(self, timeout: float = 30) -> None:
+        """
+        עצירה מסודרת - המתנה לריקון התור ואז ביטול הצרכנים
+
+        Args:
+            timeout: זמן המתנה מקסימלי לריקון התור
+        """
+        if self._queue is not None:
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"[webhook] {self.depth()} עדכונים לא טופלו לפני כיבוי")
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def _consume(self) -> None:
+        """לולאת צרכן - העברת עדכונים לבוט"""
+        loop = asyncio.get_running_loop()
+        while True:
+            update = await self._queue.get()
+            try:
+                if isinstance(self.bot, AsyncTeleBot):
+                    await self.bot.process_new_updates([update])
+                else:
+                    await loop.run_in_executor(None, self.bot.process_new_updates, [update])
+                self.processed += 1
+            except Exception as e:
+                logger.error(f"[webhook] שגיאה בטיפול בעדכון: {e}", exc_info=True)
+            finally:
+                self._queue.task_done()
+
+
+def create_app(bot: Union[AsyncTeleBot, TeleBot], set_webhook: bool = True,
+               on_shutdown: Optional[Any] = None) -> Starlette:
+    """
+    יצירת אפליקציית ה-ASGI של ה-webhook
+
+    Args:
+        bot: הבוט (אסינכרוני או סינכרוני) שמטפל בעדכונים
+        set_webhook: האם לרשום את ה-webhook מול טלגרם בהפעלה
+        on_shutdown: פונקציה סינכרונית לקריאה בכיבוי (למשל כיבוי מתזמן ההורדות)
+
+    Returns:
+        אפליקציית Starlette
+    """
+    dispatcher = UpdateDispatcher(bot)
+    _register_dispatcher_metrics(dispatcher)
+
+    # בלי סוד כל אחד יכול לשלוח עדכונים מזויפים - נוצר סוד אקראי ונרשם מול טלגרם
+    secret = WEBHOOK_SECRET
+    if not secret:
+        secret = secrets.token_urlsafe(32)
+        if set_webhook:
+            logger.warning("[webhook] WEBHOOK_SECRET לא הוגדר - נוצר סוד אקראי לריצה הזו")
+        else:
+            logger.error("[webhook] WEBHOOK_SECRET לא הוגדר וה-webhook לא נרשם - כל העדכונים יידחו")
+
+    async def receive_update(request: Request) -> Response:
+        """קבלת עדכון מטלגרם"""
+        token = request.headers.get(SECRET_HEADER, '')
+        if not hmac.compare_digest(token.encode(), secret.encode()):
+            return Response(status_code=403)
+
+        try:
+            update = types.Update.de_json(json.loads(await request.body()))
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError):
+            return Response(status_code=400)
+
+        if update is None:
+            return Response(status_code=400)
+
+        if not dispatcher.offer(update):
+            # טלגרם ינסה שוב - עדיף על איבוד העדכון
+            return Response(status_code=503, headers={'Retry-After': '1'})
+
+        return Response(status_code=200)
+
+    async def health(request: Request) -> Response:
+        """בדיקת חיים ומצב התור"""
+        return JSONResponse({
+            'status': 'ok',
+            'queue_depth': dispatcher.depth(),
+            'accepted': dispatcher.accepted,
+            'rejected': dispatcher.rejected,
+            'processed': dispatcher.processed,
+        })
+
+    async def metrics(request: Request) -> Response:
+        """מדדים בפורמט Prometheus (כולל מצב תור העדכונים)"""
+        text = await asyncio.get_running_loop().run_in_executor(None, render_metrics)
+        return PlainTextResponse(text, media_type=CONTENT_TYPE)
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        await startup()
+        try:
+            yield
+        finally:
+            await shutdown()
+
+    async def startup() -> None:
+        await dispatcher.start()
+        if set_webhook:
+            await _call_bot(
+                bot, 'set_webhook',
+                url=WEBHOOK_URL.rstrip('/') + WEBHOOK_PATH,
+                secret_token=secret,
+                allowed_updates=ALLOWED_UPDATES,
+                drop_pending_updates=False
+            )
+            logger.info(f"[webhook] נרשם webhook: {WEBHOOK_URL.rstrip('/')}{WEBHOOK_PATH}")
+
+    async def shutdown() -> None:
+        await dispatcher.stop()
+        if on_shutdown is not None:
+            await asyncio.get_running_loop().run_in_executor(None, on_shutdown)
+        if isinstance(bot, AsyncTeleBot):
+            await bot.close_session()
+
+    app = Starlette(
+        routes=[
+            Route(WEBHOOK_PATH, receive_update, methods=['POST']),
+            Route('/healthz', health, methods=['GET']),
+            Route('/metrics', metrics, methods=['GET']),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.dispatcher = dispatcher
+    return app
+
+
+def _register_dispatcher_metrics(dispatcher: UpdateDispatcher) -> None:
+    """חשיפת מצב תור העדכונים של ה-webhook כמדדים"""
+    registry = get_registry()
+    depth = registry.gauge('bot_webhook_queue_depth', "עדכונים שממתינים בתור ה-webhook")
+    updates = registry.gauge('bot_webhook_updates', "עדכוני webhook לפי מצב", ('state',))
+
+    def collect() -> None:
+        depth.set(dispatcher.depth())
+        updates.set(dispatcher.accepted, state='accepted')
+        updates.set(dispatcher.rejected, state='rejected')
+        updates.set(dispatcher.processed, state='processed')
+
+    registry.add_collector(collect)
+
+
+async def _call_bot(bot: Union[AsyncTeleBot, TeleBot], method: str, **kwargs: Any) -> Any:
+    """קריאה למתודת API בבוט אסינכרוני או סינכרוני"""
+    func = getattr(bot, method)
+    if isinstance(bot, AsyncTeleBot):
+        return await func(**kwargs)
+    return await asyncio.get_running_loop().run_in_executor(None, lambda: func(**kwargs))